@@ -0,0 +1,64 @@
+"""ip_int / mac_int packed columns on ordinateur
+
+Revision ID: 0001_ip_mac_int
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from code.addresses import pack_ip, pack_mac
+
+revision = "0001_ip_mac_int"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BATCH = 1000
+
+
+def upgrade():
+    bind = op.get_bind()
+    columns = {c["name"] for c in sa.inspect(bind).get_columns("ordinateur")}
+    # create_all() crée déjà ces colonnes sur une base neuve
+    if "ip_int" not in columns:
+        op.add_column("ordinateur", sa.Column("ip_int", sa.BigInteger(), nullable=True))
+        op.create_index("ix_ordinateur_ip_int", "ordinateur", ["ip_int"])
+    if "mac_int" not in columns:
+        op.add_column("ordinateur", sa.Column("mac_int", sa.BigInteger(), nullable=True))
+        op.create_index("ix_ordinateur_mac_int", "ordinateur", ["mac_int"])
+
+    # remplissage des lignes existantes, par lots
+    ordinateur = sa.table(
+        "ordinateur",
+        sa.column("id", sa.Integer), sa.column("ip", sa.String), sa.column("mac", sa.String),
+        sa.column("ip_int", sa.BigInteger), sa.column("mac_int", sa.BigInteger),
+    )
+    update = (
+        ordinateur.update()
+        .where(ordinateur.c.id == sa.bindparam("row_id"))
+        .values(ip_int=sa.bindparam("new_ip_int"), mac_int=sa.bindparam("new_mac_int"))
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(ordinateur.c.id, ordinateur.c.ip, ordinateur.c.mac)
+            .where(ordinateur.c.id > last_id)
+            .where(sa.or_(ordinateur.c.ip_int.is_(None), ordinateur.c.mac_int.is_(None)))
+            .order_by(ordinateur.c.id)
+            .limit(BATCH)
+        ).all()
+        if not rows:
+            break
+        bind.execute(update, [
+            {"row_id": r.id, "new_ip_int": pack_ip(r.ip), "new_mac_int": pack_mac(r.mac)}
+            for r in rows
+        ])
+        last_id = rows[-1].id
+
+
+def downgrade():
+    op.drop_index("ix_ordinateur_mac_int", table_name="ordinateur")
+    op.drop_index("ix_ordinateur_ip_int", table_name="ordinateur")
+    op.drop_column("ordinateur", "mac_int")
+    op.drop_column("ordinateur", "ip_int")
@@ -0,0 +1,133 @@
+# bin/agent.py
+# Agent de référence pour POST /ingest : lit /proc et pousse des échantillons.
+#   python bin/agent.py --url http://192.168.1.211:8000/ingest --interval 10
+# Dépendances : bibliothèque standard uniquement.
+import os
+import json
+import time
+import gzip
+import socket
+import argparse
+import urllib.error
+import urllib.request
+from collections import deque
+
+MAX_PENDING = 10000  # échantillons gardés si l'API est injoignable
+
+
+def read_cpu_times():
+    with open("/proc/stat", encoding="utf-8") as f:
+        values = [int(v) for v in f.readline().split()[1:]]
+    idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+    return idle, sum(values)
+
+
+def read_meminfo():
+    info = {}
+    with open("/proc/meminfo", encoding="utf-8") as f:
+        for line in f:
+            key, value = line.split(":", 1)
+            info[key] = int(value.split()[0])  # kB
+    return info
+
+
+def read_uptime():
+    with open("/proc/uptime", encoding="utf-8") as f:
+        return float(f.read().split()[0])
+
+
+def default_mac():
+    # première interface non-loopback avec une adresse MAC
+    for iface in sorted(os.listdir("/sys/class/net")):
+        if iface == "lo":
+            continue
+        try:
+            with open(f"/sys/class/net/{iface}/address", encoding="utf-8") as f:
+                mac = f.read().strip().upper()
+        except OSError:
+            continue
+        if mac and mac != "00:00:00:00:00:00":
+            return mac
+    return None
+
+
+def default_ip():
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("192.0.2.1", 9))  # aucun paquet envoyé (UDP)
+            return s.getsockname()[0]
+    except OSError:
+        return None
+
+
+class Collector:
+
+    def __init__(self):
+        self.last_cpu = read_cpu_times()
+
+    def collect(self):
+        now = time.time()
+        idle, total = read_cpu_times()
+        last_idle, last_total = self.last_cpu
+        self.last_cpu = (idle, total)
+        samples = []
+        if total > last_total:
+            busy = 1.0 - (idle - last_idle) / (total - last_total)
+            samples.append({"metric": "cpu_load", "value": round(100.0 * busy, 2), "ts": now})
+        mem = read_meminfo()
+        # mêmes unités que l'API (Go, colonne "free" de free -m)
+        samples.append({"metric": "free_memory", "value": mem["MemFree"] / 1024 / 1024, "ts": now})
+        samples.append({"metric": "total_memory", "value": mem["MemTotal"] / 1024 / 1024, "ts": now})
+        if "MemAvailable" in mem:
+            samples.append({"metric": "available_memory", "value": mem["MemAvailable"] / 1024 / 1024, "ts": now})
+        samples.append({"metric": "uptime", "value": read_uptime(), "ts": now})
+        return samples
+
+
+def post(url, payload, timeout):
+    body = gzip.compress(json.dumps(payload).encode())
+    request = urllib.request.Request(url, data=body, method="POST", headers={
+        "Content-Type": "application/json", "Content-Encoding": "gzip",
+    })
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Push /proc metrics to the R507 API")
+    parser.add_argument("--url", default="http://localhost:8000/ingest")
+    parser.add_argument("--interval", type=float, default=10.0)
+    parser.add_argument("--mac", default=None)
+    parser.add_argument("--ip", default=None)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--once", action="store_true", help="one sample then exit")
+    args = parser.parse_args()
+
+    identity = {"mac": args.mac or default_mac(), "ip": args.ip or default_ip()}
+    collector = Collector()
+    pending = deque(maxlen=MAX_PENDING)
+    if not args.once:
+        time.sleep(min(args.interval, 1.0))  # premier delta CPU
+
+    while True:
+        pending.extend(collector.collect())
+        delay = args.interval
+        try:
+            result = post(args.url, dict(identity, samples=list(pending)), args.timeout)
+            pending.clear()
+            print(f"sent: {result}", flush=True)
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                delay = max(delay, float(e.headers.get("Retry-After", delay)))
+            elif 400 <= e.code < 500:
+                pending.clear()  # lot refusé : inutile de le renvoyer
+            print(f"ingest error {e.code}, retry in {delay}s", flush=True)
+        except (urllib.error.URLError, OSError) as e:
+            print(f"ingest unreachable ({e}), retry in {delay}s", flush=True)
+        if args.once:
+            break
+        time.sleep(delay)
+
+
+if __name__ == "__main__":
+    main()
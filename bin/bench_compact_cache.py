@@ -0,0 +1,65 @@
+# bin/bench_compact_cache.py
+# Mémoire du cache d'inventaire : instances Ordinateur vs HostCache (__slots__)
+#   python -m bin.bench_compact_cache [N ...]
+import gc
+import sys
+import time
+import tracemalloc
+
+from code.models import Ordinateur, ComputerStatus
+from code.compact import HostCache
+
+OSES = ["Ubuntu 22.04", "Debian 12", "Windows 11", "Alpine 3.20"]
+
+
+def make_row(i: int) -> dict:
+    return {
+        "id": i + 1,
+        "mac": "AA:BB:%02X:%02X:%02X:%02X" % ((i >> 24) & 255, (i >> 16) & 255, (i >> 8) & 255, i & 255),
+        "ip": "10.%d.%d.%d" % ((i >> 16) & 255, (i >> 8) & 255, i & 255),
+        "hostname": "host-%d" % i,
+        "taille_disque": 512,
+        "os": OSES[i % len(OSES)],
+        "status": ComputerStatus.ON,
+        "ram": 16.0,
+        "joignable": True,
+        "ssh_conn_json": {"hostname": "10.0.0.1", "username": "user", "password": "",
+                          "key_filename": "/keys/id_ed25519", "port": 22},
+    }
+
+
+def measure(build, n: int):
+    rows = [make_row(i) for i in range(n)]
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    cache = build(rows)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cache
+    return size, elapsed
+
+
+def build_models(rows):
+    return [Ordinateur(**row) for row in rows]
+
+
+def build_compact(rows):
+    cache = HostCache()
+    cache.replace(rows)
+    return cache
+
+
+def main(sizes):
+    print(f"{'hosts':>8} {'Ordinateur MB':>14} {'HostCache MB':>13} {'ratio':>6} "
+          f"{'build s (orm)':>14} {'build s (compact)':>18}")
+    for n in sizes:
+        orm_size, orm_time = measure(build_models, n)
+        compact_size, compact_time = measure(build_compact, n)
+        print(f"{n:>8} {orm_size / 2**20:>14.1f} {compact_size / 2**20:>13.1f} "
+              f"{orm_size / compact_size:>6.1f} {orm_time:>14.2f} {compact_time:>18.2f}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1000, 10000, 100000])
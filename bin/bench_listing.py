@@ -0,0 +1,77 @@
+# bin/bench_listing.py
+# GET /ordinateurs : ancien chemin (ORM + response_model + encodeur standard)
+# vs chemin rapide (tuples + fastjson) et corps pré-encodé en cache
+#   python -m bin.bench_listing [N ...]
+import sys
+import time
+from typing import List
+
+from fastapi import FastAPI
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel, Session, create_engine, select
+from sqlalchemy.pool import StaticPool
+
+from code.models import Ordinateur
+from code.bulk import upsert_hosts
+from code.fastjson import BACKEND
+from code.listing import PUBLIC_FIELDS, ListingCache, fetch_all_json
+from bin.bench_compact_cache import make_row
+
+REPEAT = 3
+
+
+def make_app(engine, cache):
+    app = FastAPI()
+
+    @app.get("/legacy", response_model=List[Ordinateur])
+    def legacy():
+        with Session(engine) as session:
+            return session.exec(select(Ordinateur)).all()
+
+    @app.get("/fast")
+    def fast():
+        return Response(fetch_all_json(engine, PUBLIC_FIELDS), media_type="application/json")
+
+    @app.get("/cached")
+    def cached():
+        body, _ = cache.body()
+        return Response(body, media_type="application/json")
+
+    return app
+
+
+def best_of(client, path: str):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        response = client.get(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(response.content)
+
+
+def main(sizes):
+    print(f"json backend: {BACKEND}")
+    print(f"{'hosts':>8} {'legacy s':>9} {'fast s':>8} {'cached s':>9} {'speedup':>8} "
+          f"{'body MB':>8} {'gzip MB':>8}")
+    for n in sizes:
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False},
+                               poolclass=StaticPool)
+        SQLModel.metadata.create_all(engine)
+        rows = [make_row(i) for i in range(n)]
+        for row in rows:
+            del row["id"]
+        upsert_hosts(engine, rows)
+        cache = ListingCache(engine)
+        client = TestClient(make_app(engine, cache))
+        legacy, _ = best_of(client, "/legacy")
+        fast, size = best_of(client, "/fast")
+        cached, _ = best_of(client, "/cached")
+        compressed, _ = cache.body(accept_gzip=True)
+        print(f"{n:>8} {legacy:>9.3f} {fast:>8.3f} {cached:>9.4f} {legacy / fast:>7.1f}x "
+              f"{size / 2**20:>8.2f} {len(compressed) / 2**20:>8.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,32 @@
+# bin/migrate_credentials.py
+# Sort les mots de passe / chemins de clé de ssh_conn_json vers le store
+# (SSH_CREDENTIALS_FILE) ; les lignes ne gardent qu'un credential_id.
+#   python -m bin.migrate_credentials
+from sqlalchemy import select, update
+
+from code.db import engine
+from code.models import Ordinateur, SSHConnection
+from code.credentials import credential_store, externalize
+
+
+def migrate(engine, store=credential_store) -> int:
+    table = Ordinateur.__table__
+    changes = []
+    with engine.connect() as conn:
+        for row_id, ssh in conn.execute(select(table.c.id, table.c.ssh_conn_json)
+                                        .where(table.c.ssh_conn_json.is_not(None))):
+            if not ssh:
+                continue
+            moved = externalize(SSHConnection(**ssh), store).model_dump()
+            if moved != ssh:
+                changes.append({"row_id": row_id, "ssh": moved})
+    if changes:
+        with engine.begin() as conn:
+            for change in changes:
+                conn.execute(update(table).where(table.c.id == change["row_id"])
+                             .values(ssh_conn_json=change["ssh"]))
+    return len(changes)
+
+
+if __name__ == "__main__":
+    print(f"{migrate(engine)} host(s) migrated to {credential_store.path}")
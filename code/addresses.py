@@ -0,0 +1,41 @@
+# code/addresses.py
+import socket
+import struct
+import ipaddress
+from typing import Tuple
+
+_IP = struct.Struct("!I")
+MAC_BITS = 48
+
+
+def pack_ip(ip: str) -> int:
+    return _IP.unpack(socket.inet_aton(ip))[0]
+
+
+def unpack_ip(value: int) -> str:
+    return socket.inet_ntoa(_IP.pack(value))
+
+
+def pack_mac(mac: str) -> int:
+    return int(mac.replace(":", ""), 16)
+
+
+def unpack_mac(value: int) -> str:
+    raw = f"{value:012X}"
+    return ":".join(raw[i:i + 2] for i in range(0, 12, 2))
+
+
+def cidr_range(cidr: str) -> Tuple[int, int]:
+    # bornes incluses, pour un BETWEEN sur la colonne ip_int
+    network = ipaddress.IPv4Network(cidr, strict=False)
+    return int(network.network_address), int(network.broadcast_address)
+
+
+def mac_prefix_range(prefix: str) -> Tuple[int, int]:
+    # "00:1B:44" (OUI) ou n'importe quel préfixe de 1 à 6 octets
+    octets = [o for o in prefix.replace("-", ":").split(":") if o]
+    if not 1 <= len(octets) <= 6 or any(len(o) != 2 for o in octets):
+        raise ValueError("Invalid MAC prefix")
+    value = int("".join(octets), 16)
+    shift = MAC_BITS - 8 * len(octets)
+    return value << shift, (value << shift) | ((1 << shift) - 1)
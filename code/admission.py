@@ -0,0 +1,177 @@
+# code/admission.py
+import os
+import re
+import math
+import time
+import asyncio
+from collections import deque
+from typing import Dict, List, Optional, Pattern
+
+from fastapi.responses import JSONResponse
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+# nb total de requêtes lentes/inventaire simultanées (= pool de threads anyio par défaut)
+ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", "40"))
+ADMISSION_REMOTE_LIMIT = int(os.getenv("ADMISSION_REMOTE_LIMIT", "16"))
+ADMISSION_REMOTE_QUEUE = int(os.getenv("ADMISSION_REMOTE_QUEUE", "64"))
+ADMISSION_INVENTORY_LIMIT = int(os.getenv("ADMISSION_INVENTORY_LIMIT", "32"))
+ADMISSION_INVENTORY_QUEUE = int(os.getenv("ADMISSION_INVENTORY_QUEUE", "256"))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "5"))
+MAX_RETRY_AFTER = 60
+
+
+class RouteClass:
+    """Classe de routes : limite de concurrence, file d'attente bornée, priorité
+    (la plus haute est servie d'abord quand une place se libère)."""
+
+    def __init__(self, name: str, patterns: List[str], limit: int, queue_limit: int, priority: int):
+        self.name = name
+        self.patterns: List[Pattern] = [re.compile(p) for p in patterns]
+        self.limit = limit
+        self.queue_limit = queue_limit
+        self.priority = priority
+        self.active = 0
+        self.waiters: deque = deque()
+        self.admitted = 0
+        self.shed = 0
+        self.timeouts = 0
+        self.service_ewma = 0.0  # secondes
+
+    def matches(self, path: str) -> bool:
+        return any(p.match(path) for p in self.patterns)
+
+    def queued(self) -> int:
+        return sum(1 for f in self.waiters if not f.done())
+
+    def stats(self) -> Dict:
+        return {
+            "active": self.active, "limit": self.limit,
+            "queued": self.queued(), "queue_limit": self.queue_limit,
+            "priority": self.priority, "admitted": self.admitted,
+            "shed": self.shed, "timeouts": self.timeouts,
+            "avg_service_ms": round(self.service_ewma * 1000, 3),
+        }
+
+
+def default_classes() -> List[RouteClass]:
+    return [
+        RouteClass("inventory", [
+            r"^/ordinateurs(/.*)?$", r"^/(add|edit)_ordinateur$", r"^/delete_ordinateur/[^/]+$",
+        ], ADMISSION_INVENTORY_LIMIT, ADMISSION_INVENTORY_QUEUE, priority=10),
+        # routes qui ouvrent une session SSH
+        RouteClass("remote", [
+            r"^/(memory|cpu_load|os_release)/[^/]+$", r"^/probe$",
+        ], ADMISSION_REMOTE_LIMIT, ADMISSION_REMOTE_QUEUE, priority=0),
+    ]
+
+
+class AdmissionController:
+    """Sémaphores à priorité, exécutés dans la boucle asyncio (pas de verrou)."""
+
+    def __init__(self, classes: Optional[List[RouteClass]] = None,
+                 capacity: int = ADMISSION_CAPACITY, max_wait: float = ADMISSION_MAX_WAIT):
+        self.classes = classes if classes is not None else default_classes()
+        self.capacity = capacity
+        self.max_wait = max_wait
+        self.active = 0
+
+    def classify(self, path: str) -> Optional[RouteClass]:
+        for cls in self.classes:
+            if cls.matches(path):
+                return cls
+        return None
+
+    def _can_run(self, cls: RouteClass) -> bool:
+        return cls.active < cls.limit and self.active < self.capacity
+
+    def _start(self, cls: RouteClass):
+        cls.active += 1
+        cls.admitted += 1
+        self.active += 1
+
+    def _blocked_by_priority(self, cls: RouteClass) -> bool:
+        # une classe au moins aussi prioritaire attend déjà : on passe derrière
+        return any(c.priority >= cls.priority and c.queued() for c in self.classes)
+
+    async def acquire(self, cls: RouteClass) -> bool:
+        if self._can_run(cls) and not self._blocked_by_priority(cls):
+            self._start(cls)
+            return True
+        if cls.queued() >= cls.queue_limit:
+            cls.shed += 1
+            return False
+        fut = asyncio.get_running_loop().create_future()
+        cls.waiters.append(fut)
+        try:
+            await asyncio.wait_for(fut, self.max_wait)
+        except asyncio.TimeoutError:
+            cls.timeouts += 1
+            cls.shed += 1
+            return False
+        except asyncio.CancelledError:
+            # client parti alors qu'une place venait de lui être attribuée
+            if fut.done() and not fut.cancelled():
+                self.release(cls, None)
+            raise
+        finally:
+            try:
+                cls.waiters.remove(fut)
+            except ValueError:
+                pass
+        return True
+
+    def release(self, cls: RouteClass, elapsed: Optional[float]):
+        cls.active -= 1
+        self.active -= 1
+        if elapsed is not None:
+            cls.service_ewma = elapsed if not cls.service_ewma else 0.8 * cls.service_ewma + 0.2 * elapsed
+        self._dispatch()
+
+    def _dispatch(self):
+        for cls in sorted(self.classes, key=lambda c: -c.priority):
+            while cls.waiters and self._can_run(cls):
+                fut = cls.waiters.popleft()
+                if fut.done():
+                    continue
+                self._start(cls)
+                fut.set_result(True)
+            if cls.queued() and self.active >= self.capacity:
+                return  # pas de place : les classes moins prioritaires attendent
+
+    def retry_after(self, cls: RouteClass) -> int:
+        # temps pour écouler la file actuelle au débit de la classe
+        backlog = cls.queued() + cls.active
+        estimate = backlog * (cls.service_ewma or 1.0) / max(cls.limit, 1)
+        return min(MAX_RETRY_AFTER, max(1, math.ceil(estimate)))
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": True, "capacity": self.capacity, "active": self.active,
+            "max_wait_s": self.max_wait,
+            "classes": {cls.name: cls.stats() for cls in self.classes},
+        }
+
+
+class AdmissionMiddleware:
+    # middleware ASGI pur : aucune mise en tampon de la réponse
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        cls = self.controller.classify(scope["path"]) if scope["type"] == "http" else None
+        if cls is None:
+            await self.app(scope, receive, send)
+            return
+        if not await self.controller.acquire(cls):
+            response = JSONResponse(
+                status_code=503, content={"detail": f"Too many pending {cls.name} requests"},
+                headers={"Retry-After": str(self.controller.retry_after(cls))},
+            )
+            await response(scope, receive, send)
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(cls, time.perf_counter() - start)
@@ -0,0 +1,259 @@
+# code/alerts.py
+import os
+import json
+import time
+import uuid
+import logging
+import queue
+import operator
+import threading
+import urllib.request
+from typing import Dict, List, Literal, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field, model_validator
+
+logger = logging.getLogger(__name__)
+
+OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+# événements en attente d'envoi au webhook ; au-delà ils sont abandonnés (et comptés)
+ALERT_WEBHOOK_QUEUE = int(os.getenv("ALERT_WEBHOOK_QUEUE", "1000"))
+
+
+class AlertRule(BaseModel):
+    """Règle déclarative, ex :
+    {"metric": "cpu_load", "op": ">", "threshold": 90, "for_seconds": 300}
+    {"metric": "free_memory", "op": "<", "threshold": 0.5, "consecutive": 3}  (Go)"""
+
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex[:12])
+    metric: str
+    op: Literal[">", ">=", "<", "<="]
+    threshold: float
+    for_seconds: float = 0.0
+    consecutive: int = 1
+    hosts: Optional[List[str]] = None  # None = tout le parc
+
+    @model_validator(mode="after")
+    def check_window(self):
+        if self.consecutive < 1 or self.for_seconds < 0:
+            raise ValueError("consecutive must be >= 1 and for_seconds >= 0")
+        return self
+
+
+class RuleState:
+    # état O(1) par (hôte, règle) : début du dépassement + nombre d'échantillons
+    __slots__ = ("breach_since", "count", "active", "value")
+
+    def __init__(self):
+        self.breach_since: Optional[float] = None
+        self.count = 0
+        self.active = False
+        self.value = 0.0
+
+
+# ========== Notifiers ==========
+class Notifier:
+    def notify(self, event: Dict):
+        logger.info("Alert %s: %s", event["state"], event)
+
+
+class FileNotifier(Notifier):
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def notify(self, event: Dict):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event) + "\n")
+
+
+class WebhookNotifier(Notifier):
+    """Un seul thread d'envoi alimenté par une file bornée : une rafale d'alertes
+    ou un webhook lent ne crée pas de threads, les événements en trop sont perdus."""
+
+    def __init__(self, url: str, timeout: float = 5.0, max_queue: int = ALERT_WEBHOOK_QUEUE):
+        self.url = url
+        self.timeout = timeout
+        self.queue: "queue.Queue[Dict]" = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _post(self, event: Dict):
+        request = urllib.request.Request(
+            self.url, data=json.dumps(event).encode(),
+            headers={"Content-Type": "application/json"}, method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        except Exception as e:
+            logger.warning("Alert webhook failed: %s", e)
+
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            self._post(event)
+            self.queue.task_done()
+
+    def notify(self, event: Dict):
+        # ne pas bloquer le chemin des métriques sur le webhook
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, daemon=True, name="alert-webhook")
+                self._worker.start()
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            logger.warning("Alert webhook queue full, dropping %s event for %s", event["state"], event["ip"])
+
+
+def notifier_from_env(spec: Optional[str] = None) -> Notifier:
+    # ALERT_NOTIFIER=file:/var/log/alerts.ndjson | webhook:http://localhost:9000/alerts
+    spec = spec if spec is not None else os.getenv("ALERT_NOTIFIER", "")
+    if spec.startswith("file:"):
+        return FileNotifier(spec[len("file:"):])
+    if spec.startswith("webhook:"):
+        return WebhookNotifier(spec[len("webhook:"):])
+    return Notifier()
+
+
+# ========== Moteur ==========
+class AlertEngine:
+    """Évalue les règles à l'arrivée de chaque échantillon, sans relire l'historique."""
+
+    def __init__(self, notifier: Optional[Notifier] = None):
+        self.notifier = notifier or Notifier()
+        self.rules: Dict[str, AlertRule] = {}
+        # index : metric -> règles globales, (metric, ip) -> règles ciblées
+        self._global: Dict[str, List[AlertRule]] = {}
+        self._by_host: Dict[Tuple[str, str], List[AlertRule]] = {}
+        self._states: Dict[Tuple[str, str], RuleState] = {}
+        self._lock = threading.Lock()
+
+    def add_rule(self, rule: AlertRule) -> AlertRule:
+        with self._lock:
+            # règle remplacée : ses alertes actives sont résolues, l'état repart de zéro
+            events = self._remove(rule.id)[1]
+            self.rules[rule.id] = rule
+            if rule.hosts is None:
+                self._global.setdefault(rule.metric, []).append(rule)
+            else:
+                for ip in rule.hosts:
+                    self._by_host.setdefault((rule.metric, ip), []).append(rule)
+        self._notify(events)
+        return rule
+
+    def _drop_states(self, keys: List[Tuple[str, str]], reason: str) -> List[Dict]:
+        # état oublié alors que l'alerte est active : le destinataire reçoit "resolved"
+        events, now = [], time.time()
+        for key in keys:
+            state = self._states.pop(key)
+            if state.active:
+                event = self._event("resolved", key[0], self.rules[key[1]], state, now)
+                event["reason"] = reason
+                events.append(event)
+        return events
+
+    def _remove(self, rule_id: str) -> Tuple[Optional[AlertRule], List[Dict]]:
+        rule = self.rules.get(rule_id)
+        if rule is None:
+            return None, []
+        events = self._drop_states([k for k in self._states if k[1] == rule_id], "rule_removed")
+        del self.rules[rule_id]
+        if rule.hosts is None:
+            self._global[rule.metric].remove(rule)
+        else:
+            for ip in rule.hosts:
+                self._by_host[(rule.metric, ip)].remove(rule)
+        return rule, events
+
+    def remove_rule(self, rule_id: str) -> bool:
+        with self._lock:
+            rule, events = self._remove(rule_id)
+        self._notify(events)
+        return rule is not None
+
+    def _notify(self, events: List[Dict]):
+        # hors verrou : un notifier lent ne bloque pas l'évaluation
+        for event in events:
+            try:
+                self.notifier.notify(event)
+            except Exception:
+                logger.exception("Alert notifier failed")
+
+    def load_rules(self, path: str) -> int:
+        with open(path, encoding="utf-8") as f:
+            rules = [AlertRule(**r) for r in json.load(f)]
+        for rule in rules:
+            self.add_rule(rule)
+        return len(rules)
+
+    def observe(self, ip: str, metric: str, value: float, ts: Optional[float] = None) -> List[Dict]:
+        ts = time.time() if ts is None else ts
+        events = []
+        with self._lock:
+            rules = self._global.get(metric, []) + self._by_host.get((metric, ip), [])
+            for rule in rules:
+                event = self._evaluate(ip, rule, value, ts)
+                if event:
+                    events.append(event)
+        self._notify(events)
+        return events
+
+    def _evaluate(self, ip: str, rule: AlertRule, value: float, ts: float) -> Optional[Dict]:
+        key = (ip, rule.id)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = RuleState()
+        state.value = value
+
+        if OPERATORS[rule.op](value, rule.threshold):
+            if state.breach_since is None:
+                state.breach_since = ts
+            state.count += 1
+            firing = (state.count >= rule.consecutive
+                      and ts - state.breach_since >= rule.for_seconds)
+            if firing and not state.active:
+                state.active = True
+                return self._event("firing", ip, rule, state, ts)
+            return None
+
+        state.breach_since = None
+        state.count = 0
+        if state.active:
+            state.active = False
+            return self._event("resolved", ip, rule, state, ts)
+        return None
+
+    @staticmethod
+    def _event(kind: str, ip: str, rule: AlertRule, state: RuleState, ts: float) -> Dict:
+        return {
+            "state": kind, "ip": ip, "rule_id": rule.id, "metric": rule.metric,
+            "op": rule.op, "threshold": rule.threshold, "value": state.value,
+            "since": state.breach_since, "at": ts,
+        }
+
+    def active_alerts(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {"ip": ip, "rule_id": rule_id, "metric": self.rules[rule_id].metric,
+                 "value": s.value, "since": s.breach_since}
+                for (ip, rule_id), s in self._states.items() if s.active
+            ]
+
+    def forget_host(self, ip: str):
+        self.forget_hosts({ip})
+
+    def forget_hosts(self, ips: Set[str], reason: str = "host_removed"):
+        # un seul parcours des états, quel que soit le nombre d'hôtes
+        with self._lock:
+            events = self._drop_states([k for k in self._states if k[0] in ips], reason)
+        self._notify(events)
+
+    def reset(self, reason: str = "hosts_replaced"):
+        # parc vidé ou remplacé : toutes les alertes actives sont résolues
+        with self._lock:
+            events = self._drop_states(list(self._states), reason)
+        self._notify(events)
@@ -0,0 +1,394 @@
+# code/backends.py
+# Tout ce qui touche un hôte passe par un backend de sonde :
+# exécution SSH, commande locale, joignabilité (ping / port TCP), DNS inverse.
+#   PROBE_BACKEND=ssh   (défaut) paramiko, ping, sockets
+#   PROBE_BACKEND=local chaque hôte est la machine locale (dev, poste unique)
+#   PROBE_BACKEND=fake  réponses déterministes en mémoire, aucune attente réseau
+import os
+import re
+import time
+import select
+import socket
+import hashlib
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Set, Tuple, Type
+
+from .credentials import connect_kwargs, credential_store, known_hosts
+
+Output = Tuple[str, str, int]  # stdout, stderr, code de sortie
+
+PROBE_BACKEND = os.getenv("PROBE_BACKEND", "ssh")
+SSH_TIMEOUT = float(os.getenv("SSH_TIMEOUT", "5"))
+STREAM_CHUNK = 32768
+STREAM_POLL = 0.2
+
+
+class ProbeBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def execute(self, conn, command: str) -> Output:
+        """Commande sur l'hôte décrit par conn (SSHConnection)."""
+
+    def stream(self, conn, command: str, sink: Callable[[str, bytes], None],
+               cancel: Optional[threading.Event] = None, timeout: Optional[float] = None) -> int:
+        """Comme execute, mais la sortie est passée à sink("stdout"|"stderr", octets)
+        au fil de l'eau ; renvoie le code de sortie. Erreur de connexion : exception."""
+        out, err, code = self.execute(conn, command)
+        if code == -1 and not out:
+            raise ConnectionError(err)
+        if out:
+            sink("stdout", out.encode())
+        if err:
+            sink("stderr", err.encode())
+        return code
+
+    @abstractmethod
+    def run_local(self, command: str) -> Output:
+        ...
+
+    @abstractmethod
+    def is_reachable(self, host: str) -> bool:
+        ...
+
+    @abstractmethod
+    def port_open(self, ip: str, port: int, timeout: float = 0.5) -> bool:
+        ...
+
+    @abstractmethod
+    def reverse_dns(self, ip: str) -> str:
+        """Nom d'hôte, ou "" si inconnu."""
+
+    def stats(self) -> Dict:
+        return {}
+
+    def close_idle(self) -> int:
+        """Ferme les connexions inutilisées depuis longtemps ; renvoie leur nombre."""
+        return 0
+
+    def close(self):
+        """Libère les connexions gardées ouvertes (arrêt de l'application)."""
+
+
+BACKENDS: Dict[str, Type[ProbeBackend]] = {}
+
+
+def register_backend(cls: Type[ProbeBackend]) -> Type[ProbeBackend]:
+    BACKENDS[cls.name] = cls
+    return cls
+
+
+def _shell(command: str, timeout: Optional[float] = None) -> Output:
+    try:
+        result = subprocess.run(command, shell=True, capture_output=True, text=True,
+                                timeout=timeout, check=False)
+        return result.stdout, result.stderr, result.returncode
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return "", str(e), -1
+
+
+# ========== Implémentations ==========
+@register_backend
+class SSHBackend(ProbeBackend):
+    name = "ssh"
+
+    def __init__(self):
+        self._bastions = None
+        self._bastions_lock = threading.Lock()
+
+    @property
+    def bastions(self):
+        # créé au premier hôte derrière un bastion ; sous verrou, sinon deux
+        # threads du job peuvent chacun créer un pool (et un transport)
+        with self._bastions_lock:
+            if self._bastions is None:
+                from .ssh_pool import BastionPool  # pylint: disable=import-outside-toplevel
+                self._bastions = BastionPool()
+            return self._bastions
+
+    def execute(self, conn, command: str) -> Output:
+        if not conn.hostname:
+            return "", "No hostname configured", -1
+        jump = getattr(conn, "jump_host", None)
+        try:
+            if jump is None:
+                return self._exec(conn, command)
+            # canal direct-tcpip sur le transport partagé du bastion
+            with self.bastions.tunnel(jump, conn.hostname, conn.port, SSH_TIMEOUT) as channel:
+                return self._exec(conn, command, sock=channel)
+        except Exception as e:
+            return "", str(e), -1
+
+    @staticmethod
+    def _connect(conn, sock=None):
+        import paramiko  # pylint: disable=import-outside-toplevel
+        client = paramiko.SSHClient()
+        # clés d'hôtes vérifiées contre le cache known_hosts, clé privée déjà parsée
+        client.set_missing_host_key_policy(known_hosts)
+        try:
+            client.connect(
+                conn.hostname,
+                port=conn.port,
+                timeout=SSH_TIMEOUT,
+                sock=sock,
+                **connect_kwargs(conn)
+            )
+        except Exception:
+            client.close()
+            raise
+        return client
+
+    def _exec(self, conn, command: str, sock=None) -> Output:
+        client = self._connect(conn, sock)
+        try:
+            _, stdout, stderr = client.exec_command(command)
+            exit_code = stdout.channel.recv_exit_status()
+            out = stdout.read().decode(errors="ignore")
+            err = stderr.read().decode(errors="ignore")
+            return out, err, exit_code
+        finally:
+            client.close()
+
+    def stream(self, conn, command: str, sink: Callable[[str, bytes], None],
+               cancel: Optional[threading.Event] = None, timeout: Optional[float] = None) -> int:
+        if not conn.hostname:
+            raise ConnectionError("No hostname configured")
+        jump = getattr(conn, "jump_host", None)
+        if jump is None:
+            return self._stream(conn, command, sink, cancel, timeout)
+        # derrière un bastion, l'attente d'une session compte dans le délai de la commande
+        started = time.monotonic()
+        with self.bastions.tunnel(jump, conn.hostname, conn.port, SSH_TIMEOUT, wait=timeout,
+                                  cancel=cancel) as channel:
+            left = max(timeout - (time.monotonic() - started), 1.0) if timeout else None
+            return self._stream(conn, command, sink, cancel, left, sock=channel)
+
+    def _stream(self, conn, command, sink, cancel, timeout, sock=None) -> int:
+        client = self._connect(conn, sock)
+        try:
+            channel = client.get_transport().open_session()
+            channel.exec_command(command)
+            deadline = time.monotonic() + timeout if timeout else None
+            while True:
+                if cancel is not None and cancel.is_set():
+                    return -1
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"Command still running after {timeout}s")
+                # lu par blocs dès réception, rien n'est accumulé ici
+                readable = False
+                if channel.recv_ready():
+                    sink("stdout", channel.recv(STREAM_CHUNK))
+                    readable = True
+                if channel.recv_stderr_ready():
+                    sink("stderr", channel.recv_stderr(STREAM_CHUNK))
+                    readable = True
+                if readable:
+                    continue
+                if channel.exit_status_ready():
+                    # la fin de la sortie peut arriver avec le code de sortie : lue jusqu'à EOF
+                    self._drain(channel, sink)
+                    return channel.recv_exit_status()
+                select.select([channel], [], [], STREAM_POLL)
+        finally:
+            client.close()
+
+    @staticmethod
+    def _drain(channel, sink: Callable[[str, bytes], None]):
+        # recv rend b"" à l'EOF ; délai au cas où un processus fils garde le canal ouvert
+        channel.settimeout(SSH_TIMEOUT)
+        for stream, recv in (("stdout", channel.recv), ("stderr", channel.recv_stderr)):
+            try:
+                while True:
+                    data = recv(STREAM_CHUNK)
+                    if not data:
+                        break
+                    sink(stream, data)
+            except socket.timeout:
+                continue
+
+    def stats(self) -> Dict:
+        return {"bastions": self._bastions.stats() if self._bastions else {},
+                "known_hosts": known_hosts.stats(), "credentials": credential_store.stats()}
+
+    def close_idle(self) -> int:
+        return self._bastions.close_idle() if self._bastions is not None else 0
+
+    def close(self):
+        if self._bastions is not None:
+            self._bastions.close()
+
+    def run_local(self, command: str) -> Output:
+        return _shell(command)
+
+    def is_reachable(self, host: str) -> bool:
+        try:
+            result = subprocess.run(
+                ["ping", "-c", "1", "-W", "1", host],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False
+            )
+            return result.returncode == 0
+        except OSError:
+            return False
+
+    def port_open(self, ip: str, port: int, timeout: float = 0.5) -> bool:
+        try:
+            with socket.create_connection((ip, port), timeout=timeout):
+                return True
+        except OSError:
+            return False
+
+    def reverse_dns(self, ip: str) -> str:
+        try:
+            return socket.gethostbyaddr(ip)[0]
+        except (OSError, UnicodeError):
+            return ""
+
+
+@register_backend
+class LocalBackend(SSHBackend):
+    # toutes les commandes tournent sur cette machine, tous les hôtes répondent
+    name = "local"
+
+    def execute(self, conn, command: str) -> Output:
+        return _shell(command, timeout=SSH_TIMEOUT)
+
+    stream = ProbeBackend.stream
+
+    def is_reachable(self, host: str) -> bool:
+        return True
+
+    def port_open(self, ip: str, port: int, timeout: float = 0.5) -> bool:
+        return True
+
+    def reverse_dns(self, ip: str) -> str:
+        return socket.gethostname()
+
+
+# bloc produit par probes.compile_script pour chaque collecteur
+SCRIPT_PART = re.compile(
+    r"echo '(?P<begin>[^']*)'; \( (?P<command>.*?) \) 2>/dev/null; echo \"(?P<end>[^\"]*)\$\?\""
+)
+
+
+@register_backend
+class FakeBackend(ProbeBackend):
+    """Hôtes simulés : sorties dérivées d'un hash de l'hôte, donc identiques
+    d'une exécution à l'autre. set_output() / unreachable pour les cas de test."""
+
+    name = "fake"
+
+    def __init__(self, unreachable: Optional[Set[str]] = None, delay: float = 0.0):
+        self.unreachable: Set[str] = set(unreachable or ())
+        self.delay = delay  # durée simulée de chaque commande
+        self.outputs: Dict[Tuple[str, str], Output] = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def set_output(self, host: str, command: str, stdout: str, stderr: str = "", code: int = 0):
+        self.outputs[(host, command)] = (stdout, stderr, code)
+
+    @staticmethod
+    def _seed(host: str) -> int:
+        return int.from_bytes(hashlib.sha256(host.encode()).digest()[:8], "big")
+
+    def _answer(self, host: str, command: str) -> Output:
+        if (host, command) in self.outputs:
+            return self.outputs[(host, command)]
+        seed = self._seed(host)
+        for key, render in FAKE_COMMANDS.items():
+            if key in command:
+                return render(host, seed), "", 0
+        return "", f"{command.split()[0] if command.split() else command}: command not found", 127
+
+    def _run(self, host: str, command: str) -> Output:
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if host in self.unreachable:
+            return "", f"[Errno 113] No route to host: {host}", -1
+        if "@@probe-" in command:
+            # script multi-collecteurs : on rejoue chaque bloc
+            out = []
+            for part in SCRIPT_PART.finditer(command):
+                stdout, _, code = self._answer(host, part.group("command"))
+                out.append(part.group("begin"))
+                if stdout:
+                    out.append(stdout.rstrip("\n"))
+                out.append(f"{part.group('end')}{code}")
+            return "\n".join(out) + "\n", "", 0
+        return self._answer(host, command)
+
+    def execute(self, conn, command: str) -> Output:
+        if not conn.hostname:
+            return "", "No hostname configured", -1
+        jump = getattr(conn, "jump_host", None)
+        if jump is not None and jump.hostname in self.unreachable:
+            return "", f"[Errno 113] No route to host: {jump.hostname}", -1
+        return self._run(conn.hostname, command)
+
+    def run_local(self, command: str) -> Output:
+        return self._run("localhost", command)
+
+    def is_reachable(self, host: str) -> bool:
+        return host not in self.unreachable
+
+    def port_open(self, ip: str, port: int, timeout: float = 0.5) -> bool:
+        return ip not in self.unreachable
+
+    def reverse_dns(self, ip: str) -> str:
+        return "" if ip in self.unreachable else f"host-{ip.replace('.', '-')}.fake"
+
+
+def _fake_free(host: str, seed: int) -> str:
+    total = (4, 8, 16, 32)[seed % 4] * 1024
+    free = total * (10 + seed % 60) // 100
+    return ("               total        used        free      shared  buff/cache   available\n"
+            f"Mem:    {total:>12} {total - free:>11} {free:>11} {0:>11} {0:>11} {free:>11}\n"
+            f"Swap:   {0:>12} {0:>11} {0:>11}\n")
+
+
+def _fake_top(host: str, seed: int) -> str:
+    idle = 5.0 + (seed >> 8) % 950 / 10.0
+    return f"%Cpu(s):  {100 - idle:.1f} us,  0.0 sy,  0.0 ni, {idle:.1f} id,  0.0 wa,  0.0 hi,  0.0 si,  0.0 st\n"
+
+
+def _fake_os_release(host: str, seed: int) -> str:
+    name, version = (("Debian GNU/Linux", "12"), ("Ubuntu", "22.04"), ("Alpine Linux", "3.20"))[seed % 3]
+    return f'NAME="{name}"\nVERSION_ID="{version}"\nID={name.split()[0].lower()}\n'
+
+
+FAKE_COMMANDS: Dict[str, Callable[[str, int], str]] = {
+    "free -m": _fake_free,
+    "top -bn1": _fake_top,
+    "/etc/os-release": _fake_os_release,
+    "/proc/uptime": lambda host, seed: f"{seed % 10_000_000 / 10:.2f} 0.00\n",
+    "hostname": lambda host, seed: f"host-{host.replace('.', '-')}\n",
+}
+
+
+# ========== Sélection ==========
+_backend: Optional[ProbeBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> ProbeBackend:
+    global _backend  # pylint: disable=global-statement
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if PROBE_BACKEND not in BACKENDS:
+                    raise ValueError(f"Unknown PROBE_BACKEND {PROBE_BACKEND!r}, "
+                                     f"expected one of {sorted(BACKENDS)}")
+                _backend = BACKENDS[PROBE_BACKEND]()
+    return _backend
+
+
+def set_backend(backend) -> ProbeBackend:
+    # instance ou nom ; utile pour les tests et les benchmarks
+    global _backend  # pylint: disable=global-statement
+    with _backend_lock:
+        _backend = BACKENDS[backend]() if isinstance(backend, str) else backend
+    return _backend
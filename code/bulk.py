@@ -0,0 +1,213 @@
+# code/bulk.py
+import re
+import ipaddress
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, select, update
+
+from .models import Ordinateur, ComputerStatus, SSHConnection
+from .addresses import pack_ip, pack_mac
+from .credentials import credential_store, externalize
+
+BATCH_SIZE = 500
+KEYS = ("mac", "ip")
+MAC_RE = re.compile(r"^([0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2}$")
+# champs modifiables par PATCH /ordinateurs/bulk (la clé ne change pas)
+PATCHABLE = ("hostname", "taille_disque", "os", "status", "ram", "joignable", "ssh_conn_json")
+DEFAULTS = {"hostname": "", "taille_disque": 0, "os": "", "status": ComputerStatus.OFF,
+            "ram": 0.0, "joignable": False, "ssh_conn_json": None}
+
+
+def _batches(items: List, size: int = BATCH_SIZE) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def check_mac(mac: str) -> str:
+    if not isinstance(mac, str) or not MAC_RE.match(mac):
+        raise ValueError(f"Invalid MAC address: {mac!r}")
+    return mac.upper()
+
+
+def check_ip(ip: str) -> str:
+    try:
+        return str(ipaddress.IPv4Address(ip))
+    except (ipaddress.AddressValueError, TypeError) as e:
+        raise ValueError(f"Invalid IP address: {ip!r}") from e
+
+
+def external_ssh(ssh: Optional[Dict], hostname: str = "") -> Optional[Dict]:
+    # mot de passe / clé en clair -> credential_id : aucun secret n'atteint ssh_conn_json
+    if not ssh:
+        return ssh
+    conn = SSHConnection(**{"hostname": hostname, **ssh})
+    stored = externalize(conn, credential_store)
+    return ssh if stored is conn else stored.model_dump()
+
+
+def _fields(payload: Dict, allowed: Iterable[str]) -> Dict:
+    values = dict(payload)
+    ssh = values.pop("ssh_conn", None)
+    if ssh is not None:
+        values["ssh_conn_json"] = ssh
+    if values.get("ssh_conn_json"):
+        values["ssh_conn_json"] = external_ssh(values["ssh_conn_json"], values.get("ip") or "")
+    unknown = set(values) - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown or read-only fields: {sorted(unknown)}")
+    if "status" in values:
+        values["status"] = ComputerStatus(values["status"])
+    return values
+
+
+def host_values(payload: Dict) -> Dict:
+    # ligne complète prête pour un INSERT core (colonnes entières comprises)
+    values = _fields(payload, KEYS + PATCHABLE)
+    if "mac" not in values or "ip" not in values:
+        raise ValueError("mac and ip are required")
+    values["mac"] = check_mac(values["mac"])
+    values["ip"] = check_ip(values["ip"])
+    row = dict(DEFAULTS, **values)
+    row["ip_int"] = pack_ip(row["ip"])
+    row["mac_int"] = pack_mac(row["mac"])
+    return row
+
+
+def upsert_statement(dialect: str, rows: List[Dict], key: str):
+    """INSERT multi-lignes avec la mise à jour native du SGBD sur conflit de la clé."""
+    table = Ordinateur.__table__
+    columns = [c for c in rows[0] if c != key]
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert  # pylint: disable=import-outside-toplevel
+        stmt = mysql_insert(table).values(rows)
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in columns})
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert  # pylint: disable=import-outside-toplevel
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert  # pylint: disable=import-outside-toplevel
+    else:
+        raise ValueError(f"Upsert not supported for dialect {dialect}")
+    stmt = dialect_insert(table).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c[key]], set_={c: stmt.excluded[c] for c in columns}
+    )
+
+
+def prepare_upserts(payloads: List[Dict], key: str = "mac") -> List[Dict]:
+    if key not in KEYS:
+        raise ValueError("key must be 'mac' or 'ip'")
+    # une même clé deux fois dans un lot est refusée par ON CONFLICT : la dernière gagne
+    return list({r[key]: r for r in map(host_values, payloads)}.values())
+
+
+def write_upserts(engine, rows: List[Dict], key: str = "mac") -> List[Dict]:
+    if not rows:
+        return []
+    with engine.begin() as conn:
+        for batch in _batches(rows):
+            conn.execute(upsert_statement(engine.dialect.name, batch, key))
+        return select_by(conn, key, [r[key] for r in rows])
+
+
+def upsert_hosts(engine, payloads: List[Dict], key: str = "mac") -> List[Dict]:
+    """Crée ou remplace des hôtes en une instruction par lot ; renvoie les lignes écrites."""
+    return write_upserts(engine, prepare_upserts(payloads, key), key)
+
+
+def select_by(conn, key: str, values: List[str]) -> List[Dict]:
+    table = Ordinateur.__table__
+    result = []
+    for batch in _batches(values):
+        result.extend(dict(r) for r in conn.execute(
+            select(table).where(table.c[key].in_(batch))).mappings())
+    return result
+
+
+def update_host(engine, payload: Dict) -> Optional[Dict]:
+    # un seul UPDATE par IP (avec RETURNING si le SGBD le permet) ; None si absent
+    values = host_values(payload)
+    table = Ordinateur.__table__
+    stmt = update(table).where(table.c.ip == values["ip"]).values(values)
+    with engine.begin() as conn:
+        if engine.dialect.update_returning:
+            row = conn.execute(stmt.returning(*table.c)).mappings().first()
+        elif conn.execute(stmt).rowcount:
+            row = conn.execute(select(table).where(table.c.ip == values["ip"])).mappings().first()
+        else:
+            row = None
+    return dict(row) if row else None
+
+
+def _key_of(item: Dict) -> Tuple[str, str]:
+    if item.get("mac"):
+        return "mac", check_mac(item["mac"])
+    if item.get("ip"):
+        return "ip", check_ip(item["ip"])
+    raise ValueError("Each item needs a mac or an ip")
+
+
+def prepare_patches(items: List[Dict]) -> List[Tuple[str, str, Dict]]:
+    # [{"ip"|"mac": ..., champ: valeur}] -> [(clé, valeur de la clé, changements)]
+    patches = []
+    for item in items:
+        key, value = _key_of(item)
+        changes = _fields({k: v for k, v in item.items() if k not in KEYS}, PATCHABLE)
+        if changes:
+            patches.append((key, value, changes))
+    return patches
+
+
+def write_patches(engine, patches: List[Tuple[str, str, Dict]]) -> List[Dict]:
+    """Regroupe par (clé, champs modifiés) : un UPDATE exécuté en lot par groupe."""
+    groups: Dict[Tuple, List[Dict]] = {}
+    for key, value, changes in patches:
+        params = {f"new_{k}": v for k, v in changes.items()}
+        params["match_key"] = value
+        groups.setdefault((key, tuple(sorted(changes))), []).append(params)
+    if not groups:
+        return []
+
+    table = Ordinateur.__table__
+    touched: Dict[str, List[str]] = {"mac": [], "ip": []}
+    rows = {}
+    with engine.begin() as conn:
+        for (key, fields), params in groups.items():
+            stmt = (update(table).where(table.c[key] == bindparam("match_key"))
+                    .values({f: bindparam(f"new_{f}") for f in fields}))
+            for batch in _batches(params):
+                conn.execute(stmt, batch)
+            touched[key].extend(p["match_key"] for p in params)
+        for key, values in touched.items():
+            for row in select_by(conn, key, values):
+                rows[row["id"]] = row
+    return list(rows.values())
+
+
+def bulk_update(engine, items: List[Dict]) -> List[Dict]:
+    """Mises à jour partielles [{"ip"|"mac": ..., champ: valeur}]."""
+    return write_patches(engine, prepare_patches(items))
+
+
+def bulk_delete(engine, ips: Optional[List[str]] = None, macs: Optional[List[str]] = None,
+                host_facts=None) -> List:
+    """Supprime par lots (DELETE ... WHERE ip IN (...), puis mac IN (...)).
+
+    host_facts (HostFactsCache) : faits des hôtes supprimés effacés dans la même transaction.
+    Renvoie les lignes supprimées (ip + colonnes des statistiques du parc)."""
+    ips = [check_ip(ip) for ip in ips or []]
+    macs = [check_mac(mac) for mac in macs or []]
+    table = Ordinateur.__table__
+    columns = (table.c.ip, table.c.status, table.c.os, table.c.ram, table.c.joignable)
+    deleted: List = []
+    targets = [("ip", batch) for batch in _batches(ips)] + [("mac", batch) for batch in _batches(macs)]
+    with engine.begin() as conn:
+        for key, batch in targets:
+            cond = table.c[key].in_(batch)
+            if engine.dialect.delete_returning:
+                deleted.extend(conn.execute(delete(table).where(cond).returning(*columns)).all())
+            else:
+                deleted.extend(conn.execute(select(*columns).where(cond)).all())
+                conn.execute(delete(table).where(cond))
+        if host_facts is not None:
+            host_facts.invalidate_many([row.ip for row in deleted], conn)
+    return deleted
@@ -0,0 +1,183 @@
+# code/compact.py
+import sys
+import json
+import hashlib
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional
+
+from .models import Ordinateur, SSHConnection, ComputerStatus
+from .addresses import pack_ip, unpack_ip, pack_mac, unpack_mac
+
+# statut stocké sur un petit entier plutôt qu'une instance d'Enum
+STATUS_CODES = {ComputerStatus.OFF: 0, ComputerStatus.ON: 1, ComputerStatus.RELOADING: 2}
+STATUS_BY_CODE = {code: status for status, code in STATUS_CODES.items()}
+
+
+class HostRecord:
+    """Ligne d'inventaire compacte : pas de __dict__, IP/MAC en entiers,
+    statut en code, ssh_conn_json gardé sous forme de chaîne JSON."""
+
+    __slots__ = ("id", "ip_int", "mac_int", "hostname", "taille_disque", "os",
+                 "status_code", "ram", "joignable", "ssh_json")
+
+    def __init__(self, id, ip_int, mac_int, hostname, taille_disque, os,
+                 status_code, ram, joignable, ssh_json):
+        # pylint: disable=redefined-builtin
+        self.id = id
+        self.ip_int = ip_int
+        self.mac_int = mac_int
+        self.hostname = hostname
+        self.taille_disque = taille_disque
+        self.os = os
+        self.status_code = status_code
+        self.ram = ram
+        self.joignable = joignable
+        self.ssh_json = ssh_json
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> "HostRecord":
+        ssh = row.get("ssh_conn_json")
+        return cls(
+            row.get("id"),
+            pack_ip(row["ip"]),
+            pack_mac(row["mac"]),
+            sys.intern(row.get("hostname") or ""),
+            row.get("taille_disque", 0),
+            # beaucoup d'hôtes partagent le même OS : une seule chaîne en mémoire
+            sys.intern(row.get("os") or ""),
+            STATUS_CODES[ComputerStatus(row.get("status") or ComputerStatus.OFF)],
+            float(row.get("ram") or 0.0),
+            bool(row.get("joignable")),
+            # clés triées : même contenu, même chaîne (voir content_hash)
+            json.dumps(ssh, separators=(",", ":"), sort_keys=True) if ssh else None,
+        )
+
+    @classmethod
+    def from_model(cls, ordinateur: Ordinateur) -> "HostRecord":
+        return cls.from_row({
+            "id": ordinateur.id, "ip": ordinateur.ip, "mac": ordinateur.mac,
+            "hostname": ordinateur.hostname, "taille_disque": ordinateur.taille_disque,
+            "os": ordinateur.os, "status": ordinateur.status, "ram": ordinateur.ram,
+            "joignable": ordinateur.joignable, "ssh_conn_json": ordinateur.ssh_conn_json,
+        })
+
+    @property
+    def ip(self) -> str:
+        return unpack_ip(self.ip_int)
+
+    @property
+    def mac(self) -> str:
+        return unpack_mac(self.mac_int)
+
+    @property
+    def status(self) -> ComputerStatus:
+        return STATUS_BY_CODE[self.status_code]
+
+    @property
+    def ssh_conn_json(self) -> Optional[dict]:
+        return json.loads(self.ssh_json) if self.ssh_json else None
+
+    @property
+    def ssh_conn(self) -> Optional[SSHConnection]:
+        data = self.ssh_conn_json
+        return SSHConnection(**data) if data else None
+
+    @ssh_conn.setter
+    def ssh_conn(self, value: Optional[SSHConnection]):
+        self.ssh_json = json.dumps(value.model_dump(), separators=(",", ":"), sort_keys=True) if value else None
+
+    def content_hash(self) -> bytes:
+        # empreinte du contenu (id exclu) : même empreinte = écriture inutile.
+        # blake2b et non hash() : hash(-1) == hash(-2) ferait sauter une vraie écriture
+        payload = json.dumps([self.ip_int, self.mac_int, self.hostname, self.taille_disque, self.os,
+                              self.status_code, self.ram, self.joignable, self.ssh_json],
+                             separators=(",", ":"))
+        return hashlib.blake2b(payload.encode(), digest_size=16).digest()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id, "mac": self.mac, "ip": self.ip, "hostname": self.hostname,
+            "taille_disque": self.taille_disque, "os": self.os, "status": self.status,
+            "ram": self.ram, "joignable": self.joignable, "ssh_conn_json": self.ssh_conn_json,
+        }
+
+
+class HostCache:
+    """Cache d'inventaire indexé par IP (entier).
+
+    Garde l'interface de liste utilisée historiquement pour
+    app.state.ordinateurs (append, clear, len, itération)."""
+
+    def __init__(self):
+        self._records: Dict[int, HostRecord] = {}
+        self._ip_by_mac: Dict[int, int] = {}
+
+    @staticmethod
+    def _to_record(item) -> HostRecord:
+        if isinstance(item, HostRecord):
+            return item
+        if isinstance(item, Mapping):
+            return HostRecord.from_row(item)
+        return HostRecord.from_model(item)
+
+    def upsert(self, item) -> HostRecord:
+        record = self._to_record(item)
+        previous = self._records.get(record.ip_int)
+        if previous is not None and previous.mac_int != record.mac_int:
+            self._ip_by_mac.pop(previous.mac_int, None)
+        # MAC unique : l'hôte a changé d'IP, on retire l'ancienne entrée
+        moved = self._ip_by_mac.get(record.mac_int)
+        if moved is not None and moved != record.ip_int:
+            self._records.pop(moved, None)
+        self._records[record.ip_int] = record
+        self._ip_by_mac[record.mac_int] = record.ip_int
+        return record
+
+    append = upsert
+
+    def extend(self, items: Iterable):
+        for item in items:
+            self.upsert(item)
+
+    def replace(self, items: Iterable):
+        records = {}
+        for item in items:
+            record = self._to_record(item)
+            records[record.ip_int] = record
+        self._records = records
+        self._ip_by_mac = {r.mac_int: r.ip_int for r in records.values()}
+
+    def get(self, ip: str) -> Optional[HostRecord]:
+        try:
+            return self._records.get(pack_ip(ip))
+        except OSError:
+            return None
+
+    def get_by_mac(self, mac: str) -> Optional[HostRecord]:
+        try:
+            ip_int = self._ip_by_mac.get(pack_mac(mac))
+        except ValueError:
+            return None
+        return self._records.get(ip_int) if ip_int is not None else None
+
+    def remove(self, ip: str) -> bool:
+        try:
+            record = self._records.pop(pack_ip(ip), None)
+        except OSError:
+            return False
+        if record is None:
+            return False
+        self._ip_by_mac.pop(record.mac_int, None)
+        return True
+
+    def clear(self):
+        self._records = {}
+        self._ip_by_mac = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[HostRecord]:
+        return iter(list(self._records.values()))
+
+    def __contains__(self, ip: str) -> bool:
+        return self.get(ip) is not None
@@ -0,0 +1,276 @@
+# code/credentials.py
+# Secrets SSH hors de la base : ssh_conn_json ne garde qu'un credential_id.
+#   SSH_CREDENTIALS_FILE  {"<id>": {"username", "password", "key_filename", "passphrase"}}
+#   SSH_KNOWN_HOSTS       clés d'hôtes (format known_hosts d'OpenSSH)
+#   SSH_HOST_KEY_POLICY   tofu (défaut) : clé inconnue acceptée puis enregistrée
+#                         strict : seuls les hôtes déjà présents dans le fichier
+import os
+import json
+import uuid
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+SSH_CREDENTIALS_FILE = os.getenv("SSH_CREDENTIALS_FILE", "./credentials.json")
+SSH_KNOWN_HOSTS = os.getenv("SSH_KNOWN_HOSTS", "./known_hosts")
+SSH_HOST_KEY_POLICY = os.getenv("SSH_HOST_KEY_POLICY", "tofu")
+
+Stamp = Optional[Tuple[int, int]]
+
+
+def _stamp(path: str) -> Stamp:
+    # (mtime, taille) : change quand le fichier est réécrit
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _write_private(path: str, text: str):
+    # écriture atomique, lisible par le seul propriétaire
+    tmp = f"{path}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class CredentialIn(BaseModel):
+    username: Optional[str] = ""
+    password: Optional[str] = ""
+    key_filename: Optional[str] = ""
+    passphrase: Optional[str] = ""
+
+
+class Credential:
+    __slots__ = ("id", "username", "password", "pkey")
+
+    def __init__(self, id, username, password, pkey):
+        # pylint: disable=redefined-builtin
+        self.id = id
+        self.username = username
+        self.password = password
+        self.pkey = pkey
+
+
+class CredentialStore:
+    """Identifiants relus quand le fichier change ; chaque clé privée n'est
+    lue et déchiffrée qu'une fois (puis à chaque modification du fichier)."""
+
+    def __init__(self, path: str = SSH_CREDENTIALS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp: Stamp = None
+        self._loaded = False
+        self._entries: Dict[str, Dict[str, str]] = {}
+        self._keys: Dict[Tuple[str, str], Tuple[Stamp, Any]] = {}
+        self.reloads = 0
+        self.key_parses = 0
+
+    def _refresh(self):
+        stamp = _stamp(self.path)
+        if self._loaded and stamp == self._stamp:
+            return
+        entries = {}
+        if stamp is not None:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        self._entries, self._stamp, self._loaded = entries, stamp, True
+        self.reloads += 1
+
+    def key(self, path: str, passphrase: str = ""):
+        """Clé privée parsée (paramiko.PKey), gardée tant que le fichier ne change pas."""
+        stamp = _stamp(path)
+        with self._lock:
+            cached = self._keys.get((path, passphrase))
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+        import paramiko  # pylint: disable=import-outside-toplevel
+        pkey = paramiko.PKey.from_path(path, passphrase.encode() if passphrase else None)
+        with self._lock:
+            self._keys[(path, passphrase)] = (stamp, pkey)
+            self.key_parses += 1
+        return pkey
+
+    def get(self, cred_id: str) -> Credential:
+        with self._lock:
+            self._refresh()
+            entry = self._entries.get(cred_id)
+        if entry is None:
+            raise KeyError(f"Unknown credential {cred_id!r}")
+        key_filename = entry.get("key_filename") or ""
+        passphrase = entry.get("passphrase") or entry.get("password") or ""
+        pkey = self.key(key_filename, passphrase) if key_filename else None
+        return Credential(cred_id, entry.get("username") or "", entry.get("password") or "", pkey)
+
+    def __contains__(self, cred_id: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return cred_id in self._entries
+
+    def _put(self, cred_id: str, entry: Dict[str, str]):
+        # appelé sous self._lock
+        self._entries[cred_id] = entry
+        _write_private(self.path, json.dumps(self._entries, indent=2, sort_keys=True))
+        self._stamp = _stamp(self.path)
+
+    def put(self, cred_id: str, credential: CredentialIn):
+        with self._lock:
+            self._refresh()
+            self._put(cred_id, {k: v for k, v in credential.model_dump().items() if v})
+
+    def find_or_add(self, credential: CredentialIn) -> str:
+        # même secret = même identifiant, pas de doublon dans le fichier ;
+        # recherche et ajout sous le même verrou (deux requêtes concurrentes, un seul id)
+        wanted = {k: v for k, v in credential.model_dump().items() if v}
+        with self._lock:
+            self._refresh()
+            for cred_id, entry in self._entries.items():
+                if entry == wanted:
+                    return cred_id
+            cred_id = f"cred-{uuid.uuid4().hex[:12]}"
+            self._put(cred_id, wanted)
+            return cred_id
+
+    def describe(self) -> Dict[str, Dict]:
+        # jamais de secret dans la réponse
+        with self._lock:
+            self._refresh()
+            return {
+                cred_id: {"username": e.get("username", ""), "password": bool(e.get("password")),
+                          "key_filename": e.get("key_filename", "")}
+                for cred_id, e in self._entries.items()
+            }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"credentials": len(self._entries), "keys_cached": len(self._keys),
+                    "key_parses": self.key_parses, "reloads": self.reloads}
+
+
+def externalize(conn, store: CredentialStore):
+    """SSHConnection / JumpHost avec mot de passe ou clé en clair -> copie
+    ne gardant qu'un credential_id (le secret part dans le store)."""
+    update = {}
+    jump = getattr(conn, "jump_host", None)
+    if jump is not None:
+        update["jump_host"] = externalize(jump, store)
+    if conn.credential_id:
+        # l'identifiant fait foi : un secret envoyé en plus n'est jamais conservé
+        if conn.password or conn.key_filename:
+            update["password"] = update["key_filename"] = ""
+    elif conn.password or conn.key_filename:
+        # comme paramiko : avec une clé, le mot de passe sert aussi à la déchiffrer
+        update["credential_id"] = store.find_or_add(CredentialIn(
+            username=conn.username, password=conn.password, key_filename=conn.key_filename,
+            passphrase=conn.password if conn.key_filename else ""))
+        update["password"] = update["key_filename"] = ""
+    return conn.model_copy(update=update) if update else conn
+
+
+def connect_kwargs(conn, store: Optional[CredentialStore] = None) -> Dict[str, Any]:
+    # arguments d'authentification pour paramiko.SSHClient.connect
+    store = store or credential_store
+    if conn.credential_id:
+        cred = store.get(conn.credential_id)
+        return {"username": conn.username or cred.username or None,
+                "password": cred.password or None, "pkey": cred.pkey}
+    return {"username": conn.username or None, "password": conn.password or None,
+            "pkey": store.key(conn.key_filename, conn.password or "") if conn.key_filename else None}
+
+
+class KnownHosts:
+    """Clés d'hôtes en mémoire, persistées dans un fichier known_hosts.
+
+    Sert de politique paramiko (missing_host_key) : le client n'a aucune clé
+    chargée, chaque connexion est donc vérifiée ici par une simple recherche."""
+
+    def __init__(self, path: str = SSH_KNOWN_HOSTS, policy: str = SSH_HOST_KEY_POLICY):
+        if policy not in ("tofu", "strict"):
+            raise ValueError(f"Unknown SSH_HOST_KEY_POLICY {policy!r}, expected tofu or strict")
+        self.path = path
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._stamp: Stamp = None
+        self._loaded = False
+        self._keys: Dict[str, Dict[str, str]] = {}
+        self.verified = 0
+        self.added = 0
+        self.rejected = 0
+
+    def _refresh(self):
+        stamp = _stamp(self.path)
+        if self._loaded and stamp == self._stamp:
+            return
+        keys: Dict[str, Dict[str, str]] = {}
+        if stamp is not None:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    cols = line.split()
+                    # commentaires, marqueurs @cert-authority et noms hachés ignorés
+                    if len(cols) < 3 or cols[0][0] in "#@|":
+                        continue
+                    for name in cols[0].split(","):
+                        keys.setdefault(name, {})[cols[1]] = cols[2]
+        self._keys, self._stamp, self._loaded = keys, stamp, True
+
+    def check(self, hostname: str, key_type: str, key_b64: str) -> bool:
+        """True si la clé est connue ou vient d'être enregistrée (tofu)."""
+        with self._lock:
+            self._refresh()
+            known = self._keys.get(hostname)
+            if known is not None:
+                # hôte connu : toute autre clé, même d'un autre type, est refusée
+                if known.get(key_type) == key_b64:
+                    self.verified += 1
+                    return True
+                self.rejected += 1
+                return False
+            if self.policy == "strict":
+                self.rejected += 1
+                return False
+            self._keys[hostname] = {key_type: key_b64}
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(f"{hostname} {key_type} {key_b64}\n")
+            self._stamp = _stamp(self.path)
+            self.added += 1
+            return True
+
+    def missing_host_key(self, client, hostname: str, key):  # pylint: disable=unused-argument
+        if not self.check(hostname, key.get_name(), key.get_base64()):
+            import paramiko  # pylint: disable=import-outside-toplevel
+            raise paramiko.SSHException(f"Host key for {hostname} rejected ({key.get_name()})")
+
+    def forget(self, hostname: str) -> bool:
+        # hôte réinstallé : on retire sa clé pour l'accepter à nouveau
+        with self._lock:
+            self._refresh()
+            if self._keys.pop(hostname, None) is None:
+                return False
+            # seules les lignes de cet hôte changent ; noms hachés, @cert-authority,
+            # commentaires et autres hôtes restent tels quels
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.readlines()
+            kept = []
+            for line in lines:
+                cols = line.split(None, 1)
+                if len(cols) < 2 or cols[0][0] in "#@|" or hostname not in cols[0].split(","):
+                    kept.append(line)
+                    continue
+                names = [name for name in cols[0].split(",") if name != hostname]
+                if names:
+                    kept.append(f"{','.join(names)} {cols[1]}")
+            _write_private(self.path, "".join(kept))
+            self._stamp = _stamp(self.path)
+            return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"policy": self.policy, "hosts": len(self._keys), "verified": self.verified,
+                    "added": self.added, "rejected": self.rejected}
+
+
+credential_store = CredentialStore()
+known_hosts = KnownHosts()
@@ -2,12 +2,16 @@
 import os
 from typing import Generator
 from sqlmodel import SQLModel, create_engine, Session, select
+from sqlalchemy import text
 from .models import Ordinateur
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./supervision.db")
 # connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
 connect_args = {}
+# nombre de connexions ouvertes à l'avance au démarrage
+POOL_PREWARM = int(os.getenv("DB_POOL_PREWARM", "5"))
 
+# create_engine ne se connecte pas : aucun effet de bord à l'import
 engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args)
 
 def create_db_and_tables():
@@ -33,8 +37,28 @@ def reset_db():
     # Puis recrée les tables
     SQLModel.metadata.create_all(engine)
 
-# Supprime le fichier DB si il existe
-if os.path.exists("supervision.db"):
-    os.remove("supervision.db")
-create_db_and_tables()
-reset_db()
+def init_db():
+    # appelé depuis le lifespan (plus rien n'est fait à l'import du module)
+    # Supprime le fichier DB si il existe
+    if os.path.exists("supervision.db"):
+        os.remove("supervision.db")
+        # les connexions du pool pointent encore sur l'ancien fichier
+        engine.dispose()
+    create_db_and_tables()
+    reset_db()
+
+def prewarm_pool(size: int = POOL_PREWARM) -> int:
+    # ouvre `size` connexions en même temps pour remplir le pool
+    pool_size = getattr(engine.pool, "size", None)
+    if callable(pool_size):
+        size = min(size, pool_size())
+    conns = []
+    try:
+        for _ in range(size):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            conns.append(conn)
+    finally:
+        for conn in conns:
+            conn.close()
+    return len(conns)
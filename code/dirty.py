@@ -0,0 +1,79 @@
+# code/dirty.py
+# Suivi des écritures inutiles : une ligne dont l'empreinte (HostRecord.content_hash)
+# est celle de la ligne stockée n'est ni réécrite, ni invalidée dans les caches, ni signalée.
+import threading
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from .bulk import KEYS, select_by
+from .compact import HostRecord
+
+
+def stored_records(engine, key: str, values: List[str]) -> Dict[str, HostRecord]:
+    # état de référence = la base, pas le cache du processus (autres workers,
+    # POST /ssh/{ip} qui ne touche que le cache)
+    if not values:
+        return {}
+    with engine.connect() as conn:
+        return {row[key]: HostRecord.from_row(row) for row in select_by(conn, key, values)}
+
+
+def split_rows(engine, rows: List[Dict], key: str = "ip") -> Tuple[List[Dict], int, Dict[int, HostRecord]]:
+    """Lignes complètes : garde celles qui diffèrent de la base.
+
+    Renvoie (à écrire, nb évitées, état stocké des lignes à écrire par id)."""
+    stored = stored_records(engine, key, [row[key] for row in rows])
+    changed, previous = [], {}
+    for row in rows:
+        record = stored.get(row[key])
+        if record is None or record.content_hash() != HostRecord.from_row(row).content_hash():
+            changed.append(row)
+            if record is not None:
+                previous[record.id] = record
+    return changed, len(rows) - len(changed), previous
+
+
+def split_patches(engine, patches: List[Tuple[str, str, Dict]]) -> Tuple[List, int, Dict[int, HostRecord]]:
+    # mises à jour partielles : appliquées à une copie de la ligne stockée avant comparaison
+    stored = {key: stored_records(engine, key, [v for k, v, _ in patches if k == key]) for key in KEYS}
+    changed, previous = [], {}
+    for key, value, changes in patches:
+        record = stored[key].get(value)
+        if record is None or record.content_hash() != HostRecord.from_row(
+                dict(record.to_dict(), **changes)).content_hash():
+            changed.append((key, value, changes))
+            if record is not None:
+                previous[record.id] = record
+    return changed, len(patches) - len(changed), previous
+
+
+class WriteStats:
+    """Écritures faites / évitées par source (edit, upsert, bulk, discovery)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.written: Counter = Counter()
+        self.suppressed: Counter = Counter()
+
+    def record(self, source: str, written: int, suppressed: int):
+        with self._lock:
+            self.written[source] += written
+            self.suppressed[source] += suppressed
+
+    def reset(self):
+        with self._lock:
+            self.written.clear()
+            self.suppressed.clear()
+
+    @staticmethod
+    def _entry(written: int, suppressed: int) -> Dict:
+        total = written + suppressed
+        return {"written": written, "suppressed": suppressed,
+                "suppression_ratio": round(suppressed / total, 4) if total else 0.0}
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            sources = sorted(set(self.written) | set(self.suppressed))
+            result = {s: self._entry(self.written[s], self.suppressed[s]) for s in sources}
+            result["total"] = self._entry(sum(self.written.values()), sum(self.suppressed.values()))
+            return result
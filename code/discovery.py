@@ -0,0 +1,215 @@
+# code/discovery.py
+import os
+import uuid
+import ipaddress
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import insert, update, bindparam
+from sqlmodel import Session, select
+
+from .models import Ordinateur, ComputerStatus
+from .addresses import pack_ip, pack_mac
+from .backends import get_backend
+
+ARP_TABLE = "/proc/net/arp"
+DISCOVERY_WORKERS = int(os.getenv("DISCOVERY_WORKERS", "256"))
+DISCOVERY_MAX_HOSTS = int(os.getenv("DISCOVERY_MAX_HOSTS", "65536"))
+DISCOVERY_BATCH = 256
+
+
+def read_arp_table(path: Optional[str] = None) -> Dict[str, str]:
+    # IP address  HW type  Flags  HW address  Mask  Device
+    neighbours = {}
+    try:
+        with open(path or ARP_TABLE, encoding="utf-8") as f:
+            next(f, None)
+            for line in f:
+                cols = line.split()
+                if len(cols) < 4:
+                    continue
+                ip, flags, mac = cols[0], cols[2], cols[3]
+                # 0x0 = entrée incomplète
+                if flags == "0x0" or mac == "00:00:00:00:00:00":
+                    continue
+                neighbours[ip] = mac.upper()
+    except OSError:
+        pass
+    return neighbours
+
+
+def tcp_port_open(ip: str, port: int, timeout: float = 0.5) -> bool:
+    return get_backend().port_open(ip, port, timeout)
+
+
+def ping(ip: str) -> bool:
+    return get_backend().is_reachable(ip)
+
+
+def check_host(ip: str, port: int) -> Dict:
+    ssh = tcp_port_open(ip, port)
+    return {"ip": ip, "ssh": ssh, "reachable": ssh or ping(ip)}
+
+
+def collapse_hosts(hosts: List[Dict]) -> List[Dict]:
+    # une MAC / une IP vue deux fois dans le lot (hôte qui change d'adresse pendant
+    # le scan, IP réattribuée) : la dernière observation gagne, sinon l'INSERT en lot
+    # viole une contrainte unique et tout le lot échoue
+    by_mac = {}
+    for h in hosts:
+        by_mac[h["mac"]] = h
+    by_ip = {}
+    for h in by_mac.values():
+        by_ip[h["ip"]] = h
+    return list(by_ip.values())
+
+
+def upsert_hosts(engine, hosts: List[Dict]) -> Dict[str, int]:
+    # hosts : [{"ip", "mac"}] joignables ; on met à jour par MAC puis par IP, sinon insert
+    hosts = collapse_hosts(hosts)
+    if not hosts:
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
+    table = Ordinateur.__table__
+    with Session(engine) as session:
+        macs = [h["mac"] for h in hosts]
+        ips = [h["ip"] for h in hosts]
+        rows = session.exec(
+            select(Ordinateur.id, Ordinateur.mac, Ordinateur.ip, Ordinateur.joignable)
+            .where(Ordinateur.mac.in_(macs) | Ordinateur.ip.in_(ips))
+        ).all()
+        by_mac = {r.mac: r for r in rows}
+        by_ip = {r.ip: r for r in rows}
+
+        updates, inserts, unchanged = [], [], 0
+        for h in hosts:
+            row = by_mac.get(h["mac"]) or by_ip.get(h["ip"])
+            if row is not None:
+                # ne pas voler l'IP / la MAC d'une autre ligne (contraintes unique)
+                ip_owner = by_ip.get(h["ip"])
+                mac_owner = by_mac.get(h["mac"])
+                new_ip = h["ip"] if ip_owner is None or ip_owner.id == row.id else row.ip
+                new_mac = h["mac"] if mac_owner is None or mac_owner.id == row.id else row.mac
+                if (new_ip, new_mac) == (row.ip, row.mac) and row.joignable:
+                    # hôte déjà connu tel quel : aucune écriture
+                    unchanged += 1
+                    continue
+                updates.append({
+                    "row_id": row.id, "new_ip": new_ip, "new_mac": new_mac,
+                    "new_ip_int": pack_ip(new_ip), "new_mac_int": pack_mac(new_mac),
+                })
+            else:
+                inserts.append({
+                    "mac": h["mac"], "ip": h["ip"], "hostname": "", "taille_disque": 0,
+                    "os": "", "status": ComputerStatus.ON, "ram": 0.0, "joignable": True,
+                })
+
+        if updates:
+            session.connection().execute(
+                update(table)
+                .where(table.c.id == bindparam("row_id"))
+                .values(ip=bindparam("new_ip"), mac=bindparam("new_mac"),
+                        ip_int=bindparam("new_ip_int"), mac_int=bindparam("new_mac_int"),
+                        joignable=True),
+                updates,
+            )
+        if inserts:
+            session.connection().execute(insert(table), inserts)
+        if updates or inserts:
+            session.commit()
+    return {"inserted": len(inserts), "updated": len(updates), "unchanged": unchanged}
+
+
+class DiscoveryJob:
+
+    def __init__(self, cidr: str, port: int = 22):
+        self.id = uuid.uuid4().hex
+        self.cidr = cidr
+        self.port = port
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.total = 0
+        self.scanned = 0
+        self.hosts: List[Dict] = []
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self._lock = threading.Lock()
+
+    def as_dict(self, offset: int = 0) -> Dict:
+        # offset permet au client de ne récupérer que les nouveaux résultats
+        with self._lock:
+            return {
+                "id": self.id, "cidr": self.cidr, "status": self.status, "error": self.error,
+                "total": self.total, "scanned": self.scanned,
+                "found": len(self.hosts), "inserted": self.inserted, "updated": self.updated,
+                "unchanged": self.unchanged,
+                "hosts": self.hosts[offset:],
+            }
+
+    def _flush(self, engine, pending: List[Dict], on_flush: Optional[Callable[[List[str]], None]] = None,
+               write_stats=None):
+        neighbours = read_arp_table()
+        registrable = []
+        for h in pending:
+            h["mac"] = neighbours.get(h["ip"])
+            if h["mac"]:
+                registrable.append(h)
+        counts = upsert_hosts(engine, registrable)
+        with self._lock:
+            self.hosts.extend(pending)
+            self.inserted += counts["inserted"]
+            self.updated += counts["updated"]
+            self.unchanged += counts["unchanged"]
+        if write_stats is not None:
+            write_stats.record("discovery", counts["inserted"] + counts["updated"], counts["unchanged"])
+        if on_flush and (counts["inserted"] or counts["updated"]):
+            on_flush([h["ip"] for h in registrable])
+
+    def run(self, engine, on_flush: Optional[Callable[[List[str]], None]] = None, write_stats=None):
+        try:
+            network = ipaddress.ip_network(self.cidr, strict=False)
+            targets = [str(ip) for ip in network.hosts()]
+            self.total = len(targets)
+            self.status = "running"
+            pending = []
+            with ThreadPoolExecutor(max_workers=min(DISCOVERY_WORKERS, max(len(targets), 1))) as pool:
+                futures = [pool.submit(check_host, ip, self.port) for ip in targets]
+                for future in as_completed(futures):
+                    result = future.result()
+                    with self._lock:
+                        self.scanned += 1
+                    if result["reachable"]:
+                        pending.append(result)
+                    if len(pending) >= DISCOVERY_BATCH:
+                        self._flush(engine, pending, on_flush, write_stats)
+                        pending = []
+            self._flush(engine, pending, on_flush, write_stats)
+            self.status = "done"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+
+
+class DiscoveryManager:
+
+    def __init__(self, engine, on_flush: Optional[Callable[[List[str]], None]] = None, write_stats=None):
+        self.engine = engine
+        self.write_stats = write_stats  # dirty.WriteStats
+        # appelé avec les IP du lot quand il a modifié la base (cache, statistiques)
+        self.on_flush = on_flush
+        self.jobs: Dict[str, DiscoveryJob] = {}
+
+    def start(self, cidr: str, port: int = 22) -> DiscoveryJob:
+        network = ipaddress.ip_network(cidr, strict=False)  # ValueError si invalide
+        if network.version != 4:
+            raise ValueError("Only IPv4 networks are supported")
+        if network.num_addresses > DISCOVERY_MAX_HOSTS:
+            raise ValueError(f"Network too large (max {DISCOVERY_MAX_HOSTS} addresses)")
+        job = DiscoveryJob(str(network), port)
+        self.jobs[job.id] = job
+        threading.Thread(target=job.run, args=(self.engine, self.on_flush, self.write_stats), daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> Optional[DiscoveryJob]:
+        return self.jobs.get(job_id)
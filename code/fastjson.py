@@ -0,0 +1,19 @@
+# code/fastjson.py
+# Encodeur JSON le plus rapide disponible : orjson si installé (pip install orjson),
+# sinon json de la bibliothèque standard.
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # dépendance optionnelle
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        # Enum (ComputerStatus) et dict/list natifs sont gérés directement
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
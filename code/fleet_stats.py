@@ -0,0 +1,113 @@
+# code/fleet_stats.py
+import threading
+from collections import Counter
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy import case, func, select
+
+from .models import Ordinateur
+
+
+class Contribution(NamedTuple):
+    status: str
+    os: str
+    ram: float
+    joignable: bool
+
+
+def contribution(ordinateur) -> Contribution:
+    status = getattr(ordinateur.status, "value", ordinateur.status)
+    return Contribution(status, ordinateur.os or "", float(ordinateur.ram or 0.0), bool(ordinateur.joignable))
+
+
+class FleetStats:
+    """Agrégats du parc maintenus à chaque écriture ; lecture en O(1).
+
+    rebuild() recalcule tout avec des GROUP BY (démarrage, imports en masse)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.total = 0
+        self.by_status: Counter = Counter()
+        self.by_os: Counter = Counter()
+        self.total_ram = 0.0
+        self.reachable = 0
+        # dernière charge CPU connue par hôte, et leur somme
+        self._cpu: Dict[str, float] = {}
+        self._cpu_sum = 0.0
+
+    def _apply(self, c: Contribution, sign: int):
+        self.total += sign
+        self.by_status[c.status] += sign
+        self.by_os[c.os] += sign
+        self.total_ram += sign * c.ram
+        self.reachable += sign * int(c.joignable)
+        for counter, key in ((self.by_status, c.status), (self.by_os, c.os)):
+            if counter[key] <= 0:
+                del counter[key]
+
+    def add(self, ordinateur):
+        with self._lock:
+            self._apply(contribution(ordinateur), 1)
+
+    def remove(self, ordinateur):
+        with self._lock:
+            self._apply(contribution(ordinateur), -1)
+            self._forget_cpu(ordinateur.ip)
+
+    def update(self, before: Contribution, ordinateur):
+        with self._lock:
+            self._apply(before, -1)
+            self._apply(contribution(ordinateur), 1)
+
+    def record_cpu(self, ip: str, load: float):
+        with self._lock:
+            self._cpu_sum += load - self._cpu.get(ip, 0.0)
+            self._cpu[ip] = load
+
+    def _forget_cpu(self, ip: str):
+        self._cpu_sum -= self._cpu.pop(ip, 0.0)
+
+    def reset(self):
+        with self._lock:
+            self._reset()
+
+    def rebuild(self, engine):
+        table = Ordinateur.__table__
+        with engine.connect() as conn:
+            by_status = conn.execute(
+                select(table.c.status, func.count()).group_by(table.c.status)
+            ).all()
+            by_os = conn.execute(select(table.c.os, func.count()).group_by(table.c.os)).all()
+            total, total_ram, reachable = conn.execute(
+                select(func.count(), func.coalesce(func.sum(table.c.ram), 0.0),
+                       func.coalesce(func.sum(case((table.c.joignable, 1), else_=0)), 0))
+            ).one()
+            ips = set(conn.execute(select(table.c.ip)).scalars())
+        with self._lock:
+            self.total = total
+            self.by_status = Counter({getattr(s, "value", s): n for s, n in by_status})
+            self.by_os = Counter({(o or ""): n for o, n in by_os})
+            self.total_ram = float(total_ram)
+            self.reachable = int(reachable)
+            # on garde les mesures CPU des hôtes encore présents
+            for ip in [ip for ip in self._cpu if ip not in ips]:
+                self._forget_cpu(ip)
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            cpu_samples = len(self._cpu)
+            avg_cpu: Optional[float] = self._cpu_sum / cpu_samples if cpu_samples else None
+            return {
+                "total": self.total,
+                "by_status": dict(self.by_status),
+                "by_os": dict(self.by_os),
+                "total_ram": round(self.total_ram, 3),
+                "reachable": self.reachable,
+                "reachable_pct": round(100.0 * self.reachable / self.total, 2) if self.total else 0.0,
+                "avg_cpu_load": round(avg_cpu, 2) if avg_cpu is not None else None,
+                "cpu_samples": cpu_samples,
+            }
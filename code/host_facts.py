@@ -0,0 +1,142 @@
+# code/host_facts.py
+import os
+import json
+import time
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select, delete
+
+from .models import HostFact
+
+# os-release et RAM totale ne changent presque jamais : 24h par défaut
+HOST_FACTS_TTL = float(os.getenv("HOST_FACTS_TTL", "86400"))
+
+
+def content_hash(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class FactEntry:
+    value: Any
+    content_hash: str
+    collected_at: float
+
+
+class HostFactsCache:
+    """Cache mémoire des faits hôte, persisté dans la table HostFact.
+
+    La lecture ne touche ni la DB ni SSH tant que l'entrée n'a pas expiré.
+    """
+
+    def __init__(self, engine, ttl: float = HOST_FACTS_TTL):
+        self.engine = engine
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, str], FactEntry] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        with Session(self.engine) as session:
+            rows = session.exec(select(HostFact)).all()
+        with self._lock:
+            self._entries = {
+                (r.ip, r.name): FactEntry(r.value, r.content_hash, r.collected_at)
+                for r in rows
+            }
+            return len(self._entries)
+
+    def prime(self, rows: List[Dict], replace: bool = False):
+        # alimente le cache depuis des lignes déjà lues (ex : snapshot), sans requête
+        with self._lock:
+            if replace:
+                self._entries = {}
+            for r in rows:
+                self._entries[(r["ip"], r["name"])] = FactEntry(
+                    r["value"], r["content_hash"], r["collected_at"]
+                )
+
+    def get(self, ip: str, name: str) -> Optional[FactEntry]:
+        entry = self._entries.get((ip, name))
+        if entry is None or time.time() - entry.collected_at > self.ttl:
+            return None
+        return entry
+
+    def put(self, ip: str, name: str, value: Any) -> FactEntry:
+        entry = FactEntry(value, content_hash(value), time.time())
+        with Session(self.engine) as session:
+            row = session.exec(
+                select(HostFact).where(HostFact.ip == ip, HostFact.name == name)
+            ).first()
+            if row is None:
+                row = HostFact(ip=ip, name=name)
+            # même contenu : on ne rafraîchit que l'horodatage
+            if row.content_hash != entry.content_hash:
+                row.value = value
+                row.content_hash = entry.content_hash
+            row.collected_at = entry.collected_at
+            session.add(row)
+            session.commit()
+        with self._lock:
+            self._entries[(ip, name)] = entry
+        return entry
+
+    def get_or_fetch(self, ip: str, name: str, fetch: Callable[[], Any],
+                     is_valid: Callable[[Any], bool] = lambda v: v is not None) -> Any:
+        entry = self.get(ip, name)
+        if entry is not None:
+            return entry.value
+        value = fetch()
+        # on ne met pas en cache un échec SSH
+        if is_valid(value):
+            self.put(ip, name, value)
+        return value
+
+    def entries(self, ip: str) -> List[Dict]:
+        return [
+            {"name": name, "value": e.value, "content_hash": e.content_hash,
+             "collected_at": e.collected_at, "expired": time.time() - e.collected_at > self.ttl}
+            for (entry_ip, name), e in list(self._entries.items())
+            if entry_ip == ip
+        ]
+
+    def invalidate(self, ip: str, name: Optional[str] = None) -> int:
+        with self._lock:
+            keys = [k for k in self._entries if k[0] == ip and (name is None or k[1] == name)]
+            for k in keys:
+                del self._entries[k]
+        with Session(self.engine) as session:
+            stmt = delete(HostFact).where(HostFact.ip == ip)
+            if name is not None:
+                stmt = stmt.where(HostFact.name == name)
+            session.exec(stmt)
+            session.commit()
+        return len(keys)
+
+    def invalidate_many(self, ips: List[str], conn=None, batch: int = 500) -> int:
+        """Oublie tous les faits de ces hôtes : un DELETE ... WHERE ip IN (...) par lot,
+        sur conn si fourni (transaction de l'appelant), un seul parcours du cache."""
+        if not ips:
+            return 0
+        table = HostFact.__table__
+        if conn is None:
+            with self.engine.begin() as own:
+                return self.invalidate_many(ips, own, batch)
+        for i in range(0, len(ips), batch):
+            conn.execute(delete(table).where(table.c.ip.in_(ips[i:i + batch])))
+        wanted = set(ips)
+        with self._lock:
+            keys = [k for k in self._entries if k[0] in wanted]
+            for k in keys:
+                del self._entries[k]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        with Session(self.engine) as session:
+            session.exec(delete(HostFact))
+            session.commit()
@@ -0,0 +1,206 @@
+# code/ingest.py
+import os
+import json
+import time
+import zlib
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from .models import MetricSample
+
+logger = logging.getLogger(__name__)
+
+INGEST_BUFFER_SIZE = int(os.getenv("INGEST_BUFFER_SIZE", "200000"))
+INGEST_FLUSH_SIZE = int(os.getenv("INGEST_FLUSH_SIZE", "5000"))
+INGEST_FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", "1.0"))
+INGEST_MAX_BODY = int(os.getenv("INGEST_MAX_BODY", str(16 * 1024 * 1024)))
+# (mac, ip) inconnus gardés en mémoire : un agent non enregistré ne coûte pas une requête par envoi
+INGEST_MISS_TTL = float(os.getenv("INGEST_MISS_TTL", "60"))
+INGEST_MISS_MAX = 10000
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class BodyTooLarge(ValueError):
+    pass
+
+
+async def read_body(request, limit: int = INGEST_MAX_BODY) -> bytes:
+    # lu par morceaux : la taille est vérifiée avant d'avoir tout reçu
+    length = request.headers.get("content-length")
+    if length and length.isdigit() and int(length) > limit:
+        raise BodyTooLarge("Body too large")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise BodyTooLarge("Body too large")
+    return bytes(body)
+
+
+def decode_body(body: bytes, encoding: Optional[str]) -> Dict:
+    encoding = (encoding or "").lower()
+    if encoding in ("gzip", "deflate") or body[:2] == GZIP_MAGIC:
+        # 47 = 32 + 15 : en-tête gzip ou zlib détecté automatiquement ;
+        # décompression bornée pour ne pas se faire piéger par une "bombe"
+        body = zlib.decompressobj(47).decompress(body, INGEST_MAX_BODY + 1)
+    if len(body) > INGEST_MAX_BODY:
+        raise ValueError("Body too large")
+    payload = json.loads(body)
+    if not isinstance(payload, dict):
+        raise ValueError("Payload must be a JSON object")
+    return payload
+
+
+def parse_samples(payload: Dict, resolve: Callable[[Optional[str], Optional[str]], Optional[str]],
+                  now: Optional[float] = None) -> Tuple[List[Dict], int]:
+    """Format accepté :
+    {"mac": "...", "ip": "...", "samples": [{"metric": "cpu_load", "value": 3.2, "ts": 1700000000.0}]}
+    Chaque échantillon peut redéfinir "mac"/"ip". Renvoie (lignes valides, nb rejetés)."""
+    now = time.time() if now is None else now
+    default_mac, default_ip = payload.get("mac"), payload.get("ip")
+    samples = payload.get("samples")
+    if not isinstance(samples, list):
+        raise ValueError("'samples' must be a list")
+
+    rows, rejected = [], 0
+    resolved: Dict[Tuple, Optional[str]] = {}
+    for s in samples:
+        try:
+            key = (s.get("mac", default_mac), s.get("ip", default_ip))
+            if key not in resolved:
+                resolved[key] = resolve(*key)
+            ip = resolved[key]
+            value = s["value"]
+            if ip is None or isinstance(value, bool) or not isinstance(value, (int, float)):
+                rejected += 1
+                continue
+            rows.append({"ip": ip, "metric": str(s["metric"]), "value": float(value),
+                         "ts": float(s.get("ts", now))})
+        except (AttributeError, KeyError, TypeError, ValueError):
+            rejected += 1
+    return rows, rejected
+
+
+class MissCache:
+    """Clés d'hôtes introuvables en base, oubliées après ttl secondes ou à la
+    première écriture sur la table ordinateur (voir listing.watch_writes)."""
+
+    def __init__(self, ttl: float = INGEST_MISS_TTL, max_size: int = INGEST_MISS_MAX):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._expiry: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Tuple) -> bool:
+        with self._lock:
+            expiry = self._expiry.get(key)
+            if expiry is None:
+                return False
+            if expiry < time.monotonic():
+                del self._expiry[key]
+                return False
+            return True
+
+    def add(self, key: Tuple):
+        with self._lock:
+            if len(self._expiry) >= self.max_size:
+                self._expiry.clear()
+            self._expiry[key] = time.monotonic() + self.ttl
+
+    def clear(self):
+        with self._lock:
+            self._expiry.clear()
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+
+class IngestBuffer:
+    """Tampon mémoire borné, vidé par lots (INSERT multi-lignes) par un thread.
+
+    offer() refuse un lot entier quand il ne tient pas : l'appelant répond 429."""
+
+    def __init__(self, engine, capacity: int = INGEST_BUFFER_SIZE,
+                 flush_size: int = INGEST_FLUSH_SIZE, flush_interval: float = INGEST_FLUSH_INTERVAL):
+        self.engine = engine
+        self.capacity = capacity
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._rows: List[Dict] = []
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.accepted = 0
+        self.rejected_batches = 0
+        self.flushed = 0
+        self.flush_errors = 0
+        self.last_flush_ms = 0.0
+
+    def offer(self, rows: List[Dict]) -> bool:
+        with self._cond:
+            if len(self._rows) + len(rows) > self.capacity:
+                self.rejected_batches += 1
+                return False
+            self._rows.extend(rows)
+            self.accepted += len(rows)
+            if len(self._rows) >= self.flush_size:
+                self._cond.notify()
+            return True
+
+    def retry_after(self) -> int:
+        # estimation grossière : le temps de quelques cycles de flush
+        return max(1, int(self.flush_interval * 2))
+
+    def flush(self) -> int:
+        with self._cond:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return 0
+        start = time.perf_counter()
+        try:
+            with self.engine.begin() as conn:
+                for i in range(0, len(rows), self.flush_size):
+                    conn.execute(insert(MetricSample.__table__), rows[i:i + self.flush_size])
+        except Exception:
+            # on ne bloque pas l'ingestion sur une DB indisponible : lot perdu, compté
+            logger.exception("Ingest flush failed (%d samples dropped)", len(rows))
+            self.flush_errors += 1
+            return 0
+        self.last_flush_ms = round((time.perf_counter() - start) * 1000, 3)
+        self.flushed += len(rows)
+        return len(rows)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                if len(self._rows) < self.flush_size:
+                    self._cond.wait(self.flush_interval)
+            self.flush()
+        self.flush()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=10)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            buffered = len(self._rows)
+        return {
+            "buffered": buffered, "capacity": self.capacity,
+            "accepted": self.accepted, "flushed": self.flushed,
+            "rejected_batches": self.rejected_batches, "flush_errors": self.flush_errors,
+            "last_flush_ms": self.last_flush_ms,
+        }
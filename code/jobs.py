@@ -0,0 +1,299 @@
+# code/jobs.py
+# Commande ad hoc sur un ensemble d'hôtes, exécutée en arrière-plan.
+# La sortie de chaque hôte est écrite au fil de l'eau dans des fichiers de spool
+# plafonnés (JOB_SPOOL_DIR/<job>/<ip>.stdout|.stderr), jamais gardée en mémoire.
+import os
+import time
+import asyncio
+import uuid
+import shutil
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .backends import get_backend
+
+JOB_SPOOL_DIR = os.getenv("JOB_SPOOL_DIR", "./spool")
+# hôtes traités en même temps, tous jobs confondus (pool partagé)
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "32"))
+JOB_MAX_HOSTS = int(os.getenv("JOB_MAX_HOSTS", "5000"))
+# octets gardés par hôte et par flux ; au-delà la sortie est lue puis ignorée
+JOB_OUTPUT_MAX = int(os.getenv("JOB_OUTPUT_MAX", str(1024 * 1024)))
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "600"))
+# jobs terminés conservés (avec leur spool) avant suppression des plus anciens
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", "50"))
+MAX_READ = 1024 * 1024
+STREAMS = ("stdout", "stderr")
+FINAL_STATES = ("done", "failed", "cancelled")
+
+
+class JobRequest(BaseModel):
+    command: str
+    hosts: List[str] = []
+    cidr: Optional[str] = None
+    timeout: Optional[float] = None
+
+
+class Spool:
+    """Fichier de sortie plafonné, lisible pendant l'écriture."""
+
+    def __init__(self, path: str, limit: int):
+        self.path = path
+        self.limit = limit
+        self.size = 0
+        self.truncated = False
+        self._file = None
+
+    def write(self, data: bytes):
+        room = self.limit - self.size
+        if len(data) > room:
+            data = data[:max(room, 0)]
+            self.truncated = True
+        if not data:
+            return
+        if self._file is None:
+            self._file = open(self.path, "ab")  # pylint: disable=consider-using-with
+        self._file.write(data)
+        self._file.flush()
+        self.size += len(data)
+
+    def read(self, offset: int, limit: int) -> bytes:
+        size = self.size
+        if offset >= size:
+            return b""
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return f.read(min(limit, size - offset))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class HostRun:
+
+    def __init__(self, ip: str, conn, spool_dir: str, limit: int):
+        self.ip = ip
+        self.conn = conn
+        self.state = "pending"
+        self.exit_code: Optional[int] = None
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        name = ip.replace(":", "_").replace("/", "_")
+        self.spools = {s: Spool(os.path.join(spool_dir, f"{name}.{s}"), limit) for s in STREAMS}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ip": self.ip, "state": self.state, "exit_code": self.exit_code, "error": self.error,
+            "started_at": self.started_at, "finished_at": self.finished_at,
+            **{f"{s}_bytes": spool.size for s, spool in self.spools.items()},
+            "truncated": any(spool.truncated for spool in self.spools.values()),
+        }
+
+
+class FleetJob:
+
+    def __init__(self, command: str, hosts: Dict[str, Any], spool_root: str,
+                 timeout: Optional[float] = None, output_max: int = JOB_OUTPUT_MAX):
+        self.id = uuid.uuid4().hex
+        self.command = command
+        self.timeout = timeout or JOB_TIMEOUT
+        self.dir = os.path.join(spool_root, self.id)
+        os.makedirs(self.dir, exist_ok=True)
+        self.status = "pending"
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        # hosts : ip -> SSHConnection, ou message d'erreur si l'hôte n'est pas utilisable
+        self.hosts: Dict[str, HostRun] = {}
+        self.finished: List[str] = []  # ordre de fin, pour le suivi incrémental
+        self.cancelled = threading.Event()
+        self._changed = threading.Condition()
+        for ip, conn in hosts.items():
+            run = HostRun(ip, conn, self.dir, output_max)
+            if isinstance(conn, str):
+                run.state, run.error = "failed", conn
+                self.finished.append(ip)
+            self.hosts[ip] = run
+
+    def counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys(("pending", "running") + FINAL_STATES, 0)
+        for run in self.hosts.values():
+            counts[run.state] += 1
+        return counts
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id, "command": self.command, "status": self.status,
+            "created_at": self.created_at, "finished_at": self.finished_at,
+            "total": len(self.hosts), "counts": self.counts(),
+        }
+
+    def as_dict(self, offset: int = 0) -> Dict[str, Any]:
+        # offset : hôtes déjà terminés que le client a vus
+        with self._changed:
+            finished = self.finished[offset:]
+            return {**self.summary(), "hosts": [self.hosts[ip].as_dict() for ip in finished],
+                    "next_offset": offset + len(finished)}
+
+    def _finish_host(self, run: HostRun, state: str, exit_code: Optional[int] = None,
+                     error: Optional[str] = None):
+        for spool in run.spools.values():
+            spool.close()
+        with self._changed:
+            run.state, run.exit_code, run.error = state, exit_code, error
+            run.finished_at = time.time()
+            self.finished.append(run.ip)
+            self._changed.notify_all()
+
+    def _run_host(self, run: HostRun):
+        if self.cancelled.is_set():
+            self._finish_host(run, "cancelled")
+            return
+        with self._changed:
+            run.state, run.started_at = "running", time.time()
+        try:
+            code = get_backend().stream(run.conn, self.command,
+                                        lambda stream, data: run.spools[stream].write(data),
+                                        cancel=self.cancelled, timeout=self.timeout)
+        except Exception as e:
+            if self.cancelled.is_set():
+                self._finish_host(run, "cancelled", error=str(e) or None)
+            else:
+                self._finish_host(run, "failed", error=str(e) or e.__class__.__name__)
+            return
+        if self.cancelled.is_set() and code == -1:
+            self._finish_host(run, "cancelled")
+        else:
+            self._finish_host(run, "done", exit_code=code)
+
+    def run(self, pool: Executor):
+        # pool partagé entre les jobs : la concurrence globale reste bornée
+        self.status = "running"
+        pending = [run for run in self.hosts.values() if run.state == "pending"]
+        wait([pool.submit(self._run_host, run) for run in pending])
+        with self._changed:
+            self.status = "cancelled" if self.cancelled.is_set() else "done"
+            self.finished_at = time.time()
+            self._changed.notify_all()
+
+    def cancel(self) -> bool:
+        if self.status in ("done", "cancelled"):
+            return False
+        self.cancelled.set()
+        return True
+
+    def _since(self, offset: int) -> Tuple[List[Dict[str, Any]], bool]:
+        # appelé sous self._changed : hôtes terminés depuis offset, job fini ?
+        done = self.finished_at is not None
+        events = [{"type": "host", **self.hosts[ip].as_dict()} for ip in self.finished[offset:]]
+        if done:
+            events.append({"type": "job", **self.summary()})
+        return events, done
+
+    def events(self, offset: int = 0, wait: float = 1.0) -> Iterator[Dict[str, Any]]:
+        """Hôtes terminés à partir de offset, au fur et à mesure, puis le résumé du job."""
+        while True:
+            with self._changed:
+                if len(self.finished) <= offset and self.finished_at is None:
+                    self._changed.wait(wait)
+                events, done = self._since(offset)
+            yield from events
+            if done:
+                return
+            offset += len(events)
+
+    async def aevents(self, offset: int = 0, interval: float = 0.5) -> AsyncIterator[Dict[str, Any]]:
+        """Comme events, sans bloquer de thread : sondage entre deux asyncio.sleep."""
+        while True:
+            with self._changed:
+                events, done = self._since(offset)
+            for event in events:
+                yield event
+            if done:
+                return
+            offset += len(events)
+            await asyncio.sleep(interval)
+
+    def read_output(self, ip: str, stream: str = "stdout", offset: int = 0,
+                    limit: int = 65536) -> Dict[str, Any]:
+        run = self.hosts.get(ip)
+        if run is None:
+            raise KeyError(ip)
+        if stream not in STREAMS:
+            raise ValueError(f"stream must be one of {', '.join(STREAMS)}")
+        spool = run.spools[stream]
+        data = spool.read(max(offset, 0), max(1, min(limit, MAX_READ)))
+        next_offset = max(offset, 0) + len(data)
+        return {
+            "ip": ip, "stream": stream, "offset": offset, "next_offset": next_offset,
+            "data": data.decode(errors="replace"), "truncated": spool.truncated,
+            # plus rien à lire : hôte terminé et fin du fichier atteinte
+            "eof": run.state in FINAL_STATES and next_offset >= spool.size,
+        }
+
+
+class JobManager:
+
+    def __init__(self, spool_dir: str = JOB_SPOOL_DIR, workers: int = JOB_MAX_WORKERS,
+                 retention: int = JOB_RETENTION):
+        self.spool_dir = spool_dir
+        self.workers = workers
+        self.retention = retention
+        self.jobs: Dict[str, FleetJob] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+            return self._pool
+
+    def start(self, command: str, hosts: Dict[str, Any], timeout: Optional[float] = None) -> FleetJob:
+        if not command.strip():
+            raise ValueError("Empty command")
+        if not hosts:
+            raise ValueError("No hosts selected")
+        if len(hosts) > JOB_MAX_HOSTS:
+            raise ValueError(f"Too many hosts (max {JOB_MAX_HOSTS})")
+        job = FleetJob(command, hosts, self.spool_dir, timeout)
+        with self._lock:
+            self.jobs[job.id] = job
+        self._prune()
+        # ce thread ne fait qu'attendre la fin des hôtes du job
+        threading.Thread(target=job.run, args=(self._executor(),), daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> Optional[FleetJob]:
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [job.summary() for job in jobs]
+
+    def _prune(self):
+        # on garde les jobs en cours et les `retention` derniers terminés
+        with self._lock:
+            ended = [j for j in self.jobs.values() if j.finished_at is not None]
+            ended.sort(key=lambda j: j.finished_at)
+            expired = ended[:max(len(ended) - self.retention, 0)]
+            for job in expired:
+                del self.jobs[job.id]
+        for job in expired:
+            shutil.rmtree(job.dir, ignore_errors=True)
+
+    def shutdown(self):
+        with self._lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            job.cancel()
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            # les hôtes encore en file se terminent aussitôt (job annulé)
+            pool.shutdown(wait=False)
@@ -0,0 +1,191 @@
+# code/listing.py
+import os
+import gzip
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event, select
+
+from .models import Ordinateur
+from .addresses import cidr_range, mac_prefix_range
+from .fastjson import dumps
+
+# colonnes exposées ; ssh_conn_json (identifiants) ne quitte jamais le serveur
+PUBLIC_FIELDS = ("id", "mac", "ip", "hostname", "taille_disque", "os", "status", "ram", "joignable")
+MAX_PAGE_SIZE = 10000
+STREAM_CHUNK = 1000
+# niveau gzip de la copie pré-compressée de la liste complète (0 = désactivée)
+LISTING_GZIP_LEVEL = int(os.getenv("LISTING_GZIP_LEVEL", "6"))
+WRITE_MARK = "ordinateur_written"
+
+
+def parse_fields(spec: Optional[str]) -> Tuple[str, ...]:
+    # "ip,status,joignable" -> colonnes demandées, dans l'ordre de la table
+    if not spec:
+        return PUBLIC_FIELDS
+    requested = {f.strip() for f in spec.split(",") if f.strip()}
+    unknown = requested - set(PUBLIC_FIELDS)
+    if unknown or not requested:
+        raise ValueError(f"Unknown fields: {sorted(unknown)}; allowed: {', '.join(PUBLIC_FIELDS)}")
+    return tuple(f for f in PUBLIC_FIELDS if f in requested)
+
+
+def listing_query(fields: Tuple[str, ...], cidr: Optional[str] = None, oui: Optional[str] = None,
+                  after: Optional[int] = None, limit: Optional[int] = None):
+    """SELECT des seules colonnes demandées (+ id pour la pagination par curseur)."""
+    table = Ordinateur.__table__
+    columns = [table.c[f] for f in fields]
+    if "id" not in fields:
+        columns.append(table.c.id)
+    stmt = select(*columns).order_by(table.c.id)
+    if cidr:
+        low, high = cidr_range(cidr)
+        stmt = stmt.where(table.c.ip_int.between(low, high))
+    if oui:
+        low, high = mac_prefix_range(oui)
+        stmt = stmt.where(table.c.mac_int.between(low, high))
+    if after is not None:
+        stmt = stmt.where(table.c.id > after)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+def row_to_dict(row, fields: Tuple[str, ...]) -> Dict:
+    item = {f: row[i] for i, f in enumerate(fields)}
+    if "status" in item:
+        item["status"] = getattr(item["status"], "value", item["status"])
+    return item
+
+
+def fetch_page(engine, fields: Tuple[str, ...], limit: int, after: Optional[int] = None,
+               **filters) -> Dict:
+    # pagination par curseur (id > after) : coût constant quelle que soit la page
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    with engine.connect() as conn:
+        rows = conn.execute(listing_query(fields, after=after, limit=limit, **filters)).all()
+    id_index = fields.index("id") if "id" in fields else len(fields)
+    next_after = rows[-1][id_index] if len(rows) == limit else None
+    return {"items": [row_to_dict(r, fields) for r in rows], "next_after": next_after}
+
+
+def fetch_all(engine, fields: Tuple[str, ...], **filters) -> List[Dict]:
+    with engine.connect() as conn:
+        return [row_to_dict(r, fields) for r in conn.execute(listing_query(fields, **filters))]
+
+
+def encode_rows(rows, fields: Tuple[str, ...]) -> bytes:
+    # tuples -> JSON sans passer par des objets ORM ni la validation pydantic ;
+    # zip s'arrête avant l'id ajouté pour la pagination
+    return dumps([dict(zip(fields, r)) for r in rows])
+
+
+def fetch_all_json(engine, fields: Tuple[str, ...], **filters) -> bytes:
+    with engine.connect() as conn:
+        return encode_rows(conn.execute(listing_query(fields, **filters)), fields)
+
+
+def iter_ndjson(engine, fields: Tuple[str, ...], **filters) -> Iterator[bytes]:
+    # requête construite ici : un filtre invalide échoue avant le début de la réponse
+    stmt = listing_query(fields, **filters)
+
+    def generate():
+        # une ligne JSON par hôte, curseur côté serveur lu par blocs
+        with engine.connect() as conn:
+            result = conn.execution_options(yield_per=STREAM_CHUNK).execute(stmt)
+            for rows in result.partitions():
+                yield b"".join(dumps(dict(zip(fields, r))) + b"\n" for r in rows)
+
+    return generate()
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Accept-Encoding autorise gzip ? Tient compte des q-values :
+    "gzip;q=0" refuse, "*" vaut pour gzip s'il n'est pas cité."""
+    codings: Dict[str, float] = {}
+    for item in (accept_encoding or "").split(","):
+        coding, *params = [p.strip() for p in item.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding.lower()] = q
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in codings:
+            return codings[coding] > 0
+    return False
+
+
+class ListingCache:
+    """Corps JSON pré-encodé (et gzip) de la liste complète sans filtre.
+
+    Invalidé à chaque écriture sur la table ordinateur, voir watch_writes."""
+
+    def __init__(self, engine, gzip_level: int = LISTING_GZIP_LEVEL):
+        self.engine = engine
+        self.gzip_level = gzip_level
+        self._lock = threading.Lock()
+        self._version = 0
+        self._body: Optional[bytes] = None
+        self._gzip: Optional[bytes] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._body = self._gzip = None
+            self.invalidations += 1
+
+    def body(self, accept_gzip: bool = False) -> Tuple[bytes, bool]:
+        """Renvoie (corps, compressé)."""
+        with self._lock:
+            version, body, compressed = self._version, self._body, self._gzip
+        if body is None:
+            self.misses += 1
+            body = fetch_all_json(self.engine, PUBLIC_FIELDS)
+            with self._lock:
+                # une écriture pendant la lecture : on ne garde pas ce corps
+                if self._version == version:
+                    self._body = body
+        else:
+            self.hits += 1
+        if not accept_gzip or not self.gzip_level:
+            return body, False
+        if compressed is None:
+            compressed = gzip.compress(body, self.gzip_level)
+            with self._lock:
+                if self._version == version and self._body is body:
+                    self._gzip = compressed
+        return compressed, True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "cached": self._body is not None, "bytes": len(self._body or b""),
+                "gzip_bytes": len(self._gzip or b""), "hits": self.hits,
+                "misses": self.misses, "invalidations": self.invalidations,
+            }
+
+
+def watch_writes(engine, callback, table: str = "ordinateur"):
+    # INSERT/UPDATE/DELETE sur la table : marque la connexion, puis callback
+    # quand elle revient au pool (après le commit ou le rollback)
+    @event.listens_for(engine, "after_cursor_execute")
+    def mark_write(conn, cursor, statement, parameters, context, executemany):  # pylint: disable=unused-argument
+        if (context.isinsert or context.isupdate or context.isdelete) and table in statement.lower():
+            conn.info[WRITE_MARK] = True
+
+    @event.listens_for(engine, "checkin")
+    def notify_write(dbapi_connection, connection_record):  # pylint: disable=unused-argument
+        if connection_record.info.pop(WRITE_MARK, False):
+            callback()
+
+    return mark_write, notify_write
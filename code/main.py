@@ -1,13 +1,81 @@
 # code/main.py
+import time
+_IMPORT_START = time.perf_counter()
 
-from typing import List
-from fastapi import FastAPI, HTTPException #, Depends
+import os
+import zlib
+import asyncio
+import logging
+import tempfile
+from typing import List, Optional
+from fastapi import FastAPI, HTTPException, Request #, Depends
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlmodel import Session, select, delete
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from contextlib import asynccontextmanager
 
 from .models import Ordinateur, OrdinateurBase, SSHConnection, ComputerStatus
-from .db import engine, create_db_and_tables #, get_session
+from .db import engine, init_db, prewarm_pool #, get_session
+from .startup import StartupReport
+from .compact import HostCache, HostRecord
+from .listing import (
+    ListingCache, accepts_gzip, fetch_all_json, fetch_page, iter_ndjson, parse_fields, watch_writes,
+)
+from .fastjson import BACKEND as JSON_BACKEND, dumps
+from .fleet_stats import FleetStats, contribution
+from .alerts import AlertEngine, AlertRule, notifier_from_env
+from .scheduler import PollScheduler, POLL_ENABLED
+from .host_facts import HostFactsCache
+from .probes import COLLECTORS, ProbeRequest, probe_host, probe_hosts
+from .discovery import DiscoveryManager
+from .addresses import cidr_range
+from .jobs import JobManager, JobRequest
+from .backends import get_backend
+from .credentials import CredentialIn, credential_store, externalize, known_hosts
+from .ingest import (
+    BodyTooLarge, IngestBuffer, MissCache, decode_body, parse_samples, read_body,
+)
+from .bulk import (
+    bulk_delete, check_ip, external_ssh, prepare_patches, prepare_upserts, update_host, write_patches,
+    write_upserts,
+)
+from .dirty import WriteStats, split_patches, split_rows, stored_records
+from .admission import ADMISSION_ENABLED, AdmissionController, AdmissionMiddleware
+from .snapshot import (
+    iter_gzip_chunks, iter_records, latest_snapshot, read_records,
+    restore_file, restore_snapshot, save_snapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+startup_report = StartupReport()
+startup_report.record("import", time.perf_counter() - _IMPORT_START)
+
+host_facts = HostFactsCache(engine)
+fleet_stats = FleetStats()
+alert_engine = AlertEngine(notifier_from_env())
+ALERT_RULES_FILE = os.getenv("ALERT_RULES_FILE")
+# écritures faites / évitées (contenu identique), par source
+write_stats = WriteStats()
+
+
+def refresh_hosts(ips: List[str]):
+    # lignes modifiées hors API (découverte) : relues pour garder le cache exact
+    table = Ordinateur.__table__
+    with engine.connect() as conn:
+        rows = conn.execute(select(table).where(table.c.ip.in_(ips))).mappings().all()
+    app.state.ordinateurs.extend(rows)
+    fleet_stats.rebuild(engine)
+
+
+discovery = DiscoveryManager(engine, on_flush=refresh_hosts, write_stats=write_stats)
+# commandes ad hoc sur la flotte, sortie en spool sur disque
+jobs = JobManager()
+# fermeture périodique des transports de bastion inutilisés (BASTION_IDLE_TIMEOUT)
+IDLE_CHECK_INTERVAL = float(os.getenv("IDLE_CHECK_INTERVAL", "60"))
+# au démarrage, restaurer le dernier snapshot de SNAPSHOT_DIR s'il existe
+SNAPSHOT_WARM_START = os.getenv("SNAPSHOT_WARM_START", "1") == "1"
 # from .database import init_db
 
 # session = init_db()
@@ -25,44 +93,224 @@ from .db import engine, create_db_and_tables #, get_session
 #         app.state.ordinateurs[:] = ords
 
 
+def load_cache(app: FastAPI):
+    # lecture "core" : pas d'instance ORM/pydantic par ligne
+    with engine.connect() as conn:
+        rows = conn.execute(select(Ordinateur.__table__)).mappings()
+        app.state.ordinateurs.replace(rows)
+    host_facts.load()
+
+
+def record_metrics(ip: str, metrics: dict):
+    # point d'entrée unique des échantillons : stats du parc + règles d'alerte
+    for metric, value in metrics.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        if metric == "cpu_load":
+            fleet_stats.record_cpu(ip, value)
+        alert_engine.observe(ip, metric, value)
+
+
+def poll_host(ip: str) -> Optional[dict]:
+    # sonde planifiée : une seule commande SSH pour CPU + mémoire
+    record = app.state.ordinateurs.get(ip)
+    if not record or not record.ssh_conn:
+        return None
+    result = probe_host(record.ssh_conn, ["cpu_load", "free_memory"])
+    if not result["success"]:
+        return None
+    metrics = {name: m["value"] for name, m in result["metrics"].items() if m.get("success")}
+    record_metrics(ip, metrics)
+    return metrics
+
+
+def polled_hosts():
+    return [(r.ip, r.joignable) for r in app.state.ordinateurs if r.ssh_json]
+
+
+scheduler = PollScheduler(poll_host, polled_hosts)
+ingest_buffer = IngestBuffer(engine)
+admission = AdmissionController()
+# liste complète pré-encodée, invalidée par toute écriture sur la table ordinateur
+listing_cache = ListingCache(engine)
+# hôtes inconnus des agents : pas de requête DB à chaque envoi
+ingest_misses = MissCache()
+
+
+def on_hosts_written():
+    listing_cache.invalidate()
+    ingest_misses.clear()
+
+
+watch_writes(engine, on_hosts_written)
+
+
+def resolve_host(mac: Optional[str], ip: Optional[str]) -> Optional[str]:
+    # échantillons poussés : clé MAC en priorité, sinon IP, via le cache
+    record = app.state.ordinateurs.get_by_mac(mac) if mac else None
+    if record is None and ip:
+        record = app.state.ordinateurs.get(ip)
+    if record is None and (mac or ip):
+        key = (mac.upper() if mac else None, ip)
+        if key in ingest_misses:
+            return None
+        # hôte absent du cache (ex : ajouté par la découverte) : une requête, puis mis en cache
+        table = Ordinateur.__table__
+        cond = table.c.mac == key[0] if mac else table.c.ip == ip
+        with engine.connect() as conn:
+            row = conn.execute(select(table).where(cond)).mappings().first()
+        if row is None:
+            ingest_misses.add(key)
+            return None
+        record = app.state.ordinateurs.upsert(row)
+    return record.ip if record else None
+
+
+def snapshot_cache_filler(app: FastAPI):
+    # remplit les caches avec les lots du snapshot au fil de la restauration
+    app.state.ordinateurs.clear()
+    host_facts.prime([], replace=True)
+
+    def on_batch(kind, rows):
+        if kind == "ordinateur":
+            app.state.ordinateurs.extend(rows)
+        elif kind == "host_fact":
+            host_facts.prime(rows)
+    return on_batch
+
+
+def warm_up(app: FastAPI):
+    # exécuté dans un thread : /ready passe au vert à la fin
+    try:
+        path = latest_snapshot() if SNAPSHOT_WARM_START else None
+        restored = False
+        if path:
+            try:
+                with startup_report.phase("snapshot_restore"):
+                    restore_file(engine, path, on_batch=snapshot_cache_filler(app))
+                restored = True
+            except Exception:
+                logger.exception("Snapshot restore failed, loading from DB")
+        if not restored:
+            with startup_report.phase("cache_load"):
+                load_cache(app)
+        if ALERT_RULES_FILE:
+            with startup_report.phase("alert_rules"):
+                alert_engine.load_rules(ALERT_RULES_FILE)
+        with startup_report.phase("fleet_stats"):
+            fleet_stats.rebuild(engine)
+        with startup_report.phase("pool_prewarm"):
+            prewarm_pool()
+        if POLL_ENABLED:
+            scheduler.start()
+        startup_report.mark_ready()
+    except Exception as e:
+        logger.exception("Warm-up failed")
+        startup_report.mark_failed(str(e))
+
+
+async def close_idle_connections(interval: float = IDLE_CHECK_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            closed = await asyncio.to_thread(get_backend().close_idle)
+        except Exception:
+            logger.exception("Closing idle connections failed")
+            continue
+        if closed:
+            logger.info("Closed %d idle bastion transport(s)", closed)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    create_db_and_tables()
-    # ⚡ Crée la liste vide d'abord
-    app.state.ordinateurs = []
-    # charger depuis DB si nécessaire
-    with Session(engine) as session:
-        ords = session.exec(select(Ordinateur)).all()
-        app.state.ordinateurs[:] = ords
+    startup_report.reset()
+    with startup_report.phase("db_init"):
+        init_db()
+    listing_cache.invalidate()
+    # ⚡ Crée le cache vide d'abord
+    app.state.ordinateurs = HostCache()
+    # charger depuis DB en arrière-plan, l'API répond déjà pendant ce temps
+    warmup = asyncio.create_task(asyncio.to_thread(warm_up, app))
+    ingest_buffer.start()
+    idle_reaper = asyncio.create_task(close_idle_connections())
     yield
+    idle_reaper.cancel()
+    await warmup
+    scheduler.stop()
+    await asyncio.to_thread(ingest_buffer.stop)
+    jobs.shutdown()
+    get_backend().close()
 
 
 app = FastAPI(lifespan=lifespan)
-app.state.ordinateurs = []
+app.state.ordinateurs = HostCache()
+if ADMISSION_ENABLED:
+    # file d'attente bornée par classe de routes, 503 + Retry-After au-delà
+    app.add_middleware(AdmissionMiddleware, controller=admission)
 
 @app.get("/")
 def read_root():
     return {"message": "Bienvenue sur l'API FastAPI"}
 
+@app.get("/ready")
+def ready():
+    if startup_report.ready:
+        return {"ready": True}
+    return JSONResponse(status_code=503, content={"ready": False, "error": startup_report.error})
+
+@app.get("/startup_report")
+def get_startup_report():
+    return startup_report.as_dict()
+
 @app.get("/clean")
 def clean():
     try:
         with Session(engine) as session:
             session.exec(delete(Ordinateur))
             session.commit()
+        host_facts.clear()
+        fleet_stats.reset()
+        alert_engine.reset("host_removed")
+        app.state.ordinateurs.clear()
         return {"message": "Base nettoyée"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/ordinateurs", response_model=List[Ordinateur])
-def get_ordinateurs():
-    with Session(engine) as session:
-        existing = session.exec(
-            select(Ordinateur)
-        ).all()
-        
-        if existing:
-            return existing
+@app.get("/ordinateurs")
+def get_ordinateurs(request: Request, cidr: Optional[str] = None, oui: Optional[str] = None,
+                    fields: Optional[str] = None, limit: Optional[int] = None,
+                    after: Optional[int] = None, stream: bool = False):
+    # cidr=10.4.0.0/16, oui=00:1B:44 : parcours de plage sur les colonnes indexées
+    # fields=ip,status,joignable : seules ces colonnes sont lues en SQL (sans objets ORM)
+    # limit/after : pagination par curseur ; stream=1 : NDJSON
+    try:
+        columns = parse_fields(fields)
+        filters = {"cidr": cidr, "oui": oui}
+        if stream:
+            return StreamingResponse(iter_ndjson(engine, columns, **filters),
+                                     media_type="application/x-ndjson")
+        if limit is not None:
+            return Response(dumps(fetch_page(engine, columns, limit, after, **filters)),
+                            media_type="application/json")
+        if fields is None and cidr is None and oui is None and after is None:
+            # chemin rapide : corps déjà encodé (et compressé) en mémoire
+            body, compressed = listing_cache.body(accepts_gzip(request.headers.get("accept-encoding")))
+            headers = {"Vary": "Accept-Encoding"}
+            if compressed:
+                headers["Content-Encoding"] = "gzip"
+            return Response(body, media_type="application/json", headers=headers)
+        return Response(fetch_all_json(engine, columns, after=after, **filters),
+                        media_type="application/json")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+@app.get("/writes/stats")
+def get_write_stats():
+    return write_stats.as_dict()
+
+@app.get("/listing/stats")
+def get_listing_stats():
+    return dict(listing_cache.stats(), json_backend=JSON_BACKEND)
 
 
 @app.post("/add_ordinateur")
@@ -70,7 +318,9 @@ def add_ordinateur(payload: dict):
     # Convert SSH dict en JSON compatible SQLModel
     ssh_data = payload.pop("ssh_conn", None)
     if ssh_data:
-        payload["ssh_conn_json"] = ssh_data
+        # mot de passe / clé déplacés dans le store, la ligne ne garde que l'identifiant
+        ssh = SSHConnection(**{"hostname": payload.get("ip", ""), **ssh_data})
+        payload["ssh_conn_json"] = externalize(ssh, credential_store).model_dump()
 
     ordinateur = Ordinateur(**payload)
 
@@ -78,45 +328,47 @@ def add_ordinateur(payload: dict):
         session.add(ordinateur)
         session.commit()
         session.refresh(ordinateur)
+    fleet_stats.add(ordinateur)
+    app.state.ordinateurs.upsert(ordinateur)
     
     return {"success": True, "id": ordinateur.id}
 
 @app.put("/edit_ordinateur")
 def put_ordinateur(ordinateur: Ordinateur):
     try:
-        with Session(engine) as session:
-            # Vérifier si l'ordinateur existe dans la DB
-            stmt = select(Ordinateur).where(Ordinateur.ip == ordinateur.ip)
-            existing = session.exec(stmt).first()
-            if not existing:
-                raise HTTPException(status_code=404, detail="Ordinateur not found in DB")
-
-            # Mettre à jour les champs (sauf id)
-            for k, v in ordinateur.model_dump().items():
-                if k == "id":
-                    continue
-                setattr(existing, k, v)
-
-            session.add(existing)
-            session.commit()
-            session.refresh(existing)
+        # table=True : champs non validés (status peut rester une chaîne)
+        values = ordinateur.model_dump(exclude={"id", "ip_int", "mac_int"}, warnings=False)
+        ip = check_ip(ordinateur.ip)
+        # secrets vers le store avant la comparaison : la ligne stockée ne garde que l'identifiant
+        values["ssh_conn_json"] = external_ssh(values.get("ssh_conn_json"), ip)
+        # comparaison avec la ligne stockée : le cache peut différer de la base
+        previous = stored_records(engine, "ip", [ip]).get(ip)
+        if previous is None:
+            raise HTTPException(status_code=404, detail="Ordinateur not found in DB")
+        if previous.content_hash() == HostRecord.from_row(values).content_hash():
+            # contenu identique : ni écriture, ni invalidation, ni événement
+            write_stats.record("edit", 0, 1)
+            return {"message": "Ordinateur updated successfully", "changed": False}
+        before = contribution(previous)
+        # un seul UPDATE ... WHERE ip = ? (RETURNING)
+        row = update_host(engine, values)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Ordinateur not found in DB")
 
-        # Mettre à jour le cache si présent
-        cache_updated = False
-        for i, o in enumerate(app.state.ordinateurs):
-            if o.ip == ordinateur.ip:
-                app.state.ordinateurs[i] = existing
-                cache_updated = True
-                break
+        # Mettre à jour le cache (ajout si absent)
+        existing = app.state.ordinateurs.upsert(row)
+        fleet_stats.update(before, existing)
+        write_stats.record("edit", 1, 0)
 
-        if not cache_updated:
-            app.state.ordinateurs.append(existing)
-
-        return {"message": "Ordinateur updated successfully"}
+        return {"message": "Ordinateur updated successfully", "changed": True}
 
     except HTTPException:
         # On relance les HTTPException
         raise
+    except IntegrityError as e:
+        raise HTTPException(status_code=409, detail="MAC already used by another host") from e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
     except Exception as e:
         # Gestion des erreurs inattendues
         raise HTTPException(status_code=500, detail=f"Erreur lors de la mise à jour: {str(e)}") from e
@@ -129,19 +381,96 @@ def delete_ordinateur(ip: str):
         if existing:
             session.delete(existing)
             session.commit()
+            fleet_stats.remove(existing)
+    host_facts.invalidate(ip)
+    alert_engine.forget_host(ip)
     # update cache:
-    app.state.ordinateurs[:] = [o for o in app.state.ordinateurs if o.ip != ip]
+    app.state.ordinateurs.remove(ip)
     return {"message": "Ordinateur deleted successfully"}
 
+def apply_written(rows: List[dict], previous: dict):
+    # lignes écrites en lot : cache + compteurs du parc, ligne par ligne (pas de GROUP BY)
+    for row in rows:
+        record = app.state.ordinateurs.upsert(row)
+        before = previous.get(record.id)
+        if before is not None:
+            fleet_stats.update(contribution(before), record)
+        else:
+            fleet_stats.add(record)
+
+@app.put("/ordinateurs/upsert")
+def upsert_ordinateurs(hosts: List[dict], key: str = "mac"):
+    # INSERT ... ON CONFLICT (key) DO UPDATE, une instruction par lot de 500
+    # les lignes identiques à la ligne lue en base ne sont pas réécrites
+    try:
+        changed, unchanged, previous = split_rows(engine, prepare_upserts(hosts, key), key)
+        rows = write_upserts(engine, changed, key)
+    except IntegrityError as e:
+        raise HTTPException(status_code=409, detail="Conflict on the other unique column") from e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    write_stats.record("upsert", len(changed), unchanged)
+    apply_written(rows, previous)
+    return {"upserted": len(rows), "unchanged": unchanged, "ips": [r["ip"] for r in rows]}
+
+@app.patch("/ordinateurs/bulk")
+def patch_ordinateurs(items: List[dict]):
+    try:
+        changed, unchanged, previous = split_patches(engine, prepare_patches(items))
+        rows = write_patches(engine, changed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    write_stats.record("bulk", len(changed), unchanged)
+    apply_written(rows, previous)
+    return {"updated": len(rows), "unchanged": unchanged}
+
+@app.delete("/ordinateurs/bulk")
+def delete_ordinateurs(payload: dict):
+    # {"ips": [...], "macs": [...]}
+    try:
+        rows = bulk_delete(engine, payload.get("ips"), payload.get("macs"), host_facts=host_facts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    alert_engine.forget_hosts({row.ip for row in rows})
+    for row in rows:
+        app.state.ordinateurs.remove(row.ip)
+        fleet_stats.remove(row)
+    return {"deleted": len(rows)}
+
 @app.post("/ssh/{ip}")
 def setup_ssh(ip: str, ssh: SSHConnection):
-    for ordinateur in app.state.ordinateurs:
-        if ordinateur.ip == ip:
-            ordinateur.ssh_conn = ssh
-            return {"message": "SSH configuré avec succès"}
+    ordinateur = app.state.ordinateurs.get(ip)
+    if ordinateur:
+        for conn in (ssh, ssh.jump_host):
+            if conn is not None and conn.credential_id and conn.credential_id not in credential_store:
+                raise HTTPException(status_code=400, detail=f"Unknown credential {conn.credential_id}")
+        ordinateur.ssh_conn = externalize(ssh, credential_store)
+        return {"message": "SSH configuré avec succès"}
 
     raise HTTPException(status_code=404, detail="Ordinateur not found")
 
+@app.get("/credentials")
+def list_credentials():
+    # identifiants connus, sans les secrets
+    return credential_store.describe()
+
+@app.put("/credentials/{cred_id}")
+def put_credential(cred_id: str, credential: CredentialIn):
+    if credential.key_filename:
+        try:
+            credential_store.key(credential.key_filename, credential.passphrase)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Cannot load key: {e}") from e
+    credential_store.put(cred_id, credential)
+    return {"id": cred_id, **credential_store.describe()[cred_id]}
+
+@app.delete("/known_hosts/{hostname}")
+def forget_host_key(hostname: str):
+    # hôte réinstallé : sa nouvelle clé sera acceptée à la prochaine connexion
+    if not known_hosts.forget(hostname):
+        raise HTTPException(status_code=404, detail="Host key not found")
+    return {"forgotten": hostname}
+
 @app.get("/memory/{ip}")
 def free_memory(ip: str):
     with Session(engine) as session:
@@ -153,9 +482,14 @@ def free_memory(ip: str):
             ssh_conn = ordinateur.ssh_conn
             if not ssh_conn:
                 raise HTTPException(status_code=400, detail="SSH not configured")
+            free = ordinateur.get_free_memory()
+            record_metrics(ip, {"free_memory": free})
             return {
-                "free_memory": ordinateur.get_free_memory(),
-                "total_memory": ordinateur.get_max_memory()
+                "free_memory": free,
+                "total_memory": host_facts.get_or_fetch(
+                    ip, "total_memory", ordinateur.get_max_memory,
+                    is_valid=lambda v: v > 0
+                )
             }
     raise HTTPException(status_code=404, detail="Ordinateur not found")
 
@@ -167,16 +501,256 @@ def cpu_load(ip: str):
         if ordinateur:
             if not ordinateur.ssh_conn:
                 raise HTTPException(status_code=400, detail="SSH not configured")
-            return {"cpu_load": ordinateur.get_cpu_load()}
+            load = ordinateur.get_cpu_load()
+            record_metrics(ip, {"cpu_load": load})
+            return {"cpu_load": load}
     raise HTTPException(status_code=404, detail="Ordinateur not found")
 
 @app.get("/os_release/{ip}")
 def os_release(ip: str):
+    # réponse directe depuis le cache des faits hôte
+    cached = host_facts.get(ip, "os_release")
+    if cached is not None:
+        return cached.value
     with Session(engine) as session:
         stmt = select(Ordinateur).where(Ordinateur.ip == ip)
         ordinateur = session.exec(stmt).first()
         if ordinateur:
             if not ordinateur.ssh_conn:
                 raise HTTPException(status_code=400, detail="SSH not configured")
-            return ordinateur.get_os_release()
+            return host_facts.get_or_fetch(
+                ip, "os_release", ordinateur.get_os_release,
+                is_valid=lambda v: v.get("success") is True
+            )
     raise HTTPException(status_code=404, detail="Ordinateur not found")
+
+@app.get("/probe/collectors")
+def list_collectors():
+    return {name: c.command for name, c in COLLECTORS.items()}
+
+@app.post("/probe")
+def probe(request: ProbeRequest):
+    unknown = [name for name in request.collectors if name not in COLLECTORS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown collectors: {unknown}")
+
+    with Session(engine) as session:
+        stmt = select(Ordinateur).where(Ordinateur.ip.in_(request.hosts))
+        found = {o.ip: o for o in session.exec(stmt).all()}
+
+    results = {}
+    targets = {}
+    for ip in request.hosts:
+        ordinateur = found.get(ip)
+        if not ordinateur:
+            results[ip] = {"success": False, "error": "Ordinateur not found"}
+        elif not ordinateur.ssh_conn:
+            results[ip] = {"success": False, "error": "SSH not configured"}
+        else:
+            targets[ip] = ordinateur.ssh_conn
+
+    probed = probe_hosts(targets, request.collectors)
+    for ip, result in probed.items():
+        record_metrics(ip, {
+            name: m["value"] for name, m in result.get("metrics", {}).items() if m.get("success")
+        })
+    results.update(probed)
+    return {"results": results}
+
+@app.get("/fleet/stats")
+def get_fleet_stats():
+    return fleet_stats.as_dict()
+
+@app.get("/alerts")
+def get_alerts():
+    return alert_engine.active_alerts()
+
+@app.get("/alerts/rules")
+def get_alert_rules():
+    return list(alert_engine.rules.values())
+
+@app.post("/alerts/rules")
+def add_alert_rule(rule: AlertRule):
+    return alert_engine.add_rule(rule)
+
+@app.delete("/alerts/rules/{rule_id}")
+def delete_alert_rule(rule_id: str):
+    if not alert_engine.remove_rule(rule_id):
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    return {"message": "Alert rule deleted successfully"}
+
+@app.post("/ingest")
+async def ingest(request: Request):
+    try:
+        body = await read_body(request)
+    except BodyTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    # décompression, résolution des hôtes (requête DB possible) et métriques
+    # hors de la boucle d'événements
+    return await asyncio.to_thread(ingest_body, body, request.headers.get("content-encoding"))
+
+def ingest_body(body: bytes, encoding: Optional[str]):
+    try:
+        payload = decode_body(body, encoding)
+        rows, rejected = parse_samples(payload, resolve_host)
+    except (ValueError, zlib.error) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid ingest payload: {e}") from e
+
+    # backpressure : le lot entier est refusé si le tampon est plein
+    if not ingest_buffer.offer(rows):
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Ingest buffer full"},
+            headers={"Retry-After": str(ingest_buffer.retry_after())},
+        )
+    for row in rows:
+        record_metrics(row["ip"], {row["metric"]: row["value"]})
+    return {"accepted": len(rows), "rejected": rejected}
+
+@app.get("/ingest/stats")
+def get_ingest_stats():
+    return ingest_buffer.stats()
+
+@app.get("/admission/stats")
+def get_admission_stats():
+    if not ADMISSION_ENABLED:
+        return {"enabled": False}
+    return admission.stats()
+
+@app.get("/scheduler/stats")
+def get_scheduler_stats():
+    return scheduler.stats()
+
+@app.get("/probe/backend")
+def get_probe_backend():
+    # backend de sonde actif ; pour ssh, état des transports de bastion partagés
+    backend = get_backend()
+    return {"name": backend.name, **backend.stats()}
+
+@app.post("/fleet/stats/rebuild")
+def rebuild_fleet_stats():
+    fleet_stats.rebuild(engine)
+    return fleet_stats.as_dict()
+
+@app.post("/discovery/scan")
+def discovery_scan(cidr: str, port: int = 22):
+    try:
+        job = discovery.start(cidr, port)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return {"job_id": job.id, "cidr": job.cidr}
+
+@app.get("/discovery/{job_id}")
+def discovery_status(job_id: str, offset: int = 0):
+    job = discovery.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Discovery job not found")
+    return job.as_dict(offset)
+
+@app.post("/jobs")
+def submit_job(request: JobRequest):
+    table = Ordinateur.__table__
+    stmt = select(Ordinateur)
+    try:
+        if request.cidr:
+            low, high = cidr_range(request.cidr)
+            stmt = stmt.where(table.c.ip_int.between(low, high) | Ordinateur.ip.in_(request.hosts))
+        else:
+            stmt = stmt.where(Ordinateur.ip.in_(request.hosts))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    with Session(engine) as session:
+        found = {o.ip: o.ssh_conn for o in session.exec(stmt).all()}
+    # hôte inconnu ou sans SSH : marqué en échec dans le job, pas de refus global
+    hosts = {ip: "Ordinateur not found" for ip in request.hosts}
+    hosts.update({ip: conn or "SSH not configured" for ip, conn in found.items()})
+    try:
+        job = jobs.start(request.command, hosts, request.timeout)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return {"job_id": job.id, "total": len(job.hosts)}
+
+@app.get("/jobs")
+def list_jobs():
+    return jobs.list()
+
+def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str, offset: int = 0):
+    return get_job(job_id).as_dict(offset)
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, offset: int = 0):
+    # NDJSON : une ligne par hôte terminé, puis le résumé du job ; générateur async,
+    # un abonné n'occupe aucun thread du pool anyio pendant toute la durée du job
+    job = get_job(job_id)
+
+    async def lines():
+        async for event in job.aevents(offset):
+            yield dumps(event) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/jobs/{job_id}/hosts/{ip}/output")
+def job_output(job_id: str, ip: str, stream: str = "stdout", offset: int = 0, limit: int = 65536):
+    try:
+        return get_job(job_id).read_output(ip, stream, offset, limit)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail="Host not in job") from e
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    job = get_job(job_id)
+    if not job.cancel():
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    return {"cancelled": job_id}
+
+@app.get("/snapshot/export")
+def snapshot_export():
+    return StreamingResponse(
+        iter_gzip_chunks(iter_records(engine)),
+        media_type="application/gzip",
+        headers={"Content-Disposition": 'attachment; filename="inventory.ndjson.gz"'},
+    )
+
+@app.post("/snapshot")
+def snapshot_save():
+    path = save_snapshot(engine)
+    return {"message": "Snapshot saved", "path": path}
+
+@app.post("/snapshot/import")
+async def snapshot_import(request: Request):
+    # le corps est recopié sur disque au fil de l'eau (mémoire bornée),
+    # puis relu ligne par ligne et inséré par lots dans un thread
+    with tempfile.TemporaryFile() as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        try:
+            counts = await asyncio.to_thread(
+                restore_snapshot, engine, read_records(spool), snapshot_cache_filler(app)
+            )
+            await asyncio.to_thread(fleet_stats.rebuild, engine)
+            # parc remplacé : les alertes en cours ne décrivent plus ces hôtes
+            await asyncio.to_thread(alert_engine.reset)
+        except (ValueError, OSError, SQLAlchemyError) as e:
+            # transaction annulée : on recharge les caches depuis la DB
+            await asyncio.to_thread(load_cache, app)
+            raise HTTPException(status_code=400, detail=f"Invalid snapshot: {e}") from e
+    return {"message": "Snapshot imported", "counts": counts}
+
+@app.get("/host_facts/{ip}")
+def get_host_facts(ip: str):
+    return host_facts.entries(ip)
+
+@app.delete("/host_facts/{ip}")
+def invalidate_host_facts(ip: str, fact: Optional[str] = None):
+    removed = host_facts.invalidate(ip, fact)
+    return {"message": "Host facts invalidated", "removed": removed}
@@ -1,52 +1,44 @@
 # code/models.py
 from enum import Enum
 import re
-import socket
-import os
-from typing import Optional, Tuple, Dict, ClassVar
+from typing import Any, Optional, Tuple, Dict, ClassVar
 from sqlmodel import SQLModel, Field, Column, String, JSON #, Integer, Float
+from sqlalchemy import UniqueConstraint, BigInteger, event
+from .addresses import pack_ip, pack_mac
 from pydantic import BaseModel, field_validator, model_validator
 
-import paramiko
+from .backends import get_backend
+from .probes import COLLECTORS
+
+# paramiko (et sa pile cryptography) n'est importé qu'au premier usage SSH,
+# voir backends.SSHBackend ; PROBE_BACKEND choisit le backend (ssh, local, fake)
 
 class ComputerStatus(str, Enum):
     ON = "ON"
     OFF = "OFF"
     RELOADING = "RELOADING"
 
-from pydantic import BaseModel
-from typing import Optional, Tuple
-import paramiko
+class JumpHost(BaseModel):
+    # bastion (ProxyJump) : un transport partagé, voir ssh_pool
+    hostname: str
+    username: Optional[str] = ""
+    password: Optional[str] = ""
+    key_filename: Optional[str] = ""
+    credential_id: Optional[str] = ""
+    port: int = 22
 
 class SSHConnection(BaseModel):
     hostname: str
     username: Optional[str] = ""
     password: Optional[str] = ""
     key_filename: Optional[str] = ""
+    # identifiant dans le store (credentials.py) : remplace password / key_filename
+    credential_id: Optional[str] = ""
     port: int = 22
+    jump_host: Optional[JumpHost] = None
 
     def execute_command(self, command: str) -> Tuple[str, str, int]:
-        if not self.hostname:
-            return "", "No hostname configured", -1
-        try:
-            client = paramiko.SSHClient()
-            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-            client.connect(
-                self.hostname,
-                port=self.port,
-                username=self.username or None,
-                password=self.password or None,
-                key_filename=self.key_filename or None,
-                timeout=5
-            )
-            _, stdout, stderr = client.exec_command(command)
-            exit_code = stdout.channel.recv_exit_status()
-            out = stdout.read().decode(errors="ignore")
-            err = stderr.read().decode(errors="ignore")
-            client.close()
-            return out, err, exit_code
-        except Exception as e:
-            return "", str(e), -1
+        return get_backend().execute(self, command)
 
 class OrdinateurBase(BaseModel):
     mac: str
@@ -100,10 +92,7 @@ class OrdinateurBase(BaseModel):
 
         # hostname auto-resolution
         if not self.hostname:
-            try:
-                self.hostname = socket.gethostbyaddr(self.ip)[0]
-            except Exception:
-                self.hostname = ""
+            self.hostname = get_backend().reverse_dns(self.ip)
 
         # si ssh_conn existe et n'a pas de hostname, on met l'IP
         if self.ssh_conn and isinstance(self.ssh_conn, SSHConnection):
@@ -113,20 +102,16 @@ class OrdinateurBase(BaseModel):
         # try to fetch RAM via SSH if available
         if self.ram == 0.0 and isinstance(self.ssh_conn, SSHConnection):
             try:
-                stdout, _, exit_code = self.ssh_conn.execute_command("free -m")
+                collector = COLLECTORS["total_memory"]
+                stdout, _, exit_code = self.ssh_conn.execute_command(collector.command)
                 if exit_code == 0:
-                    self.ram = float(stdout.strip().split("\n")[1].split()[1]) / 1024
+                    self.ram = collector.parse(stdout)
             except Exception:
                 self.ram = 0.0
 
         # ping check
         if self.joignable is False:
-            try:
-                ping_target = self.hostname or self.ip
-                response = os.system(f"ping -c 1 -W 1 {ping_target} > /dev/null 2>&1")
-                self.joignable = (response == 0)
-            except Exception:
-                self.joignable = False
+            self.joignable = get_backend().is_reachable(self.hostname or self.ip)
 
         return self
 
@@ -155,56 +140,43 @@ class Ordinateur(SQLModel, OrdinateurBase, table=True):
     status: ComputerStatus = Field(default=ComputerStatus.OFF)
     ram: float = Field(default=0.0)
     joignable: bool = Field(default=False)
+
+    # copies entières de ip / mac pour les recherches par plage (CIDR, OUI)
+    # remplies automatiquement, voir sync_packed_columns
+    ip_int: Optional[int] = Field(
+        default=None,
+        sa_column=Column(BigInteger, index=True, default=lambda ctx: pack_ip(ctx.get_current_parameters()["ip"]))
+    )
+    mac_int: Optional[int] = Field(
+        default=None,
+        sa_column=Column(BigInteger, index=True, default=lambda ctx: pack_mac(ctx.get_current_parameters()["mac"]))
+    )
     # ssh_conn: Optional[SSHConnection] = Field(default=None, sa_column=None)
 
     # We store SSH connection as JSON via pydantic; not persisted by SQLModel as a column here.
     # For simple persistence, we won't persist ssh_conn into DB in this minimal example.
 
-    # ========== Instance helper methods (same as before) ==========
+    # ========== Instance helper methods (collecteurs de probes.py) ==========
+    def _collect_number(self, name: str) -> float:
+        # même commande et même parseur que POST /probe ; 0.0 si la mesure échoue
+        collector = COLLECTORS[name]
+        try:
+            if self.ssh_conn:
+                stdout, _, exit_code = self.ssh_conn.execute_command(collector.command)
+            else:
+                stdout, _, exit_code = get_backend().run_local(collector.command)
+            return collector.parse(stdout) if exit_code == 0 else 0.0
+        except Exception:
+            return 0.0
+
     def get_free_memory(self) -> float:
-        if self.ssh_conn:
-            stdout, _, exit_code = self.ssh_conn.execute_command("free -m")
-            if exit_code == 0:
-                return float(stdout.strip().split("\n")[1].split()[3]) / 1024
-        else:
-            try:
-                cmd_output = os.popen("free -m").readlines()
-                return float(cmd_output[1].split()[3]) / 1024
-            except Exception:
-                return 0.0
-        return 0.0
+        return self._collect_number("free_memory")
 
     def get_max_memory(self) -> float:
-        if self.ssh_conn:
-            stdout, _, exit_code = self.ssh_conn.execute_command("free -m")
-            if exit_code == 0:
-                return float(stdout.strip().split("\n")[1].split()[1]) / 1024
-        else:
-            try:
-                cmd_output = os.popen("free -m").readlines()
-                return float(cmd_output[1].split()[1]) / 1024
-            except Exception:
-                return 0.0
-        return 0.0
+        return self._collect_number("total_memory")
 
     def get_cpu_load(self) -> float:
-        if self.ssh_conn:
-            stdout, _, exit_code = self.ssh_conn.execute_command("top -bn1 | grep 'Cpu(s)'")
-            if exit_code == 0:
-                match = re.findall(r'(\d+\.\d+)\s*id', stdout)
-                if match:
-                    cpu_idle = float(match[0])
-                    return 100.0 - cpu_idle
-        else:
-            try:
-                cmd_output = os.popen("top -bn1 | grep 'Cpu(s)'").readline()
-                match = re.findall(r'(\d+\.\d+)\s*id', cmd_output)
-                if match:
-                    cpu_idle = float(match[0])
-                    return 100.0 - cpu_idle
-            except Exception:
-                return 0.0
-        return 0.0
+        return self._collect_number("cpu_load")
 
     def get_os_release(self) -> Dict:
         if not getattr(self, "ssh_conn", None):
@@ -212,12 +184,37 @@ class Ordinateur(SQLModel, OrdinateurBase, table=True):
         if self.ssh_conn is None:
             raise RuntimeError("SSH connection not initialized")
 
-        stdout, stderr, exit_code = self.ssh_conn.execute_command("cat /etc/os-release")
+        collector = COLLECTORS["os_release"]
+        stdout, stderr, exit_code = self.ssh_conn.execute_command(collector.command)
         if exit_code != 0:
             return {"success": False, "error": stderr}
-        os_info = {}
-        for line in stdout.strip().split("\n"):
-            if "=" in line:
-                key, value = line.split("=", 1)
-                os_info[key] = value.strip('"')
-        return {"success": True, "os_release": os_info}
+        return {"success": True, "os_release": collector.parse(stdout)}
+
+
+@event.listens_for(Ordinateur, "before_insert")
+@event.listens_for(Ordinateur, "before_update")
+def sync_packed_columns(_mapper, _connection, target: Ordinateur):
+    # les inserts "core" passent par les defaults de colonne ci-dessus
+    target.ip_int = pack_ip(target.ip)
+    target.mac_int = pack_mac(target.mac)
+
+
+class MetricSample(SQLModel, table=True):
+    # échantillons poussés par les agents (POST /ingest), écrits par lots
+    id: Optional[int] = Field(default=None, primary_key=True)
+    ip: str = Field(sa_column=Column(String(15), index=True))
+    metric: str = Field(sa_column=Column(String(50)))
+    value: float
+    ts: float = Field(index=True)
+
+
+class HostFact(SQLModel, table=True):
+    # faits qui changent rarement (os-release, RAM totale), voir code/host_facts.py
+    __table_args__ = (UniqueConstraint("ip", "name"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    ip: str = Field(sa_column=Column(String(15), index=True))
+    name: str = Field(sa_column=Column(String(50)))
+    value: Any = Field(default=None, sa_column=Column(JSON))
+    content_hash: str = Field(sa_column=Column(String(64)))
+    collected_at: float = Field(default=0.0)
@@ -0,0 +1,143 @@
+# code/probes.py
+import os
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+from pydantic import BaseModel
+
+PROBE_MAX_WORKERS = int(os.getenv("PROBE_MAX_WORKERS", "32"))
+
+
+@dataclass(frozen=True)
+class Collector:
+    name: str
+    command: str
+    parse: Callable[[str], Any]
+
+
+COLLECTORS: Dict[str, Collector] = {}
+
+
+def register_collector(name: str, command: str):
+    # décorateur : la fonction décorée est le parseur de la sortie de `command`
+    def decorator(parse: Callable[[str], Any]):
+        COLLECTORS[name] = Collector(name, command, parse)
+        return parse
+    return decorator
+
+
+# ========== Collecteurs par défaut (utilisés aussi par les méthodes d'Ordinateur) ==========
+@register_collector("free_memory", "free -m")
+def parse_free_memory(stdout: str) -> float:
+    return float(stdout.strip().split("\n")[1].split()[3]) / 1024
+
+
+@register_collector("total_memory", "free -m")
+def parse_total_memory(stdout: str) -> float:
+    return float(stdout.strip().split("\n")[1].split()[1]) / 1024
+
+
+@register_collector("cpu_load", "top -bn1 | grep 'Cpu(s)'")
+def parse_cpu_load(stdout: str) -> float:
+    match = re.findall(r'(\d+\.\d+)\s*id', stdout)
+    if not match:
+        raise ValueError("No idle value in top output")
+    return 100.0 - float(match[0])
+
+
+@register_collector("os_release", "cat /etc/os-release")
+def parse_os_release(stdout: str) -> Dict[str, str]:
+    os_info = {}
+    for line in stdout.strip().split("\n"):
+        if "=" in line:
+            key, value = line.split("=", 1)
+            os_info[key] = value.strip('"')
+    return os_info
+
+
+@register_collector("hostname", "hostname")
+def parse_hostname(stdout: str) -> str:
+    return stdout.strip()
+
+
+@register_collector("uptime", "cat /proc/uptime")
+def parse_uptime(stdout: str) -> float:
+    return float(stdout.split()[0])
+
+
+# ========== Moteur ==========
+class ProbeRequest(BaseModel):
+    hosts: List[str]
+    collectors: List[str]
+
+
+def _blocks(names: List[str]) -> Dict[str, str]:
+    # collecteur -> bloc du script : une commande partagée (free -m pour free_memory
+    # et total_memory) ne tourne qu'une fois, sous le nom du premier collecteur
+    first: Dict[str, str] = {}
+    return {name: first.setdefault(COLLECTORS[name].command, name) for name in names}
+
+
+def compile_script(names: List[str], marker: str) -> str:
+    # un seul script distant : chaque sortie est encadrée par des marqueurs
+    parts = []
+    for name in dict.fromkeys(_blocks(names).values()):
+        parts.append(
+            f"echo '{marker}:{name}:begin'; "
+            f"( {COLLECTORS[name].command} ) 2>/dev/null; "
+            f"echo \"{marker}:{name}:end:$?\""
+        )
+    return "; ".join(parts)
+
+
+def parse_script_output(stdout: str, names: List[str], marker: str) -> Dict[str, Dict]:
+    outputs: Dict[str, List[str]] = {}
+    exit_codes: Dict[str, int] = {}
+    current = None
+    for line in stdout.split("\n"):
+        if line.startswith(marker + ":"):
+            _, name, kind, *rest = line.split(":")
+            if kind == "begin":
+                current = name
+                outputs[name] = []
+            else:
+                exit_codes[name] = int(rest[0]) if rest and rest[0].isdigit() else -1
+                current = None
+        elif current is not None:
+            outputs[current].append(line)
+
+    results = {}
+    for name, block in _blocks(names).items():
+        if block not in outputs:
+            results[name] = {"success": False, "error": "No output"}
+            continue
+        if exit_codes.get(block, -1) != 0:
+            results[name] = {"success": False, "error": f"Exit code {exit_codes.get(block, -1)}"}
+            continue
+        try:
+            value = COLLECTORS[name].parse("\n".join(outputs[block]))
+            results[name] = {"success": True, "value": value}
+        except Exception as e:
+            results[name] = {"success": False, "error": f"Parse error: {e}"}
+    return results
+
+
+def probe_host(ssh_conn, names: List[str]) -> Dict:
+    marker = "@@probe-" + uuid.uuid4().hex[:8]
+    stdout, stderr, exit_code = ssh_conn.execute_command(compile_script(names, marker))
+    if exit_code == -1 and not stdout:
+        return {"success": False, "error": stderr}
+    return {"success": True, "metrics": parse_script_output(stdout, names, marker)}
+
+
+def probe_hosts(targets: Dict[str, Any], names: List[str]) -> Dict[str, Dict]:
+    # targets : ip -> SSHConnection ; un aller-retour par hôte, hôtes en parallèle
+    if not targets:
+        return {}
+    workers = min(PROBE_MAX_WORKERS, len(targets))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {ip: pool.submit(probe_host, conn, names) for ip, conn in targets.items()}
+        return {ip: f.result() for ip, f in futures.items()}
@@ -0,0 +1,274 @@
+# code/scheduler.py
+import os
+import time
+import heapq
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+POLL_ENABLED = os.getenv("POLL_ENABLED", "0") == "1"
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "60"))
+POLL_MIN_INTERVAL = float(os.getenv("POLL_MIN_INTERVAL", "15"))
+POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", "600"))
+POLL_RATE = float(os.getenv("POLL_RATE", "10"))  # sondes / seconde pour tout le parc
+POLL_WORKERS = int(os.getenv("POLL_WORKERS", "8"))
+
+# variation (points de CPU, ou % de mémoire libre) entre deux mesures
+VOLATILE_DELTA = 10.0
+STABLE_DELTA = 2.0
+JITTER = 0.1  # ±10 % sur chaque intervalle
+BUDGET_WINDOW = 60.0
+
+
+class HostSchedule:
+    __slots__ = ("ip", "interval", "next_due", "last_cpu", "last_mem",
+                 "failures", "reachable", "version", "in_flight")
+
+    def __init__(self, ip: str, interval: float, reachable: bool):
+        self.ip = ip
+        self.interval = interval
+        self.next_due = 0.0
+        self.last_cpu: Optional[float] = None
+        self.last_mem: Optional[float] = None
+        self.failures = 0 if reachable else 1
+        self.reachable = reachable
+        self.version = 0
+        self.in_flight = False
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated: Optional[float] = None
+
+    def _refill(self, now: float):
+        if self.updated is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+
+class PollScheduler:
+    """Planifie les sondes : étalement avec jitter, intervalle adaptatif
+    par hôte, backoff sur les hôtes injoignables, budget global de sondes/s.
+
+    collect(ip) renvoie un dict de métriques (cpu_load, free_memory, ...)
+    ou None si l'hôte n'a pas répondu."""
+
+    def __init__(self, collect: Callable[[str], Optional[Dict]],
+                 hosts_provider: Optional[Callable[[], Iterable[Tuple[str, bool]]]] = None,
+                 interval: float = POLL_INTERVAL, min_interval: float = POLL_MIN_INTERVAL,
+                 max_interval: float = POLL_MAX_INTERVAL, rate: float = POLL_RATE,
+                 workers: int = POLL_WORKERS, clock: Callable[[], float] = time.monotonic,
+                 rng: Optional[random.Random] = None):
+        self.collect = collect
+        self.hosts_provider = hosts_provider
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.workers = workers
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.bucket = TokenBucket(rate)
+        self.hosts: Dict[str, HostSchedule] = {}
+        self._heap: List[Tuple[float, int, str, int]] = []  # (échéance, seq, ip, version)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._dispatched: deque = deque()
+        self._lag_ewma = 0.0
+        self._max_lag = 0.0
+        self._polls = 0
+        self._failures = 0
+        self._in_flight = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ========== Gestion des hôtes ==========
+    def _push(self, host: HostSchedule, due: float):
+        host.version += 1
+        host.next_due = due
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, host.ip, host.version))
+
+    def add_host(self, ip: str, reachable: bool = True, now: Optional[float] = None):
+        now = self.clock() if now is None else now
+        with self._lock:
+            if ip in self.hosts:
+                return
+            host = HostSchedule(ip, self.interval, reachable)
+            if not reachable:
+                host.interval = self._backoff(host)
+            self.hosts[ip] = host
+            # premier passage réparti uniformément sur l'intervalle
+            self._push(host, now + self.rng.uniform(0, host.interval))
+
+    def remove_host(self, ip: str):
+        with self._lock:
+            host = self.hosts.pop(ip, None)
+            if host:
+                host.version += 1  # invalide l'entrée du tas
+
+    def sync(self, hosts: Iterable[Tuple[str, bool]], now: Optional[float] = None):
+        hosts = dict(hosts)
+        for ip in [ip for ip in self.hosts if ip not in hosts]:
+            self.remove_host(ip)
+        for ip, reachable in hosts.items():
+            self.add_host(ip, reachable, now)
+
+    # ========== Planification ==========
+    def _backoff(self, host: HostSchedule) -> float:
+        return min(self.max_interval, self.interval * (2 ** host.failures))
+
+    def _jittered(self, interval: float) -> float:
+        return interval * self.rng.uniform(1 - JITTER, 1 + JITTER)
+
+    def _adapt(self, host: HostSchedule, metrics: Dict) -> float:
+        cpu = metrics.get("cpu_load")
+        mem = metrics.get("free_memory")
+        deltas = []
+        if cpu is not None and host.last_cpu is not None:
+            deltas.append(abs(cpu - host.last_cpu))
+        if mem is not None and host.last_mem:
+            deltas.append(100.0 * abs(mem - host.last_mem) / host.last_mem)
+        host.last_cpu = cpu if cpu is not None else host.last_cpu
+        host.last_mem = mem if mem is not None else host.last_mem
+        if not deltas:
+            return host.interval
+        delta = max(deltas)
+        if delta >= VOLATILE_DELTA:
+            return max(self.min_interval, host.interval / 2)
+        if delta <= STABLE_DELTA:
+            return min(self.max_interval, host.interval * 1.5)
+        return host.interval
+
+    def next_batch(self, now: Optional[float] = None) -> List[str]:
+        # hôtes arrivés à échéance, dans la limite du budget de sondes
+        now = self.clock() if now is None else now
+        batch = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due, _, ip, version = self._heap[0]
+                host = self.hosts.get(ip)
+                if host is None or host.version != version:
+                    heapq.heappop(self._heap)
+                    continue
+                # pas plus de sondes en vol que de workers, ni au-delà du budget
+                if self._in_flight >= self.workers or not self.bucket.take(now):
+                    break
+                heapq.heappop(self._heap)
+                host.in_flight = True
+                self._in_flight += 1
+                lag = now - due
+                self._lag_ewma = 0.9 * self._lag_ewma + 0.1 * lag
+                self._max_lag = max(self._max_lag, lag)
+                self._dispatched.append(now)
+                batch.append(ip)
+        return batch
+
+    def complete(self, ip: str, metrics: Optional[Dict], now: Optional[float] = None):
+        now = self.clock() if now is None else now
+        with self._lock:
+            self._polls += 1
+            self._in_flight -= 1
+            host = self.hosts.get(ip)
+            if host is None:
+                return
+            host.in_flight = False
+            if metrics is None:
+                self._failures += 1
+                host.failures += 1
+                host.reachable = False
+                host.interval = self._backoff(host)
+            else:
+                if not host.reachable:
+                    host.interval = self.interval
+                host.failures = 0
+                host.reachable = True
+                host.interval = self._adapt(host, metrics)
+            self._push(host, now + self._jittered(host.interval))
+
+    def sleep_time(self, now: Optional[float] = None) -> float:
+        now = self.clock() if now is None else now
+        with self._lock:
+            if not self._heap:
+                return 1.0
+            until_due = max(0.0, self._heap[0][0] - now)
+            return min(1.0, max(until_due, self.bucket.wait_time(now)))
+
+    def stats(self, now: Optional[float] = None) -> Dict:
+        now = self.clock() if now is None else now
+        with self._lock:
+            while self._dispatched and now - self._dispatched[0] > BUDGET_WINDOW:
+                self._dispatched.popleft()
+            overdue = [due for due, _, ip, v in self._heap[:1]
+                       if ip in self.hosts and self.hosts[ip].version == v]
+            intervals = [h.interval for h in self.hosts.values()]
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "hosts": len(self.hosts),
+                "in_flight": self._in_flight,
+                "unreachable": sum(1 for h in self.hosts.values() if not h.reachable),
+                "queue_lag_s": round(max(0.0, now - overdue[0]), 3) if overdue else 0.0,
+                "avg_dispatch_lag_s": round(self._lag_ewma, 3),
+                "max_dispatch_lag_s": round(self._max_lag, 3),
+                "rate_budget_per_s": self.bucket.rate,
+                "budget_used_pct": round(
+                    100.0 * len(self._dispatched) / (self.bucket.rate * BUDGET_WINDOW), 2),
+                "polls": self._polls,
+                "failures": self._failures,
+                "avg_interval_s": round(sum(intervals) / len(intervals), 2) if intervals else None,
+            }
+
+    # ========== Boucle ==========
+    def _poll(self, ip: str):
+        try:
+            metrics = self.collect(ip)
+        except Exception:
+            logger.exception("Poll of %s failed", ip)
+            metrics = None
+        self.complete(ip, metrics)
+
+    def _run(self, resync_every: float):
+        last_sync = None
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while not self._stop.is_set():
+                now = self.clock()
+                if self.hosts_provider and (last_sync is None or now - last_sync >= resync_every):
+                    try:
+                        self.sync(self.hosts_provider(), now)
+                    except Exception:
+                        logger.exception("Scheduler host sync failed")
+                    last_sync = now
+                for ip in self.next_batch(now):
+                    pool.submit(self._poll, ip)
+                self._stop.wait(self.sleep_time())
+
+    def start(self, resync_every: float = 30.0):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(resync_every,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
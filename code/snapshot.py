@@ -0,0 +1,135 @@
+# code/snapshot.py
+import os
+import gzip
+import json
+import time
+import zlib
+from typing import IO, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import delete, insert, select
+
+from .models import Ordinateur, HostFact
+
+# Format : NDJSON compressé gzip, une ligne = un objet
+#   {"type": "header", "version": 1, "created_at": ...}
+#   {"type": "ordinateur", ...colonnes}
+#   {"type": "host_fact", ...colonnes}
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "./snapshots")
+SNAPSHOT_VERSION = 1
+SNAPSHOT_BATCH = int(os.getenv("SNAPSHOT_BATCH", "1000"))
+SNAPSHOT_PREFIX = "inventory-"
+SNAPSHOT_SUFFIX = ".ndjson.gz"
+GZIP_MAGIC = b"\x1f\x8b"
+
+TABLES = {
+    "ordinateur": Ordinateur.__table__,
+    "host_fact": HostFact.__table__,
+}
+
+
+def iter_records(engine) -> Iterator[Dict]:
+    yield {"type": "header", "version": SNAPSHOT_VERSION, "created_at": time.time()}
+    with engine.connect() as conn:
+        for kind, table in TABLES.items():
+            # lecture par lots côté curseur, sans objets ORM
+            result = conn.execution_options(yield_per=SNAPSHOT_BATCH).execute(select(table))
+            for row in result.mappings():
+                record = dict(row)
+                if kind == "host_fact":
+                    record.pop("id", None)
+                record["type"] = kind
+                yield record
+
+
+def iter_gzip_chunks(records: Iterator[Dict], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31 = en-tête gzip
+    buffer: List[bytes] = []
+    size = 0
+    for record in records:
+        line = (json.dumps(record, separators=(",", ":"), default=str) + "\n").encode()
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            chunk = compressor.compress(b"".join(buffer))
+            buffer, size = [], 0
+            if chunk:
+                yield chunk
+    yield compressor.compress(b"".join(buffer)) + compressor.flush()
+
+
+def save_snapshot(engine, directory: Optional[str] = None) -> str:
+    directory = directory or SNAPSHOT_DIR
+    os.makedirs(directory, exist_ok=True)
+    name = f"{SNAPSHOT_PREFIX}{time.strftime('%Y%m%dT%H%M%S')}{SNAPSHOT_SUFFIX}"
+    path = os.path.join(directory, name)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        for chunk in iter_gzip_chunks(iter_records(engine)):
+            f.write(chunk)
+    # écriture atomique : un snapshot à moitié écrit n'est jamais "le dernier"
+    os.replace(tmp_path, path)
+    return path
+
+
+def latest_snapshot(directory: Optional[str] = None) -> Optional[str]:
+    directory = directory or SNAPSHOT_DIR
+    if not os.path.isdir(directory):
+        return None
+    names = sorted(
+        n for n in os.listdir(directory)
+        if n.startswith(SNAPSHOT_PREFIX) and n.endswith(SNAPSHOT_SUFFIX)
+    )
+    return os.path.join(directory, names[-1]) if names else None
+
+
+def read_records(fileobj: IO[bytes]) -> Iterator[Dict]:
+    # accepte un flux gzip ou du NDJSON brut ; lecture ligne par ligne
+    head = fileobj.read(2)
+    fileobj.seek(0)
+    stream = gzip.GzipFile(fileobj=fileobj) if head == GZIP_MAGIC else fileobj
+    for number, line in enumerate(stream):
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        if number == 0 and record.get("type") == "header":
+            if record.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported snapshot version: {record.get('version')}")
+            continue
+        yield record
+
+
+def restore_snapshot(engine, records: Iterator[Dict],
+                     on_batch: Optional[Callable[[str, List[Dict]], None]] = None) -> Dict[str, int]:
+    # remplace le contenu des tables ; inserts groupés par lots de SNAPSHOT_BATCH
+    counts = {kind: 0 for kind in TABLES}
+    batches: Dict[str, List[Dict]] = {kind: [] for kind in TABLES}
+
+    def flush(conn, kind):
+        rows = batches[kind]
+        if rows:
+            conn.execute(insert(TABLES[kind]), rows)
+            counts[kind] += len(rows)
+            if on_batch:
+                on_batch(kind, rows)
+            batches[kind] = []
+
+    with engine.begin() as conn:
+        for table in TABLES.values():
+            conn.execute(delete(table))
+        for record in records:
+            kind = record.pop("type", None)
+            if kind not in TABLES:
+                continue
+            batches[kind].append(record)
+            if len(batches[kind]) >= SNAPSHOT_BATCH:
+                flush(conn, kind)
+        for kind in TABLES:
+            flush(conn, kind)
+    return counts
+
+
+def restore_file(engine, path: str,
+                 on_batch: Optional[Callable[[str, List[Dict]], None]] = None) -> Dict[str, int]:
+    with open(path, "rb") as f:
+        return restore_snapshot(engine, read_records(f), on_batch)
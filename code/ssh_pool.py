@@ -0,0 +1,187 @@
+# code/ssh_pool.py
+# Un seul transport SSH par bastion (ProxyJump), partagé par toutes les connexions
+# vers les hôtes situés derrière : chaque connexion est un canal direct-tcpip.
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from .credentials import connect_kwargs, known_hosts
+
+# sessions simultanées par bastion (MaxSessions d'OpenSSH vaut 10 par défaut)
+BASTION_MAX_SESSIONS = int(os.getenv("BASTION_MAX_SESSIONS", "8"))
+BASTION_WAIT_TIMEOUT = float(os.getenv("BASTION_WAIT_TIMEOUT", "30"))
+BASTION_KEEPALIVE = int(os.getenv("BASTION_KEEPALIVE", "30"))
+BASTION_IDLE_TIMEOUT = float(os.getenv("BASTION_IDLE_TIMEOUT", "300"))
+# pas de l'attente d'une session, pour voir une annulation
+WAIT_STEP = 0.5
+
+
+def connect_bastion(jump, timeout: float):
+    # renvoie le SSHClient : il garde le transport ouvert
+    import paramiko  # pylint: disable=import-outside-toplevel
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(known_hosts)
+    client.connect(jump.hostname, port=jump.port, timeout=timeout, **connect_kwargs(jump))
+    client.get_transport().set_keepalive(BASTION_KEEPALIVE)
+    return client
+
+
+class Bastion:
+    """Transport partagé + sémaphore limitant les canaux ouverts en même temps."""
+
+    def __init__(self, key: Tuple, limit: int):
+        self.key = key
+        self.limit = limit
+        self.slots = threading.BoundedSemaphore(limit)
+        self.client = None
+        self._connect_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.channels = 0
+        self.handshakes = 0
+        self.rejected = 0
+        self.last_used = time.monotonic()
+
+    def transport(self, jump, connect: Callable, timeout: float):
+        # une seule poignée de main à la fois, et seulement si le transport est mort
+        with self._connect_lock:
+            transport = self.client.get_transport() if self.client else None
+            if transport is None or not transport.is_active():
+                self._close()
+                self.client = connect(jump, timeout)
+                self.handshakes += 1
+                transport = self.client.get_transport()
+            return transport
+
+    def _close(self):
+        if self.client is not None:
+            try:
+                self.client.close()
+            except Exception:
+                pass
+            self.client = None
+
+    def close(self):
+        with self._connect_lock:
+            self._close()
+
+    def close_if_idle(self, max_idle: float, now: float) -> bool:
+        # sous _stats_lock : aucun tunnel ne peut prendre une session pendant la fermeture
+        with self._stats_lock:
+            if self.client is None or self.active or self.waiting or now - self.last_used <= max_idle:
+                return False
+            self.close()
+            return True
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            transport = self.client.get_transport() if self.client else None
+            return {
+                "connected": bool(transport and transport.is_active()),
+                "active_channels": self.active, "waiting": self.waiting,
+                "max_sessions": self.limit, "channels_opened": self.channels,
+                "handshakes": self.handshakes, "rejected": self.rejected,
+            }
+
+
+class BastionPool:
+
+    def __init__(self, connect: Callable = connect_bastion, limit: int = BASTION_MAX_SESSIONS,
+                 wait_timeout: float = BASTION_WAIT_TIMEOUT):
+        self.connect = connect
+        self.limit = limit
+        self.wait_timeout = wait_timeout
+        self._bastions: Dict[Tuple, Bastion] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(jump) -> Tuple:
+        return (jump.hostname, jump.port, jump.username or "")
+
+    def _get(self, jump) -> Bastion:
+        key = self.key(jump)
+        with self._lock:
+            bastion = self._bastions.get(key)
+            if bastion is None:
+                bastion = self._bastions[key] = Bastion(key, self.limit)
+            return bastion
+
+    @staticmethod
+    def _acquire(bastion: Bastion, wait: float, cancel: Optional[threading.Event]) -> bool:
+        deadline = time.monotonic() + wait
+        while True:
+            left = deadline - time.monotonic()
+            if left <= 0 or (cancel is not None and cancel.is_set()):
+                return False
+            if bastion.slots.acquire(timeout=min(left, WAIT_STEP) if cancel is not None else left):
+                return True
+
+    @contextmanager
+    def tunnel(self, jump, host: str, port: int, timeout: float = 5.0, wait: Optional[float] = None,
+               cancel: Optional[threading.Event] = None) -> Iterator:
+        """Canal direct-tcpip vers host:port via le bastion, à passer en sock= à paramiko.
+
+        wait : attente maximale d'une session libre (wait_timeout par défaut)."""
+        bastion = self._get(jump)
+        with bastion._stats_lock:
+            bastion.waiting += 1
+        acquired = self._acquire(bastion, self.wait_timeout if wait is None else wait, cancel)
+        with bastion._stats_lock:
+            bastion.waiting -= 1
+            if not acquired:
+                bastion.rejected += 1
+            else:
+                bastion.active += 1
+        if not acquired:
+            if cancel is not None and cancel.is_set():
+                raise InterruptedError(f"Cancelled while waiting for bastion {jump.hostname}:{jump.port}")
+            raise TimeoutError(f"No free session on bastion {jump.hostname}:{jump.port}")
+        try:
+            channel = self._open(bastion, jump, host, port, timeout)
+            try:
+                yield channel
+            finally:
+                channel.close()
+        finally:
+            with bastion._stats_lock:
+                bastion.active -= 1
+                bastion.last_used = time.monotonic()
+            bastion.slots.release()
+
+    def _open(self, bastion: Bastion, jump, host: str, port: int, timeout: float):
+        for attempt in (1, 2):
+            transport = bastion.transport(jump, self.connect, timeout)
+            try:
+                channel = transport.open_channel("direct-tcpip", (host, port), ("127.0.0.1", 0),
+                                                 timeout=timeout)
+            except Exception:
+                # transport tombé entre deux usages : on se reconnecte une fois
+                if attempt == 2 or transport.is_active():
+                    raise
+                continue
+            with bastion._stats_lock:
+                bastion.channels += 1
+            return channel
+        raise RuntimeError("unreachable")
+
+    def close_idle(self, max_idle: float = BASTION_IDLE_TIMEOUT) -> int:
+        """Ferme les transports sans canal depuis max_idle secondes ; rouverts au besoin."""
+        now = time.monotonic()
+        with self._lock:
+            bastions = list(self._bastions.values())
+        return sum(1 for bastion in bastions if bastion.close_if_idle(max_idle, now))
+
+    def close(self):
+        with self._lock:
+            bastions = list(self._bastions.values())
+        for bastion in bastions:
+            bastion.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            bastions = list(self._bastions.values())
+        return {f"{b.key[2]}@{b.key[0]}:{b.key[1]}" if b.key[2] else f"{b.key[0]}:{b.key[1]}": b.stats()
+                for b in bastions}
@@ -0,0 +1,51 @@
+# code/startup.py
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class StartupReport:
+    """Durées (ms) de chaque phase de démarrage + état de readiness."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.phases: Dict[str, float] = {}
+        self.ready = False
+        self.error: Optional[str] = None
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.phases[name] = round(seconds * 1000, 3)
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def reset(self):
+        # on garde les phases d'import (mesurées une seule fois par process)
+        with self._lock:
+            self.phases = {k: v for k, v in self.phases.items() if k.startswith("import")}
+            self.ready = False
+            self.error = None
+
+    def mark_ready(self):
+        self.ready = True
+
+    def mark_failed(self, error: str):
+        self.error = error
+        self.ready = False
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            phases = dict(self.phases)
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "phases_ms": phases,
+            "total_ms": round(sum(phases.values()), 3),
+        }
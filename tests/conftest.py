@@ -1,9 +1,22 @@
-from code.main import app
+import os
+import time
+import tempfile
+
+# sondes en mémoire (backend "fake") : aucune attente SSH, ping ou DNS pendant les tests
+os.environ.setdefault("PROBE_BACKEND", "fake")
+# identifiants, known_hosts et spool des jobs des tests hors du dépôt
+_secrets = tempfile.mkdtemp(prefix="r507-ssh-")
+os.environ.setdefault("SSH_CREDENTIALS_FILE", os.path.join(_secrets, "credentials.json"))
+os.environ.setdefault("SSH_KNOWN_HOSTS", os.path.join(_secrets, "known_hosts"))
+os.environ.setdefault("JOB_SPOOL_DIR", os.path.join(_secrets, "spool"))
+
+from code.main import app  # noqa: E402
 from code.models import Ordinateur, ComputerStatus
 from code.db import get_session
 
 import pytest
 from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 
 
@@ -12,6 +25,21 @@ from fastapi.testclient import TestClient
 TEST_DATABASE_URL = "sqlite:///:memory:"
 engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
 
+def memory_engine():
+    # SQLite en mémoire, une seule connexion partagée entre threads, tables créées
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def wait_ready(client, timeout=10.0):
+    # /ready passe à 200 à la fin du warm-up (thread) ; échec net au-delà du délai
+    deadline = time.monotonic() + timeout
+    while client.get("/ready").status_code != 200:
+        assert time.monotonic() < deadline, f"/ready still not 200 after {timeout}s"
+        time.sleep(0.01)
+
+
 @pytest.fixture(scope="function")
 def session():
     SQLModel.metadata.create_all(engine)
@@ -0,0 +1,43 @@
+# tests/unit/test_addresses.py
+import unittest
+from fastapi.testclient import TestClient
+
+from code.main import app
+from code.addresses import cidr_range, mac_prefix_range, pack_ip
+
+
+class TestAddresses(unittest.TestCase):
+
+    def test_cidr_range(self):
+        assert cidr_range("10.4.0.0/16") == (pack_ip("10.4.0.0"), pack_ip("10.4.255.255"))
+        assert cidr_range("10.4.1.7/32") == (pack_ip("10.4.1.7"), pack_ip("10.4.1.7"))
+
+    def test_mac_prefix_range(self):
+        low, high = mac_prefix_range("00:1b:44")
+        assert low == 0x001B44000000
+        assert high == 0x001B44FFFFFF
+        with self.assertRaises(ValueError):
+            mac_prefix_range("001B44")
+
+    def test_filters(self):
+        with TestClient(app) as client:
+            client.get("/clean")
+            hosts = [
+                ("00:1B:44:11:3A:01", "10.4.0.1"),
+                ("00:1B:44:11:3A:02", "10.4.200.9"),
+                ("AA:BB:CC:11:3A:03", "10.4.3.3"),
+                ("00:1B:44:11:3A:04", "10.5.0.1"),
+            ]
+            for mac, ip in hosts:
+                client.post("/add_ordinateur", json={
+                    "mac": mac, "ip": ip, "taille_disque": 256, "os": "Debian", "status": "ON",
+                })
+
+            r = client.get("/ordinateurs", params={"cidr": "10.4.0.0/16"})
+            assert sorted(o["ip"] for o in r.json()) == ["10.4.0.1", "10.4.200.9", "10.4.3.3"]
+
+            r = client.get("/ordinateurs", params={"cidr": "10.4.0.0/16", "oui": "00:1B:44"})
+            assert sorted(o["ip"] for o in r.json()) == ["10.4.0.1", "10.4.200.9"]
+
+            assert client.get("/ordinateurs", params={"cidr": "10.4.0.0/40"}).status_code == 400
+            client.get("/clean")
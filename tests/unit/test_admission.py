@@ -0,0 +1,72 @@
+# tests/unit/test_admission.py
+import asyncio
+import unittest
+from fastapi.testclient import TestClient
+
+from tests.conftest import wait_ready
+from code.main import app
+from code.admission import AdmissionController, RouteClass
+
+
+def controller(capacity=10, max_wait=1.0):
+    return AdmissionController([
+        RouteClass("inventory", [r"^/ordinateurs$"], 10, 10, priority=10),
+        RouteClass("remote", [r"^/memory/[^/]+$"], 1, 1, priority=0),
+    ], capacity=capacity, max_wait=max_wait)
+
+
+class TestAdmission(unittest.TestCase):
+
+    def test_classify(self):
+        c = controller()
+        assert c.classify("/ordinateurs").name == "inventory"
+        assert c.classify("/memory/10.0.0.1").name == "remote"
+        assert c.classify("/fleet/stats") is None
+
+    def test_queue_and_shed(self):
+        async def scenario():
+            c = controller()
+            remote = c.classify("/memory/x")
+            assert await c.acquire(remote)
+            waiting = asyncio.ensure_future(c.acquire(remote))
+            await asyncio.sleep(0)
+            assert remote.queued() == 1
+            assert not await c.acquire(remote)  # file pleine
+            c.release(remote, 0.5)
+            assert await waiting
+            assert remote.stats()["shed"] == 1
+            assert c.retry_after(remote) >= 1
+        asyncio.run(scenario())
+
+    def test_timeout(self):
+        async def scenario():
+            c = controller(max_wait=0.01)
+            remote = c.classify("/memory/x")
+            await c.acquire(remote)
+            assert not await c.acquire(remote)
+            assert remote.timeouts == 1 and remote.queued() == 0
+        asyncio.run(scenario())
+
+    def test_inventory_has_priority(self):
+        async def scenario():
+            c = controller(capacity=1)
+            remote, inventory = c.classify("/memory/x"), c.classify("/ordinateurs")
+            assert await c.acquire(inventory)
+            low = asyncio.ensure_future(c.acquire(remote))
+            await asyncio.sleep(0)
+            high = asyncio.ensure_future(c.acquire(inventory))
+            await asyncio.sleep(0)
+            c.release(inventory, 0.01)
+            assert inventory.active == 1 and remote.active == 0
+            assert await high
+            c.release(inventory, 0.01)
+            assert await low and remote.active == 1
+        asyncio.run(scenario())
+
+    def test_stats_endpoint(self):
+        with TestClient(app) as client:
+            wait_ready(client)
+            client.delete("/delete_ordinateur/10.9.9.9")
+            stats = client.get("/admission/stats").json()
+            assert stats["classes"]["inventory"]["admitted"] >= 1
+            assert stats["classes"]["remote"]["active"] == 0
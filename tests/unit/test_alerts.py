@@ -0,0 +1,120 @@
+# tests/unit/test_alerts.py
+import os
+import json
+import time
+import tempfile
+import threading
+import unittest
+from fastapi.testclient import TestClient
+
+from code.main import app, alert_engine
+from code.alerts import AlertEngine, AlertRule, FileNotifier, Notifier, WebhookNotifier
+
+
+class ListNotifier(Notifier):
+    def __init__(self):
+        self.events = []
+
+    def notify(self, event):
+        self.events.append(event)
+
+
+class TestAlerts(unittest.TestCase):
+
+    def setUp(self):
+        self.notifier = ListNotifier()
+        self.engine = AlertEngine(self.notifier)
+
+    def test_for_seconds(self):
+        self.engine.add_rule(AlertRule(id="cpu", metric="cpu_load", op=">", threshold=90, for_seconds=300))
+        self.engine.observe("10.0.0.1", "cpu_load", 95, ts=0)
+        self.engine.observe("10.0.0.1", "cpu_load", 97, ts=200)
+        assert not self.notifier.events
+        self.engine.observe("10.0.0.1", "cpu_load", 96, ts=300)
+        assert [e["state"] for e in self.notifier.events] == ["firing"]
+        assert self.engine.active_alerts()[0]["since"] == 0
+        self.engine.observe("10.0.0.1", "cpu_load", 20, ts=360)
+        assert [e["state"] for e in self.notifier.events] == ["firing", "resolved"]
+        assert self.engine.active_alerts() == []
+
+    def test_consecutive_resets_on_recovery(self):
+        self.engine.add_rule(AlertRule(metric="free_memory", op="<", threshold=0.5, consecutive=3))
+        for value in (0.4, 0.3, 0.9, 0.4, 0.3):
+            self.engine.observe("10.0.0.1", "free_memory", value)
+        assert not self.notifier.events
+        self.engine.observe("10.0.0.1", "free_memory", 0.2)
+        assert len(self.notifier.events) == 1
+
+    def test_host_scoped_rule(self):
+        self.engine.add_rule(AlertRule(metric="cpu_load", op=">", threshold=50, hosts=["10.0.0.2"]))
+        self.engine.observe("10.0.0.1", "cpu_load", 99)
+        assert not self.notifier.events
+        self.engine.observe("10.0.0.2", "cpu_load", 99)
+        assert self.notifier.events[0]["ip"] == "10.0.0.2"
+
+    def test_remove_rule(self):
+        rule = self.engine.add_rule(AlertRule(metric="cpu_load", op=">", threshold=50))
+        self.engine.observe("10.0.0.1", "cpu_load", 99)
+        assert self.engine.remove_rule(rule.id)
+        assert self.engine.active_alerts() == []
+        # l'alerte active est close chez le destinataire
+        assert [(e["state"], e.get("reason")) for e in self.notifier.events] == [
+            ("firing", None), ("resolved", "rule_removed")]
+
+    def test_forget_host_resolves(self):
+        self.engine.add_rule(AlertRule(metric="cpu_load", op=">", threshold=50))
+        self.engine.observe("10.0.0.1", "cpu_load", 99)
+        self.engine.observe("10.0.0.2", "cpu_load", 10)
+        self.engine.forget_host("10.0.0.1")
+        self.engine.forget_host("10.0.0.2")
+        assert [e["state"] for e in self.notifier.events] == ["firing", "resolved"]
+
+    def test_forget_hosts_and_reset(self):
+        self.engine.add_rule(AlertRule(metric="cpu_load", op=">", threshold=50))
+        for i in range(4):
+            self.engine.observe(f"10.0.0.{i}", "cpu_load", 99)
+        self.engine.forget_hosts({"10.0.0.0", "10.0.0.1"})
+        assert sorted(a["ip"] for a in self.engine.active_alerts()) == ["10.0.0.2", "10.0.0.3"]
+        self.engine.reset()
+        assert self.engine.active_alerts() == []
+        reasons = [e.get("reason") for e in self.notifier.events if e["state"] == "resolved"]
+        assert reasons == ["host_removed"] * 2 + ["hosts_replaced"] * 2
+
+    def test_webhook_single_worker_bounded_queue(self):
+        notifier = WebhookNotifier("http://127.0.0.1:9/alerts", max_queue=2)
+        release, posted = threading.Event(), []
+        notifier._post = lambda event: (release.wait(5), posted.append(event))  # pylint: disable=protected-access
+        notifier.notify({"state": "firing", "ip": "10.0.0.0"})
+        while not notifier.queue.empty():
+            time.sleep(0.01)
+        threads = threading.active_count()
+        for i in range(1, 5):
+            notifier.notify({"state": "firing", "ip": f"10.0.0.{i}"})
+        assert threading.active_count() == threads and notifier.dropped == 2
+        release.set()
+        notifier.queue.join()
+        assert [e["ip"] for e in posted] == ["10.0.0.0", "10.0.0.1", "10.0.0.2"]
+
+    def test_file_notifier(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        engine = AlertEngine(FileNotifier(path))
+        engine.add_rule(AlertRule(metric="cpu_load", op=">", threshold=50))
+        engine.observe("10.0.0.1", "cpu_load", 99)
+        with open(path, encoding="utf-8") as f:
+            assert json.loads(f.readline())["state"] == "firing"
+        os.remove(path)
+
+    def test_rules_endpoints(self):
+        client = TestClient(app)
+        r = client.post("/alerts/rules", json={"metric": "cpu_load", "op": ">", "threshold": 80})
+        rule_id = r.json()["id"]
+        alert_engine.observe("10.0.0.9", "cpu_load", 85)
+        assert client.get("/alerts").json()[0]["rule_id"] == rule_id
+        # base vidée : plus d'alerte pour des hôtes disparus
+        client.get("/clean")
+        assert client.get("/alerts").json() == []
+        alert_engine.observe("10.0.0.9", "cpu_load", 85)
+        assert client.delete(f"/alerts/rules/{rule_id}").status_code == 200
+        assert client.get("/alerts").json() == []
+        assert client.post("/alerts/rules", json={"metric": "x", "op": "!=", "threshold": 1}).status_code == 422
@@ -0,0 +1,53 @@
+# tests/unit/test_backends.py
+import unittest
+
+from code.backends import BACKENDS, FakeBackend, ProbeBackend, get_backend, set_backend
+from code.models import Ordinateur, OrdinateurBase, SSHConnection
+from code.probes import probe_host
+
+
+class TestBackends(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = get_backend()
+        self.fake = set_backend(FakeBackend(unreachable={"10.0.0.99"}))
+        self.addCleanup(set_backend, self.previous)
+
+    def test_registry(self):
+        assert {"ssh", "local", "fake"} <= set(BACKENDS)
+        # la suite tourne avec le backend en mémoire (tests/conftest.py)
+        assert isinstance(self.previous, FakeBackend)
+        # backend incomplet : refusé à l'instanciation, pas au premier appel
+        incomplete = type("Incomplete", (ProbeBackend,), {"execute": lambda self, conn, command: ("", "", 0)})
+        with self.assertRaises(TypeError):
+            incomplete()
+
+    def test_fake_is_deterministic(self):
+        conn = SSHConnection(hostname="10.0.0.1")
+        first = conn.execute_command("free -m")
+        assert first == FakeBackend().execute(conn, "free -m")
+        assert first[2] == 0
+        assert conn.execute_command("nope")[2] == 127
+        assert SSHConnection(hostname="10.0.0.99").execute_command("free -m")[2] == -1
+
+    def test_model_helpers_use_backend(self):
+        o = Ordinateur(mac="AA:BB:CC:DD:EE:01", ip="10.0.0.1", taille_disque=1, os="x", status="ON",
+                       ssh_conn_json={"hostname": "10.0.0.1"})
+        assert 0 < o.get_free_memory() < o.get_max_memory()
+        assert 0 <= o.get_cpu_load() <= 100
+        assert o.get_os_release()["success"]
+        self.fake.set_output("10.0.0.1", "cat /etc/os-release", "", "denied", 1)
+        assert o.get_os_release() == {"success": False, "error": "denied"}
+
+    def test_validation_without_network(self):
+        o = OrdinateurBase(mac="aa:bb:cc:dd:ee:01", ip="10.0.0.1", taille_disque=1, os="x", status="ON")
+        assert o.hostname == "host-10-0-0-1.fake" and o.joignable
+        o = OrdinateurBase(mac="aa:bb:cc:dd:ee:02", ip="10.0.0.99", taille_disque=1, os="x", status="ON")
+        assert o.hostname == "" and not o.joignable
+
+    def test_probe_script(self):
+        result = probe_host(SSHConnection(hostname="10.0.0.2"), ["free_memory", "cpu_load", "hostname"])
+        metrics = result["metrics"]
+        assert all(m["success"] for m in metrics.values()), metrics
+        assert metrics["hostname"]["value"] == "host-10-0-0-2"
+        assert self.fake.calls == 1
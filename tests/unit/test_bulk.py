@@ -0,0 +1,76 @@
+# tests/unit/test_bulk.py
+import unittest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from tests.conftest import memory_engine, wait_ready
+from code.main import app
+from code.host_facts import HostFactsCache
+from code.models import HostFact
+from code.bulk import bulk_delete, bulk_update, update_host, upsert_hosts
+
+HOST = {"mac": "aa:00:00:00:00:01", "ip": "10.8.0.1", "taille_disque": 128, "os": "Debian", "status": "ON"}
+
+
+class TestBulk(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = memory_engine()
+
+    def test_upsert_by_mac_and_ip(self):
+        rows = upsert_hosts(self.engine, [HOST, dict(HOST, mac="AA:00:00:00:00:02", ip="10.8.0.2")])
+        assert len(rows) == 2
+        # même MAC, nouvelle IP : mise à jour de la ligne existante
+        rows = upsert_hosts(self.engine, [dict(HOST, ip="10.8.0.9", os="Alpine")])
+        assert rows[0]["ip"] == "10.8.0.9" and rows[0]["os"] == "Alpine"
+        assert rows[0]["ip_int"] == (10 << 24) + (8 << 16) + 9
+        rows = upsert_hosts(self.engine, [dict(HOST, mac="AA:00:00:00:00:03", ip="10.8.0.2")], key="ip")
+        assert rows[0]["mac"] == "AA:00:00:00:00:03"
+        with self.assertRaises(ValueError):
+            upsert_hosts(self.engine, [dict(HOST, mac="nope")])
+
+    def test_update_host(self):
+        upsert_hosts(self.engine, [HOST])
+        assert update_host(self.engine, dict(HOST, ram=4.0))["ram"] == 4.0
+        assert update_host(self.engine, dict(HOST, ip="10.8.0.200")) is None
+
+    def test_bulk_update_and_delete(self):
+        upsert_hosts(self.engine, [dict(HOST, mac=f"AA:00:00:00:01:{i:02X}", ip=f"10.8.1.{i}")
+                                   for i in range(10)])
+        rows = bulk_update(self.engine, [{"ip": f"10.8.1.{i}", "status": "OFF"} for i in range(5)]
+                           + [{"mac": "aa:00:00:00:01:09", "os": "Windows"}])
+        assert len(rows) == 6
+        assert sum(1 for r in rows if r["status"] == "OFF") == 5
+        with self.assertRaises(ValueError):
+            bulk_update(self.engine, [{"ip": "10.8.1.1", "id": 3}])
+        deleted = bulk_delete(self.engine, ips=["10.8.1.0", "10.8.1.1"], macs=["AA:00:00:00:01:09"])
+        assert sorted(row.ip for row in deleted) == ["10.8.1.0", "10.8.1.1", "10.8.1.9"]
+
+    def test_delete_drops_facts_in_one_transaction(self):
+        upsert_hosts(self.engine, [dict(HOST, mac=f"AA:00:00:00:03:{i:02X}", ip=f"10.8.3.{i}") for i in range(3)])
+        facts = HostFactsCache(self.engine)
+        for i in range(3):
+            facts.put(f"10.8.3.{i}", "os_release", {"ID": "debian"})
+        commits = []
+        event.listen(self.engine, "commit", lambda conn: commits.append(1))
+        deleted = bulk_delete(self.engine, ips=["10.8.3.0", "10.8.3.1"], host_facts=facts)
+        assert len(deleted) == 2 and len(commits) == 1
+        assert facts.get("10.8.3.0", "os_release") is None and facts.get("10.8.3.2", "os_release")
+        with Session(self.engine) as session:
+            assert [f.ip for f in session.exec(select(HostFact)).all()] == ["10.8.3.2"]
+
+    def test_endpoints(self):
+        with TestClient(app) as client:
+            wait_ready(client)
+            r = client.put("/ordinateurs/upsert", json=[HOST, dict(HOST, mac="AA:00:00:00:00:02", ip="10.8.0.2")])
+            assert r.json()["upserted"] == 2
+            assert app.state.ordinateurs.get("10.8.0.1").os == "Debian"
+            r = client.patch("/ordinateurs/bulk", json=[{"ip": "10.8.0.1", "os": "Arch"}])
+            assert r.json() == {"updated": 1, "unchanged": 0}
+            assert app.state.ordinateurs.get("10.8.0.1").os == "Arch"
+            assert client.patch("/ordinateurs/bulk", json=[{"os": "Arch"}]).status_code == 400
+            r = client.request("DELETE", "/ordinateurs/bulk", json={"ips": ["10.8.0.1", "10.8.0.2"]})
+            assert r.json() == {"deleted": 2}
+            assert "10.8.0.1" not in app.state.ordinateurs
+            assert client.get("/fleet/stats").json()["total"] == 0
@@ -0,0 +1,56 @@
+# tests/unit/test_compact.py
+import unittest
+
+from code.compact import HostCache, HostRecord, pack_ip, unpack_ip, pack_mac, unpack_mac
+from code.models import Ordinateur, SSHConnection, ComputerStatus
+
+ROW = {
+    "id": 7, "mac": "00:1B:44:11:3A:B7", "ip": "10.4.2.1", "hostname": "pc-7",
+    "taille_disque": 512, "os": "Debian 12", "status": "RELOADING", "ram": 8.0,
+    "joignable": True, "ssh_conn_json": {"hostname": "10.4.2.1", "username": "user"},
+}
+
+
+class TestCompact(unittest.TestCase):
+
+    def test_pack_roundtrip(self):
+        assert unpack_ip(pack_ip("10.4.2.1")) == "10.4.2.1"
+        assert pack_ip("0.0.1.1") == 257
+        assert unpack_mac(pack_mac("00:1b:44:11:3a:b7")) == "00:1B:44:11:3A:B7"
+
+    def test_record_has_no_dict(self):
+        record = HostRecord.from_row(ROW)
+        assert not hasattr(record, "__dict__")
+        assert record.status_code == 2
+        assert record.status == ComputerStatus.RELOADING
+
+    def test_cache_list_interface(self):
+        cache = HostCache()
+        cache.append(Ordinateur(**ROW))
+        cache.append(dict(ROW, ip="10.4.2.2", mac="00:1B:44:11:3A:B8"))
+        cache.upsert(dict(ROW, os="Debian 13"))
+        assert len(cache) == 2
+        assert cache.get("10.4.2.1").os == "Debian 13"
+        assert [o.ip for o in cache] == ["10.4.2.1", "10.4.2.2"]
+        assert cache.remove("10.4.2.2")
+        assert "10.4.2.2" not in cache
+        assert cache.get_by_mac("00:1b:44:11:3a:b8") is None
+        assert cache.get_by_mac("00:1b:44:11:3a:b7").ip == "10.4.2.1"
+        cache.upsert(dict(ROW, ip="10.4.2.9"))  # même MAC, nouvelle IP
+        assert "10.4.2.1" not in cache and len(cache) == 1
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_ssh_setter(self):
+        record = HostRecord.from_row(dict(ROW, ssh_conn_json=None))
+        assert record.ssh_conn is None
+        record.ssh_conn = SSHConnection(hostname="10.4.2.1", port=2222)
+        assert record.ssh_conn.port == 2222
+
+    def test_content_hash(self):
+        record = HostRecord.from_row(ROW)
+        assert record.content_hash() == HostRecord.from_row(dict(ROW, id=8)).content_hash()
+        # hash(-1) == hash(-2) en CPython : l'empreinte ne doit pas en dépendre
+        low = HostRecord.from_row(dict(ROW, taille_disque=-1, ram=-1.0))
+        assert low.content_hash() != HostRecord.from_row(dict(ROW, taille_disque=-2, ram=-1.0)).content_hash()
+        assert low.content_hash() != HostRecord.from_row(dict(ROW, taille_disque=-1, ram=-2.0)).content_hash()
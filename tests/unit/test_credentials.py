@@ -0,0 +1,127 @@
+# tests/unit/test_credentials.py
+import os
+import json
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import paramiko
+from fastapi.testclient import TestClient
+
+from code.main import app, engine
+from code.bulk import select_by
+from code.credentials import (
+    CredentialIn, CredentialStore, KnownHosts, connect_kwargs, credential_store, externalize,
+)
+from code.models import SSHConnection
+
+
+class TestCredentialStore(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "credentials.json")
+        self.key_path = os.path.join(self.dir, "id_rsa")
+        paramiko.RSAKey.generate(1024).write_private_key_file(self.key_path, password="pass")
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"lab": {"username": "admin", "key_filename": self.key_path, "passphrase": "pass"},
+                       "pw": {"username": "root", "password": "secret"}}, f)
+        self.store = CredentialStore(self.path)
+
+    def test_key_parsed_once(self):
+        first = self.store.get("lab")
+        assert first.username == "admin" and isinstance(first.pkey, paramiko.PKey)
+        assert self.store.get("lab").pkey is first.pkey
+        assert self.store.stats()["key_parses"] == 1
+        # fichier de clé remplacé : relu au prochain usage
+        paramiko.RSAKey.generate(1024).write_private_key_file(self.key_path, password="pass")
+        os.utime(self.key_path, ns=(1, 1))
+        assert self.store.get("lab").pkey is not first.pkey
+        with self.assertRaises(KeyError):
+            self.store.get("nope")
+
+    def test_file_reloaded_on_change(self):
+        assert self.store.get("pw").password == "secret"
+        self.store.put("new", CredentialIn(username="u", password="p"))
+        other = CredentialStore(self.path)
+        assert "new" in other and other.get("new").password == "p"
+        assert os.stat(self.path).st_mode & 0o077 == 0
+
+    def test_externalize(self):
+        conn = SSHConnection(hostname="10.0.0.1", username="root", password="secret",
+                             jump_host={"hostname": "10.0.0.254", "password": "jump"})
+        moved = externalize(conn, self.store)
+        assert moved.password == "" and moved.credential_id == "pw"
+        assert moved.jump_host.password == "" and moved.jump_host.credential_id.startswith("cred-")
+        assert "secret" not in json.dumps(moved.model_dump())
+        assert connect_kwargs(moved, self.store)["password"] == "secret"
+        assert connect_kwargs(moved.jump_host, self.store)["password"] == "jump"
+        # identifiant + secret en clair : le secret est retiré, l'identifiant gardé
+        mixed = externalize(SSHConnection(hostname="h", credential_id="pw", password="hunter2",
+                                          key_filename="/tmp/id"), self.store)
+        assert mixed.credential_id == "pw" and mixed.password == "" and mixed.key_filename == ""
+        # même secret : même identifiant
+        assert externalize(conn, self.store).jump_host.credential_id == moved.jump_host.credential_id
+
+    def test_encrypted_inline_key(self):
+        conn = SSHConnection(hostname="10.0.0.1", username="admin", key_filename=self.key_path, password="pass")
+        assert isinstance(connect_kwargs(conn, self.store)["pkey"], paramiko.PKey)
+        moved = externalize(conn, self.store)
+        assert moved.key_filename == "" and moved.password == ""
+        assert isinstance(connect_kwargs(moved, self.store)["pkey"], paramiko.PKey)
+
+    def test_known_hosts(self):
+        path = os.path.join(self.dir, "known_hosts")
+        hosts = KnownHosts(path)
+        assert hosts.check("10.0.0.1", "ssh-ed25519", "AAAA1")
+        assert hosts.check("10.0.0.1", "ssh-ed25519", "AAAA1")
+        assert not hosts.check("10.0.0.1", "ssh-ed25519", "AAAA2")
+        assert not hosts.check("10.0.0.1", "ssh-rsa", "AAAA3")
+        assert hosts.stats() == {"policy": "tofu", "hosts": 1, "verified": 1, "added": 1, "rejected": 2}
+        strict = KnownHosts(path, policy="strict")
+        assert strict.check("10.0.0.1", "ssh-ed25519", "AAAA1")
+        assert not strict.check("[10.0.0.2]:2222", "ssh-ed25519", "AAAA1")
+        assert hosts.forget("10.0.0.1") and not hosts.forget("10.0.0.1")
+        assert not strict.check("10.0.0.1", "ssh-ed25519", "AAAA1")
+
+    def test_forget_keeps_other_lines(self):
+        path = os.path.join(self.dir, "known_hosts")
+        other = ["# parc labo\n", "|1|c2FsdA==|aGFzaA== ssh-ed25519 AAAAH\n",
+                 "@cert-authority *.lab ssh-ed25519 AAAAC\n", "10.0.0.2 ssh-rsa AAAAR\n"]
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(other[:2] + ["10.0.0.1,web1 ssh-ed25519 AAAA1\n"] + other[2:])
+        hosts = KnownHosts(path)
+        assert hosts.forget("10.0.0.1")
+        with open(path, encoding="utf-8") as f:
+            assert f.readlines() == other[:2] + ["web1 ssh-ed25519 AAAA1\n"] + other[2:]
+        assert hosts.check("web1", "ssh-ed25519", "AAAA1") and hosts.check("10.0.0.1", "ssh-rsa", "AAAAN")
+
+    def test_find_or_add_concurrent(self):
+        credential = CredentialIn(username="u", password="race")
+        with ThreadPoolExecutor(8) as pool:
+            ids = set(pool.map(lambda _: self.store.find_or_add(credential), range(16)))
+        assert len(ids) == 1
+
+    def test_endpoints_hide_secrets(self):
+        with TestClient(app) as client:
+            response = client.put("/credentials/test-api", json={"username": "u", "password": "hunter2"})
+            assert response.status_code == 200
+            assert response.json() == {"id": "test-api", "username": "u", "password": True, "key_filename": ""}
+            assert "hunter2" not in client.get("/credentials").text
+            assert client.put("/credentials/bad", json={"key_filename": "/nope"}).status_code == 400
+        assert credential_store.get("test-api").password == "hunter2"
+
+    def test_bulk_and_edit_externalize(self):
+        host = {"mac": "AA:BB:CC:DD:E4:01", "ip": "10.4.4.1", "taille_disque": 1, "os": "x", "status": "ON"}
+        with TestClient(app) as client:
+            client.put("/ordinateurs/upsert", json=[dict(host, ssh_conn={"username": "a", "password": "s3cret-up"})])
+            client.patch("/ordinateurs/bulk", json=[{"ip": "10.4.4.1", "ssh_conn": {"password": "s3cret-patch"}}])
+            stored = app.state.ordinateurs.get("10.4.4.1").ssh_conn
+            assert stored.password == "" and credential_store.get(stored.credential_id).password == "s3cret-patch"
+            client.put("/edit_ordinateur", json=dict(host, ssh_conn_json={"hostname": "10.4.4.1",
+                                                                         "password": "s3cret-edit"}))
+            stored = app.state.ordinateurs.get("10.4.4.1").ssh_conn
+            assert credential_store.get(stored.credential_id).password == "s3cret-edit"
+            with engine.connect() as conn:
+                assert "s3cret" not in json.dumps(select_by(conn, "ip", ["10.4.4.1"])[0]["ssh_conn_json"])
+            client.get("/clean")
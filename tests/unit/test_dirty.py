@@ -0,0 +1,72 @@
+# tests/unit/test_dirty.py
+import unittest
+from fastapi.testclient import TestClient
+
+
+from tests.conftest import memory_engine, wait_ready
+from code.main import app, listing_cache, write_stats
+from code.bulk import prepare_patches, prepare_upserts, upsert_hosts
+from code.dirty import WriteStats, split_patches, split_rows
+
+HOST = {"mac": "AA:00:00:00:03:01", "ip": "10.3.0.1", "hostname": "pc", "taille_disque": 64,
+        "os": "Debian", "status": "ON", "ram": 8.0, "joignable": True,
+        "ssh_conn": {"username": "u", "hostname": "10.3.0.1"}}
+
+
+class TestDirty(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = memory_engine()
+        upsert_hosts(self.engine, [HOST])
+
+    def test_split_rows(self):
+        same = dict(HOST, ssh_conn={"hostname": "10.3.0.1", "username": "u"})  # ordre des clés
+        rows = prepare_upserts([same, dict(HOST, mac="AA:00:00:00:03:02", ip="10.3.0.2")])
+        changed, unchanged, _ = split_rows(self.engine, rows, "mac")
+        assert unchanged == 1 and [r["ip"] for r in changed] == ["10.3.0.2"]
+        changed, unchanged, _ = split_rows(self.engine, prepare_upserts([dict(HOST, ram=16)]), "ip")
+        assert len(changed) == 1 and unchanged == 0
+
+    def test_split_patches(self):
+        patches = prepare_patches([{"ip": "10.3.0.1", "os": "Debian", "status": "ON"},
+                                   {"mac": "aa:00:00:00:03:01", "joignable": False},
+                                   {"ip": "10.3.0.9", "os": "Debian"}])
+        changed, unchanged, _ = split_patches(self.engine, patches)
+        assert unchanged == 1
+        assert [p[1] for p in changed] == ["AA:00:00:00:03:01", "10.3.0.9"]
+
+    def test_write_stats(self):
+        stats = WriteStats()
+        stats.record("edit", 1, 3)
+        stats.record("bulk", 0, 0)
+        assert stats.as_dict()["edit"]["suppression_ratio"] == 0.75
+        assert stats.as_dict()["bulk"]["suppression_ratio"] == 0.0
+        assert stats.as_dict()["total"] == {"written": 1, "suppressed": 3, "suppression_ratio": 0.75}
+
+    def test_identical_edit_is_not_written(self):
+        with TestClient(app) as client:
+            wait_ready(client)
+            write_stats.reset()
+            client.put("/ordinateurs/upsert", json=[HOST])
+            assert client.put("/ordinateurs/upsert", json=[HOST]).json()["unchanged"] == 1
+            edit = {k: v for k, v in HOST.items() if k != "ssh_conn"}
+            # la validation complète ssh_conn_json (port, mot de passe...) : première écriture
+            assert client.put("/edit_ordinateur", json=edit).json()["changed"] is True
+            client.get("/ordinateurs")  # remplit le cache de la liste
+            invalidations = listing_cache.stats()["invalidations"]
+
+            assert client.put("/edit_ordinateur", json=edit).json()["changed"] is False
+            assert listing_cache.stats()["invalidations"] == invalidations
+            assert client.put("/edit_ordinateur", json=dict(edit, os="Alpine")).json()["changed"] is True
+            assert listing_cache.stats()["invalidations"] > invalidations
+
+            stats = client.get("/writes/stats").json()
+            assert stats["edit"] == {"written": 2, "suppressed": 1, "suppression_ratio": 0.3333}
+
+            # SSH changé dans le cache seulement : l'édition doit quand même atteindre la base
+            client.post("/ssh/10.3.0.1", json={"hostname": "10.3.0.1", "username": "admin"})
+            ssh = {"hostname": "10.3.0.1", "username": "admin"}
+            assert client.put("/edit_ordinateur", json=dict(edit, os="Alpine", ssh_conn_json=ssh)).json()["changed"]
+            assert client.put("/edit_ordinateur", json=dict(edit, ip="10.3.0.99")).status_code == 404
+            assert stats["upsert"]["suppressed"] == 1
+            client.get("/clean")
@@ -0,0 +1,71 @@
+# tests/unit/test_discovery.py
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlmodel import Session, select
+
+from code import discovery
+from tests.conftest import memory_engine
+from code.discovery import DiscoveryJob, read_arp_table, upsert_hosts
+from code.models import Ordinateur
+
+ARP = """IP address       HW type     Flags       HW address            Mask     Device
+10.0.0.1         0x1         0x2         aa:bb:cc:00:00:01     *        eth0
+10.0.0.2         0x1         0x0         00:00:00:00:00:00     *        eth0
+10.0.0.3         0x1         0x2         aa:bb:cc:00:00:03     *        eth0
+"""
+
+
+class TestDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = memory_engine()
+        fd, self.arp_path = tempfile.mkstemp()
+        with os.fdopen(fd, "w") as f:
+            f.write(ARP)
+
+    def tearDown(self):
+        os.remove(self.arp_path)
+
+    def test_read_arp_table_skips_incomplete(self):
+        assert read_arp_table(self.arp_path) == {
+            "10.0.0.1": "AA:BB:CC:00:00:01",
+            "10.0.0.3": "AA:BB:CC:00:00:03",
+        }
+
+    def test_upsert_inserts_then_updates(self):
+        hosts = [{"ip": "10.0.0.1", "mac": "AA:BB:CC:00:00:01"}]
+        assert upsert_hosts(self.engine, hosts) == {"inserted": 1, "updated": 0, "unchanged": 0}
+        hosts = [{"ip": "10.0.0.9", "mac": "AA:BB:CC:00:00:01"}]
+        assert upsert_hosts(self.engine, hosts) == {"inserted": 0, "updated": 1, "unchanged": 0}
+        # nouveau passage sans changement : aucune écriture
+        assert upsert_hosts(self.engine, hosts) == {"inserted": 0, "updated": 0, "unchanged": 1}
+        with Session(self.engine) as session:
+            rows = session.exec(select(Ordinateur)).all()
+        assert [(r.ip, r.joignable) for r in rows] == [("10.0.0.9", True)]
+
+    def test_upsert_collapses_duplicates_in_batch(self):
+        # même MAC sur deux IP (hôte multi-adresses) et même IP vue avec deux MAC
+        hosts = [{"ip": "10.0.0.1", "mac": "AA:BB:CC:00:00:01"}, {"ip": "10.0.0.2", "mac": "AA:BB:CC:00:00:01"},
+                 {"ip": "10.0.0.3", "mac": "AA:BB:CC:00:00:03"}, {"ip": "10.0.0.3", "mac": "AA:BB:CC:00:00:04"}]
+        assert upsert_hosts(self.engine, hosts) == {"inserted": 2, "updated": 0, "unchanged": 0}
+        with Session(self.engine) as session:
+            rows = session.exec(select(Ordinateur).order_by(Ordinateur.ip)).all()
+        assert [(r.ip, r.mac) for r in rows] == [("10.0.0.2", "AA:BB:CC:00:00:01"), ("10.0.0.3", "AA:BB:CC:00:00:04")]
+
+    def test_job_registers_reachable_hosts_with_mac(self):
+        def fake_check(ip, port):
+            return {"ip": ip, "ssh": ip == "10.0.0.1", "reachable": ip in ("10.0.0.1", "10.0.0.2")}
+
+        with mock.patch.object(discovery, "check_host", fake_check), \
+                mock.patch.object(discovery, "ARP_TABLE", self.arp_path):
+            job = DiscoveryJob("10.0.0.0/29")
+            job.run(self.engine)
+
+        state = job.as_dict()
+        assert state["status"] == "done"
+        assert state["scanned"] == state["total"] == 6
+        assert state["found"] == 2
+        assert state["inserted"] == 1  # 10.0.0.2 n'a pas de MAC dans la table ARP
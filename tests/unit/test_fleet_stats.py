@@ -0,0 +1,69 @@
+# tests/unit/test_fleet_stats.py
+import unittest
+from fastapi.testclient import TestClient
+
+from tests.conftest import wait_ready
+from code.main import app, fleet_stats
+from code.fleet_stats import FleetStats
+from code.backends import get_backend
+from code.models import Ordinateur, ComputerStatus
+
+
+def host(ip, mac, os="Debian", status="ON", ram=8.0, joignable=False):
+    return {"mac": mac, "ip": ip, "taille_disque": 256, "os": os, "status": status,
+            "ram": ram, "joignable": joignable}
+
+
+class TestFleetStats(unittest.TestCase):
+
+    def test_cpu_average(self):
+        stats = FleetStats()
+        stats.record_cpu("10.0.0.1", 10.0)
+        stats.record_cpu("10.0.0.2", 30.0)
+        stats.record_cpu("10.0.0.1", 50.0)
+        assert stats.as_dict()["avg_cpu_load"] == 40.0
+        stats.remove(Ordinateur(**host("10.0.0.2", "AA:BB:CC:DD:EE:02")))
+        assert stats.as_dict()["avg_cpu_load"] == 50.0
+
+    def test_incremental_matches_rebuild(self):
+        # la validation de PUT /edit_ordinateur sonde la joignabilité : hôtes hors ligne
+        get_backend().unreachable.update({"10.1.0.2", "10.1.0.3"})
+        self.addCleanup(get_backend().unreachable.difference_update, {"10.1.0.2", "10.1.0.3"})
+        with TestClient(app) as client:
+            wait_ready(client)
+            client.get("/clean")
+            client.post("/add_ordinateur", json=host("10.1.0.1", "AA:BB:CC:DD:EE:01", ram=16.0, joignable=True))
+            client.post("/add_ordinateur", json=host("10.1.0.2", "AA:BB:CC:DD:EE:02", os="Alpine"))
+            client.post("/add_ordinateur", json=host("10.1.0.3", "AA:BB:CC:DD:EE:03", status="OFF"))
+            client.put("/edit_ordinateur", json=host("10.1.0.2", "AA:BB:CC:DD:EE:02", os="Debian", ram=4.0))
+            client.delete("/delete_ordinateur/10.1.0.3")
+
+            incremental = client.get("/fleet/stats").json()
+            assert incremental["total"] == 2
+            assert incremental["by_os"] == {"Debian": 2}
+            assert incremental["by_status"] == {ComputerStatus.ON.value: 2}
+            assert incremental["total_ram"] == 20.0
+            assert incremental["reachable_pct"] == 50.0
+
+            fleet_stats.reset()
+            rebuilt = client.post("/fleet/stats/rebuild").json()
+            assert rebuilt == incremental
+            client.get("/clean")
+
+    def test_bulk_endpoints_stay_incremental(self):
+        with TestClient(app) as client:
+            wait_ready(client)
+            client.get("/clean")
+            client.put("/ordinateurs/upsert", json=[host(f"10.1.1.{i}", f"AA:BB:CC:DD:EF:0{i}") for i in range(4)])
+            client.put("/ordinateurs/upsert", json=[host("10.1.1.0", "AA:BB:CC:DD:EF:00", os="Alpine", ram=2.0)])
+            client.patch("/ordinateurs/bulk", json=[{"ip": "10.1.1.1", "status": "OFF"},
+                                                    {"mac": "AA:BB:CC:DD:EF:02", "joignable": True}])
+            client.request("DELETE", "/ordinateurs/bulk", json={"ips": ["10.1.1.3"]})
+
+            incremental = client.get("/fleet/stats").json()
+            assert incremental["total"] == 3
+            assert incremental["by_os"] == {"Alpine": 1, "Debian": 2}
+            assert incremental["total_ram"] == 18.0
+            fleet_stats.reset()
+            assert client.post("/fleet/stats/rebuild").json() == incremental
+            client.get("/clean")
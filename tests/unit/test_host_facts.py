@@ -0,0 +1,57 @@
+# tests/unit/test_host_facts.py
+import unittest
+from fastapi.testclient import TestClient
+
+from tests.conftest import memory_engine
+from code.main import app, host_facts
+from code.host_facts import HostFactsCache
+
+
+class TestHostFacts(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = memory_engine()
+        self.cache = HostFactsCache(self.engine, ttl=60)
+        self.calls = 0
+
+    def fetch(self):
+        self.calls += 1
+        return {"success": True, "os_release": {"ID": "alpine"}}
+
+    def test_fetch_once_then_cached(self):
+        for _ in range(3):
+            value = self.cache.get_or_fetch("10.0.0.1", "os_release", self.fetch)
+        assert value["os_release"]["ID"] == "alpine"
+        assert self.calls == 1
+
+    def test_expired_entry_is_refreshed(self):
+        self.cache.get_or_fetch("10.0.0.1", "os_release", self.fetch)
+        self.cache.ttl = -1
+        self.cache.get_or_fetch("10.0.0.1", "os_release", self.fetch)
+        assert self.calls == 2
+
+    def test_invalid_value_not_cached(self):
+        self.cache.get_or_fetch("10.0.0.1", "total_memory", lambda: 0.0, is_valid=lambda v: v > 0)
+        assert self.cache.get("10.0.0.1", "total_memory") is None
+
+    def test_persisted_and_reloaded(self):
+        entry = self.cache.put("10.0.0.1", "total_memory", 7.5)
+        other = HostFactsCache(self.engine, ttl=60)
+        assert other.load() == 1
+        assert other.get("10.0.0.1", "total_memory") == entry
+
+    def test_invalidate(self):
+        self.cache.put("10.0.0.1", "total_memory", 7.5)
+        self.cache.put("10.0.0.1", "os_release", {"success": True})
+        assert self.cache.invalidate("10.0.0.1", "total_memory") == 1
+        assert self.cache.get("10.0.0.1", "os_release") is not None
+        assert HostFactsCache(self.engine).load() == 1
+
+    def test_os_release_endpoint_uses_cache(self):
+        with TestClient(app) as client:
+            host_facts.put("10.9.9.9", "os_release", {"success": True, "os_release": {"ID": "debian"}})
+            r = client.get("/os_release/10.9.9.9")
+            assert r.status_code == 200
+            assert r.json()["os_release"]["ID"] == "debian"
+            client.delete("/host_facts/10.9.9.9")
+            assert client.get("/os_release/10.9.9.9").status_code == 404
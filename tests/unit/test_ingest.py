@@ -0,0 +1,123 @@
+# tests/unit/test_ingest.py
+import gzip
+import json
+import asyncio
+import time
+import unittest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from tests.conftest import memory_engine, wait_ready
+from code.main import app, ingest_buffer, ingest_misses
+from code.ingest import BodyTooLarge, IngestBuffer, MissCache, decode_body, parse_samples, read_body
+from code.models import MetricSample
+
+HOSTS = {"AA:BB:CC:DD:EE:01": "10.0.0.1"}
+
+
+def resolve(mac, ip):
+    return HOSTS.get(mac) or (ip if ip in HOSTS.values() else None)
+
+
+class TestIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = memory_engine()
+
+    def test_decode_gzip(self):
+        payload = {"samples": []}
+        body = gzip.compress(json.dumps(payload).encode())
+        assert decode_body(body, "gzip") == payload
+        with self.assertRaises(ValueError):
+            decode_body(b"[1, 2]", None)
+
+    def test_parse_samples(self):
+        rows, rejected = parse_samples({
+            "mac": "AA:BB:CC:DD:EE:01",
+            "samples": [
+                {"metric": "cpu_load", "value": 12.5, "ts": 1.0},
+                {"metric": "cpu_load", "value": "high"},
+                {"metric": "free_memory", "value": 1.5, "mac": "00:00:00:00:00:09"},
+                {"metric": "free_memory", "value": 2.0, "mac": None, "ip": "10.0.0.1"},
+            ],
+        }, resolve, now=5.0)
+        assert rows == [
+            {"ip": "10.0.0.1", "metric": "cpu_load", "value": 12.5, "ts": 1.0},
+            {"ip": "10.0.0.1", "metric": "free_memory", "value": 2.0, "ts": 5.0},
+        ]
+        assert rejected == 2
+
+    def test_buffer_backpressure_and_flush(self):
+        buffer = IngestBuffer(self.engine, capacity=3, flush_size=2)
+        row = {"ip": "10.0.0.1", "metric": "cpu_load", "value": 1.0, "ts": 1.0}
+        assert buffer.offer([row, row])
+        assert not buffer.offer([row, row])
+        assert buffer.flush() == 2
+        assert buffer.offer([row, row, row])
+        buffer.flush()
+        with Session(self.engine) as session:
+            assert len(session.exec(select(MetricSample)).all()) == 5
+        assert buffer.stats()["rejected_batches"] == 1
+
+    def test_endpoint(self):
+        with TestClient(app) as client:
+            wait_ready(client)
+            client.post("/add_ordinateur", json={
+                "mac": "AA:BB:CC:DD:EE:71", "ip": "10.7.0.1", "taille_disque": 256,
+                "os": "Debian", "status": "ON",
+            })
+            body = gzip.compress(json.dumps({
+                "mac": "aa:bb:cc:dd:ee:71",
+                "samples": [{"metric": "cpu_load", "value": 42.0}] * 10,
+            }).encode())
+            r = client.post("/ingest", content=body, headers={"Content-Encoding": "gzip"})
+            assert r.json() == {"accepted": 10, "rejected": 0}
+
+            capacity = ingest_buffer.capacity
+            ingest_buffer.capacity = 0
+            r = client.post("/ingest", json={"ip": "10.7.0.1", "samples": [{"metric": "x", "value": 1}]})
+            ingest_buffer.capacity = capacity
+            assert r.status_code == 429
+            assert "Retry-After" in r.headers
+            assert client.post("/ingest", content=b"{").status_code == 400
+            client.get("/clean")
+
+    def test_miss_cache(self):
+        misses = MissCache(ttl=0.05)
+        misses.add(("AA:00:00:00:00:01", None))
+        assert ("AA:00:00:00:00:01", None) in misses
+        time.sleep(0.06)
+        assert ("AA:00:00:00:00:01", None) not in misses
+
+    def test_read_body_limit(self):
+        class Request:
+            def __init__(self, chunks, headers=None):
+                self.chunks, self.headers, self.read = chunks, headers or {}, 0
+
+            async def stream(self):
+                for chunk in self.chunks:
+                    self.read += 1
+                    yield chunk
+
+        request = Request([b"x" * 40] * 10)
+        with self.assertRaises(BodyTooLarge):
+            asyncio.run(read_body(request, limit=64))
+        assert request.read == 2  # arrêt dès la limite dépassée, pas tout le corps
+        with self.assertRaises(BodyTooLarge):
+            asyncio.run(read_body(Request([], {"content-length": "65"}), limit=64))
+        assert asyncio.run(read_body(Request([b"ab", b"cd"]), limit=64)) == b"abcd"
+
+    def test_unknown_agent(self):
+        with TestClient(app) as client:
+            wait_ready(client)
+            unknown = {"mac": "aa:bb:cc:dd:ee:72", "samples": [{"metric": "cpu_load", "value": 1.0}]}
+            assert client.post("/ingest", json=unknown).json() == {"accepted": 0, "rejected": 1}
+            assert ("AA:BB:CC:DD:EE:72", None) in ingest_misses
+            # l'hôte est enregistré : toute écriture sur la table oublie les absents
+            client.post("/add_ordinateur", json={
+                "mac": "AA:BB:CC:DD:EE:72", "ip": "10.7.0.2", "taille_disque": 1, "os": "x", "status": "ON",
+            })
+            assert len(ingest_misses) == 0
+            assert client.post("/ingest", json=unknown).json() == {"accepted": 1, "rejected": 0}
+
+            client.get("/clean")
@@ -0,0 +1,250 @@
+# tests/unit/test_jobs.py
+import json
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.testclient import TestClient
+
+from code.main import app
+from code.backends import FakeBackend, SSHBackend, get_backend, set_backend
+from code.jobs import FleetJob, JobManager, Spool
+from code.models import SSHConnection
+
+
+def wait_done(job, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while job.finished_at is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.finished_at is not None
+
+
+class FakeChannel:
+    # sortie livrée en plusieurs blocs, comme un canal paramiko
+
+    def __init__(self, chunks, exit_code=0, endless=False):
+        self.chunks = list(chunks)
+        self.exit_code = exit_code
+        self.endless = endless
+
+    def exec_command(self, command):
+        pass
+
+    def recv_ready(self):
+        return bool(self.chunks) and self.chunks[0][0] == "stdout"
+
+    def recv_stderr_ready(self):
+        return bool(self.chunks) and self.chunks[0][0] == "stderr"
+
+    def recv(self, size):  # pylint: disable=unused-argument
+        return self._pop("stdout")
+
+    def recv_stderr(self, size):  # pylint: disable=unused-argument
+        return self._pop("stderr")
+
+    def _pop(self, stream):
+        # b"" = EOF du flux, comme paramiko
+        for i, (kind, data) in enumerate(self.chunks):
+            if kind == stream:
+                del self.chunks[i]
+                return data
+        return b""
+
+    def settimeout(self, timeout):
+        pass
+
+    def exit_status_ready(self):
+        return not self.chunks and not self.endless
+
+    def recv_exit_status(self):
+        return self.exit_code
+
+    def fileno(self):
+        raise OSError("no fd")
+
+
+class TestJobs(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = get_backend()
+        self.fake = set_backend(FakeBackend(unreachable={"10.6.0.9"}))
+        self.addCleanup(set_backend, self.previous)
+        self.spool = tempfile.mkdtemp()
+
+    def test_spool_is_capped(self):
+        spool = Spool(f"{self.spool}/out", limit=10)
+        spool.write(b"hello ")
+        spool.write(b"world!!")
+        spool.write(b"more")
+        assert spool.size == 10 and spool.truncated
+        assert spool.read(0, 100) == b"hello worl" and spool.read(6, 2) == b"wo"
+        spool.close()
+
+    def test_job_runs_and_pages_output(self):
+        for i in (1, 2):
+            self.fake.set_output(f"10.6.0.{i}", "grep ERROR /var/log/syslog", "line1\nline2\n" * i, "", i - 1)
+        manager = JobManager(self.spool, workers=2)
+        job = manager.start("grep ERROR /var/log/syslog", {
+            "10.6.0.1": SSHConnection(hostname="10.6.0.1"),
+            "10.6.0.2": SSHConnection(hostname="10.6.0.2"),
+            "10.6.0.9": SSHConnection(hostname="10.6.0.9"),
+            "10.6.0.3": "SSH not configured",
+        })
+        wait_done(job)
+        status = job.as_dict()
+        assert status["status"] == "done" and status["next_offset"] == 4
+        assert status["counts"] == {"pending": 0, "running": 0, "done": 2, "failed": 2, "cancelled": 0}
+        hosts = {h["ip"]: h for h in status["hosts"]}
+        assert hosts["10.6.0.2"]["exit_code"] == 1 and hosts["10.6.0.2"]["stdout_bytes"] == 24
+        assert "No route" in hosts["10.6.0.9"]["error"]
+        assert job.as_dict(offset=4)["hosts"] == []
+
+        page = job.read_output("10.6.0.2", offset=0, limit=10)
+        assert page["data"] == "line1\nline" and page["next_offset"] == 10 and not page["eof"]
+        page = job.read_output("10.6.0.2", offset=page["next_offset"], limit=100)
+        assert page["data"] == "2\nline1\nline2\n" and page["eof"]
+        with self.assertRaises(ValueError):
+            job.read_output("10.6.0.2", stream="nope")
+        with self.assertRaises(KeyError):
+            job.read_output("10.6.0.99")
+
+    def test_events_end_with_job_summary(self):
+        job = FleetJob("hostname", {f"10.6.1.{i}": SSHConnection(hostname=f"10.6.1.{i}") for i in range(5)},
+                       self.spool)
+        threading.Thread(target=job.run, args=(ThreadPoolExecutor(2),), daemon=True).start()
+        events = list(job.events())
+        assert [e["type"] for e in events] == ["host"] * 5 + ["job"]
+        assert events[-1]["counts"]["done"] == 5
+        assert list(job.events(offset=5)) == [events[-1]]
+
+        async def collect():
+            return [event async for event in job.aevents(offset=3)]
+        assert asyncio.run(collect()) == events[3:]
+
+    def test_async_events_do_not_block_a_thread(self):
+        self.fake.delay = 0.05
+        job = FleetJob("hostname", {f"10.6.7.{i}": SSHConnection(hostname=f"10.6.7.{i}") for i in range(3)},
+                       self.spool)
+        threading.Thread(target=job.run, args=(ThreadPoolExecutor(1),), daemon=True).start()
+
+        async def follow():
+            # autre tâche qui avance pendant le suivi : la boucle n'est pas bloquée
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+            ticker = asyncio.create_task(tick())
+            events = [event async for event in job.aevents(interval=0.02)]
+            ticker.cancel()
+            return events, ticks
+        events, ticks = asyncio.run(follow())
+        assert [e["type"] for e in events] == ["host"] * 3 + ["job"] and ticks >= 5
+
+    def test_cancel(self):
+        self.fake.delay = 0.05
+        manager = JobManager(self.spool, workers=1)
+        job = manager.start("hostname", {f"10.6.2.{i}": SSHConnection(hostname=f"10.6.2.{i}")
+                                         for i in range(10)})
+        time.sleep(0.02)
+        assert job.cancel()
+        wait_done(job)
+        counts = job.counts()
+        assert job.status == "cancelled" and counts["cancelled"] >= 8
+        assert counts["done"] + counts["cancelled"] == 10
+        assert not job.cancel()
+
+    def test_workers_shared_between_jobs(self):
+        running, peak, lock = [0], [0], threading.Lock()
+        execute = self.fake.execute
+
+        def counting(conn, command):
+            if not conn.hostname.startswith("10.6.6."):
+                # threads d'autres tests encore en vie : hors mesure
+                return execute(conn, command)
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            try:
+                time.sleep(0.01)
+                return execute(conn, command)
+            finally:
+                with lock:
+                    running[0] -= 1
+
+        self.fake.execute = counting
+        manager = JobManager(self.spool, workers=3)
+        started = [manager.start("hostname", {f"10.6.6.{j * 10 + i}": SSHConnection(hostname=f"10.6.6.{j * 10 + i}")
+                                              for i in range(6)}) for j in range(3)]
+        for job in started:
+            wait_done(job)
+        assert peak[0] <= 3 and all(job.counts()["done"] == 6 for job in started)
+        manager.shutdown()
+
+    def test_retention(self):
+        manager = JobManager(self.spool, retention=1)
+        first = manager.start("hostname", {"10.6.3.1": SSHConnection(hostname="10.6.3.1")})
+        wait_done(first)
+        second = manager.start("hostname", {"10.6.3.2": SSHConnection(hostname="10.6.3.2")})
+        wait_done(second)
+        manager.start("hostname", {"10.6.3.3": SSHConnection(hostname="10.6.3.3")})
+        assert manager.get(first.id) is None and manager.get(second.id) is not None
+        with self.assertRaises(ValueError):
+            manager.start(" ", {"10.6.3.1": SSHConnection(hostname="10.6.3.1")})
+
+    def test_ssh_stream_writes_chunks(self):
+        backend = SSHBackend()
+        channel = FakeChannel([("stdout", b"a" * 5), ("stderr", b"warn"), ("stdout", b"b" * 5)], exit_code=3)
+        backend._connect = lambda conn, sock=None: FakeClient(channel)  # pylint: disable=protected-access
+        received = []
+        code = backend.stream(SSHConnection(hostname="10.6.4.1"), "cmd",
+                              lambda stream, data: received.append((stream, data)))
+        assert code == 3 and received == [("stdout", b"aaaaa"), ("stderr", b"warn"), ("stdout", b"bbbbb")]
+
+        # fin de sortie arrivée avec le code de sortie, après les tests recv_ready
+        tail = FakeChannel([("stdout", b"tail"), ("stderr", b"err")], exit_code=0)
+        tail.recv_ready = tail.recv_stderr_ready = lambda: False
+        tail.exit_status_ready = lambda: True
+        backend._connect = lambda conn, sock=None: FakeClient(tail)  # pylint: disable=protected-access
+        received = []
+        code = backend.stream(SSHConnection(hostname="10.6.4.1"), "cmd",
+                              lambda stream, data: received.append((stream, data)))
+        assert code == 0 and received == [("stdout", b"tail"), ("stderr", b"err")]
+
+        cancel = threading.Event()
+        cancel.set()
+        backend._connect = lambda conn, sock=None: FakeClient(FakeChannel([], endless=True))  # pylint: disable=protected-access
+        assert backend.stream(SSHConnection(hostname="10.6.4.1"), "cmd", lambda *a: None, cancel=cancel) == -1
+
+    def test_endpoints(self):
+        with TestClient(app) as client:
+            response = client.post("/jobs", json={"command": "uptime", "hosts": ["10.6.5.1"]})
+            assert response.status_code == 200
+            job_id = response.json()["job_id"]
+            lines = [json.loads(line) for line in client.get(f"/jobs/{job_id}/events").text.splitlines()]
+            assert lines[0]["error"] == "Ordinateur not found" and lines[-1]["status"] == "done"
+            assert client.get(f"/jobs/{job_id}/hosts/10.6.5.1/output").json()["eof"]
+            assert client.get(f"/jobs/{job_id}/hosts/10.6.5.2/output").status_code == 404
+            assert client.post(f"/jobs/{job_id}/cancel").status_code == 409
+            assert client.get("/jobs/nope").status_code == 404
+            assert client.post("/jobs", json={"command": "uptime", "hosts": []}).status_code == 400
+            assert client.post("/jobs", json={"command": "uptime", "cidr": "10.6.0.0/99"}).status_code == 400
+
+
+class FakeClient:
+
+    def __init__(self, channel):
+        self.channel = channel
+
+    def get_transport(self):
+        return self
+
+    def open_session(self):
+        return self.channel
+
+    def close(self):
+        pass
@@ -0,0 +1,94 @@
+# tests/unit/test_listing.py
+import gzip
+import json
+import unittest
+from unittest import mock
+from fastapi.testclient import TestClient
+
+from tests.conftest import memory_engine, wait_ready
+from code.main import app
+from code.bulk import upsert_hosts
+from code import fastjson
+from code.listing import (
+    ListingCache, accepts_gzip, fetch_all, fetch_page, iter_ndjson, listing_query, parse_fields,
+    watch_writes,
+)
+
+HOSTS = [{"mac": f"AA:00:00:00:02:{i:02X}", "ip": f"10.9.0.{i}", "taille_disque": 64, "os": "Debian",
+          "status": "ON", "ssh_conn": {"hostname": f"10.9.0.{i}", "password": "secret"}}
+         for i in range(1, 8)]
+
+
+class TestListing(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = memory_engine()
+        upsert_hosts(self.engine, HOSTS)
+
+    def test_parse_fields(self):
+        assert parse_fields("status, ip") == ("ip", "status")
+        assert "ssh_conn_json" not in parse_fields(None)
+        for bad in ("ssh_conn_json", "ip,nope", ","):
+            with self.assertRaises(ValueError):
+                parse_fields(bad)
+
+    def test_accepts_gzip(self):
+        assert accepts_gzip("gzip, deflate, br") and accepts_gzip("br;q=1.0, GZIP;q=0.5")
+        assert not accepts_gzip("gzip;q=0") and not accepts_gzip("gzip; q=0.000, br")
+        assert accepts_gzip("*") and not accepts_gzip("*;q=0") and not accepts_gzip("gzip;q=0, *")
+        assert not accepts_gzip("identity") and not accepts_gzip(None) and not accepts_gzip("")
+
+    def test_only_requested_columns_selected(self):
+        sql = str(listing_query(("ip", "status")))
+        assert "ssh_conn_json" not in sql and "hostname" not in sql
+        assert fetch_all(self.engine, ("ip", "status"))[0] == {"ip": "10.9.0.1", "status": "ON"}
+
+    def test_pagination(self):
+        fields = ("ip",)
+        page = fetch_page(self.engine, fields, limit=3)
+        seen = [r["ip"] for r in page["items"]]
+        while page["next_after"] is not None:
+            page = fetch_page(self.engine, fields, limit=3, after=page["next_after"])
+            seen += [r["ip"] for r in page["items"]]
+        assert seen == [h["ip"] for h in HOSTS]
+
+    def test_ndjson(self):
+        lines = b"".join(iter_ndjson(self.engine, ("ip", "joignable"), cidr="10.9.0.0/30")).splitlines()
+        assert [json.loads(line)["ip"] for line in lines] == ["10.9.0.1", "10.9.0.2", "10.9.0.3"]
+
+    def test_fastjson_fallback(self):
+        with mock.patch.object(fastjson, "orjson", None):
+            assert fastjson.dumps({"a": [1, "é"]}) == '{"a":[1,"é"]}'.encode()
+
+    def test_listing_cache_invalidated_on_write(self):
+        cache = ListingCache(self.engine)
+        watch_writes(self.engine, cache.invalidate)
+        body, compressed = cache.body()
+        assert not compressed and len(json.loads(body)) == 7
+        body, compressed = cache.body(accept_gzip=True)
+        assert compressed and len(json.loads(gzip.decompress(body))) == 7
+        assert cache.stats()["hits"] == 1
+        upsert_hosts(self.engine, [dict(HOSTS[0], mac="AA:00:00:00:02:FF", ip="10.9.1.1")])
+        assert not cache.stats()["cached"]
+        assert len(json.loads(cache.body()[0])) == 8
+        fetch_all(self.engine, ("ip",))  # lecture : pas d'invalidation
+        assert cache.stats()["cached"]
+
+    def test_endpoint(self):
+        with TestClient(app) as client:
+            wait_ready(client)
+            client.put("/ordinateurs/upsert", json=HOSTS[:2])
+            r = client.get("/ordinateurs")
+            assert r.status_code == 200 and "ssh_conn_json" not in r.json()[0]
+            assert client.get("/ordinateurs?fields=ip&limit=1").json()["items"] == [{"ip": "10.9.0.1"}]
+            r = client.get("/ordinateurs?fields=ip,status&stream=1")
+            assert r.headers["content-type"] == "application/x-ndjson"
+            assert len(r.text.splitlines()) == 2
+            assert client.get("/ordinateurs?fields=ssh_conn_json").status_code == 400
+            misses = client.get("/listing/stats").json()["misses"]
+            assert len(client.get("/ordinateurs").json()) == 2
+            assert client.get("/listing/stats").json()["misses"] == misses
+            r = client.get("/ordinateurs", headers={"Accept-Encoding": "gzip;q=0, identity"})
+            assert "content-encoding" not in r.headers and len(r.json()) == 2
+            client.get("/clean")
+            assert client.get("/ordinateurs").json() == []
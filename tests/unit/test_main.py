@@ -11,6 +11,12 @@ if not hasattr(app.state, "ordinateurs"):
 
 class TestMain(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        # le lifespan crée les tables (plus rien n'est fait à l'import)
+        with TestClient(app):
+            pass
+
     def setUp(self):
         app.state.ordinateurs.clear()
         app.state.ordinateurs.append(Ordinateur(
@@ -0,0 +1,65 @@
+# tests/unit/test_probes.py
+import re
+import unittest
+
+from code.probes import COLLECTORS, compile_script, probe_host, probe_hosts
+
+FREE_OUTPUT = """              total        used        free      shared  buff/cache   available
+Mem:           7861        2048        4096         100        1717        5500
+Swap:          2047           0        2047"""
+
+
+class FakeSSH:
+    """Exécute le script compilé en remplaçant chaque commande par une sortie connue."""
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.calls = 0
+
+    def execute_command(self, command):
+        self.calls += 1
+        lines = []
+        for begin, cmd, end in re.findall(r"echo '([^']+)'; \( (.*?) \) 2>/dev/null; echo \"([^\"]+)\"", command):
+            lines.append(begin)
+            out, code = self.outputs.get(cmd, ("", 127))
+            if out:
+                lines.append(out)
+            lines.append(end.replace("$?", str(code)))
+        return "\n".join(lines) + "\n", "", 0
+
+
+class TestProbes(unittest.TestCase):
+
+    def setUp(self):
+        self.ssh = FakeSSH({
+            "free -m": (FREE_OUTPUT, 0),
+            "top -bn1 | grep 'Cpu(s)'": ("%Cpu(s):  3.1 us,  1.0 sy,  0.0 ni, 95.5 id", 0),
+            "cat /etc/os-release": ('ID=alpine\nPRETTY_NAME="Alpine Linux"', 0),
+        })
+
+    def test_compile_script_contains_all_collectors(self):
+        script = compile_script(["free_memory", "cpu_load"], "@@m")
+        assert COLLECTORS["free_memory"].command in script
+        assert COLLECTORS["cpu_load"].command in script
+        # free_memory et total_memory partagent "free -m" : exécuté une seule fois
+        script = compile_script(["free_memory", "total_memory", "cpu_load"], "@@m")
+        assert script.count("free -m") == 1
+
+    def test_one_round_trip_for_many_metrics(self):
+        result = probe_host(self.ssh, ["free_memory", "total_memory", "cpu_load", "os_release"])
+        assert self.ssh.calls == 1
+        metrics = result["metrics"]
+        assert metrics["free_memory"]["value"] == 4096 / 1024
+        assert metrics["total_memory"]["value"] == 7861 / 1024
+        assert round(metrics["cpu_load"]["value"], 1) == 4.5
+        assert metrics["os_release"]["value"]["PRETTY_NAME"] == "Alpine Linux"
+
+    def test_failed_collector_does_not_break_others(self):
+        result = probe_host(self.ssh, ["hostname", "free_memory"])
+        assert result["metrics"]["hostname"]["success"] is False
+        assert result["metrics"]["free_memory"]["success"] is True
+
+    def test_probe_hosts_concurrently(self):
+        results = probe_hosts({"10.0.0.1": self.ssh, "10.0.0.2": self.ssh}, ["free_memory"])
+        assert set(results) == {"10.0.0.1", "10.0.0.2"}
+        assert self.ssh.calls == 2
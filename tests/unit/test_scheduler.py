@@ -0,0 +1,80 @@
+# tests/unit/test_scheduler.py
+import random
+import unittest
+from fastapi.testclient import TestClient
+
+from code.main import app
+from code.scheduler import PollScheduler, TokenBucket
+
+
+def make_scheduler(**kwargs):
+    params = dict(interval=60, min_interval=15, max_interval=600, rate=1000, workers=1000,
+                  clock=lambda: 0.0, rng=random.Random(42))
+    params.update(kwargs)
+    return PollScheduler(lambda ip: None, **params)
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_first_polls_spread_over_interval(self):
+        scheduler = make_scheduler()
+        for i in range(1000):
+            scheduler.add_host(f"10.0.{i // 256}.{i % 256}", now=0.0)
+        per_slot = [len(scheduler.next_batch(now=t)) for t in range(10, 70, 10)]
+        # ~1000/6 par tranche de 10 s, jamais tout dans la même seconde
+        assert all(100 < n < 240 for n in per_slot), per_slot
+        assert sum(per_slot) == 1000
+
+    def test_interval_adapts_to_volatility(self):
+        scheduler = make_scheduler()
+        scheduler.add_host("10.0.0.1", now=0.0)
+        host = scheduler.hosts["10.0.0.1"]
+        scheduler.next_batch(now=60)
+        scheduler.complete("10.0.0.1", {"cpu_load": 10.0}, now=60)
+        scheduler.next_batch(now=200)
+        scheduler.complete("10.0.0.1", {"cpu_load": 10.5}, now=200)
+        assert host.interval == 90  # stable : x1.5
+        scheduler.next_batch(now=400)
+        scheduler.complete("10.0.0.1", {"cpu_load": 80.0}, now=400)
+        assert host.interval == 45  # volatile : /2
+
+    def test_backoff_on_unreachable(self):
+        scheduler = make_scheduler()
+        scheduler.add_host("10.0.0.1", reachable=False, now=0.0)
+        host = scheduler.hosts["10.0.0.1"]
+        assert host.interval == 120
+        for t in (1000, 2000, 3000):
+            scheduler.next_batch(now=t)
+            scheduler.complete("10.0.0.1", None, now=t)
+        assert host.interval == 600  # plafonné à max_interval
+        scheduler.next_batch(now=5000)
+        scheduler.complete("10.0.0.1", {"cpu_load": 5.0}, now=5000)
+        assert host.interval == 60 and host.failures == 0
+
+    def test_rate_budget(self):
+        scheduler = make_scheduler(rate=5)
+        for i in range(50):
+            scheduler.add_host(f"10.0.0.{i}", now=0.0)
+        assert len(scheduler.next_batch(now=100)) == 5
+        stats = scheduler.stats(now=100)
+        assert stats["in_flight"] == 5
+        assert stats["queue_lag_s"] > 0
+        assert stats["budget_used_pct"] == round(100 * 5 / (5 * 60), 2)
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=2, capacity=2)
+        assert bucket.take(0.0) and bucket.take(0.0) and not bucket.take(0.0)
+        assert bucket.wait_time(0.0) == 0.5
+        assert bucket.take(0.5)
+
+    def test_sync_removes_hosts(self):
+        scheduler = make_scheduler()
+        scheduler.sync([("10.0.0.1", True), ("10.0.0.2", True)], now=0.0)
+        scheduler.sync([("10.0.0.2", True)], now=0.0)
+        assert list(scheduler.hosts) == ["10.0.0.2"]
+        assert scheduler.next_batch(now=1000) == ["10.0.0.2"]
+
+    def test_stats_endpoint(self):
+        r = TestClient(app).get("/scheduler/stats")
+        assert r.status_code == 200
+        assert "queue_lag_s" in r.json()
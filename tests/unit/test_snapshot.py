@@ -0,0 +1,94 @@
+# tests/unit/test_snapshot.py
+import io
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, select
+
+from tests.conftest import memory_engine, wait_ready
+from code.main import app, alert_engine
+from code.alerts import AlertRule
+from code.models import Ordinateur, HostFact, ComputerStatus
+from code.snapshot import (
+    iter_gzip_chunks, iter_records, latest_snapshot, read_records,
+    restore_file, restore_snapshot, save_snapshot,
+)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = memory_engine()
+        with Session(self.engine) as session:
+            for i in range(3):
+                session.add(Ordinateur(
+                    mac=f"AA:BB:CC:DD:EE:0{i}", ip=f"10.0.0.{i + 1}", taille_disque=512,
+                    os="Ubuntu 22.04", status=ComputerStatus.ON, ram=16.0,
+                    ssh_conn_json={"hostname": f"10.0.0.{i + 1}", "username": "user"},
+                ))
+            session.add(HostFact(ip="10.0.0.1", name="total_memory", value=16.0,
+                                 content_hash="abc", collected_at=1.0))
+            session.commit()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def dump(self) -> bytes:
+        return b"".join(iter_gzip_chunks(iter_records(self.engine)))
+
+    def test_export_is_gzip_ndjson(self):
+        lines = gzip.decompress(self.dump()).decode().splitlines()
+        assert json.loads(lines[0])["type"] == "header"
+        assert [json.loads(l)["type"] for l in lines[1:]] == ["ordinateur"] * 3 + ["host_fact"]
+
+    def test_roundtrip(self):
+        target = memory_engine()
+        batches = []
+        counts = restore_snapshot(target, read_records(io.BytesIO(self.dump())),
+                                  on_batch=lambda kind, rows: batches.append(kind))
+        assert counts == {"ordinateur": 3, "host_fact": 1}
+        assert batches == ["ordinateur", "host_fact"]
+        with Session(target) as session:
+            rows = session.exec(select(Ordinateur)).all()
+        assert rows[0].ssh_conn.username == "user"
+        assert rows[2].status == ComputerStatus.ON
+
+    def test_plain_ndjson_accepted(self):
+        raw = gzip.decompress(self.dump())
+        counts = restore_snapshot(memory_engine(), read_records(io.BytesIO(raw)))
+        assert counts["ordinateur"] == 3
+
+    def test_unknown_version_rejected(self):
+        raw = b'{"type": "header", "version": 99}\n'
+        with self.assertRaises(ValueError):
+            list(read_records(io.BytesIO(raw)))
+
+    def test_save_and_latest(self):
+        assert latest_snapshot(self.directory) is None
+        path = save_snapshot(self.engine, self.directory)
+        assert latest_snapshot(self.directory) == path
+        assert restore_file(memory_engine(), path)["ordinateur"] == 3
+
+    def test_export_import_endpoints(self):
+        with TestClient(app) as client:
+            wait_ready(client)
+            client.post("/add_ordinateur", json={
+                "mac": "00:1B:44:11:3A:C1", "ip": "192.168.5.1", "taille_disque": 256,
+                "os": "Debian", "status": "ON", "ram": 8.0,
+            })
+            body = client.get("/snapshot/export").content
+            client.get("/clean")
+            rule = alert_engine.add_rule(AlertRule(metric="cpu_load", op=">", threshold=50))
+            self.addCleanup(alert_engine.remove_rule, rule.id)
+            alert_engine.observe("192.168.5.9", "cpu_load", 99)
+            r = client.post("/snapshot/import", content=body)
+            assert r.status_code == 200
+            assert client.get("/alerts").json() == []
+            assert r.json()["counts"]["ordinateur"] == 1
+            assert [o.ip for o in app.state.ordinateurs] == ["192.168.5.1"]
+            assert client.post("/snapshot/import", content=b"not json").status_code == 400
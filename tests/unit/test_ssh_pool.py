@@ -0,0 +1,142 @@
+# tests/unit/test_ssh_pool.py
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from code.backends import FakeBackend, SSHBackend
+from code.models import JumpHost, SSHConnection
+from code.ssh_pool import BastionPool
+
+
+class FakeChannel:
+
+    def __init__(self, dest):
+        self.dest = dest
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeTransport:
+
+    def __init__(self):
+        self.active = True
+        self.opened = []
+
+    def is_active(self):
+        return self.active
+
+    def open_channel(self, kind, dest, src, timeout=None):  # pylint: disable=unused-argument
+        if not self.active:
+            raise EOFError("transport closed")
+        assert kind == "direct-tcpip"
+        channel = FakeChannel(dest)
+        self.opened.append(channel)
+        return channel
+
+
+class FakeClient:
+
+    def __init__(self):
+        self.transport = FakeTransport()
+
+    def get_transport(self):
+        return self.transport
+
+    def close(self):
+        self.transport.active = False
+
+
+class TestBastionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.clients = []
+        self.jump = JumpHost(hostname="192.168.1.252", username="admin")
+
+    def connect(self, jump, timeout):  # pylint: disable=unused-argument
+        self.clients.append(FakeClient())
+        return self.clients[-1]
+
+    def test_one_transport_per_bastion(self):
+        pool = BastionPool(connect=self.connect)
+        for host in ("10.0.0.1", "10.0.0.2", "10.0.0.3"):
+            with pool.tunnel(self.jump, host, 22) as channel:
+                assert channel.dest == (host, 22)
+            assert channel.closed
+        assert len(self.clients) == 1
+        stats = pool.stats()["admin@192.168.1.252:22"]
+        assert stats["handshakes"] == 1 and stats["channels_opened"] == 3
+        assert stats["active_channels"] == 0 and stats["connected"]
+
+    def test_reconnects_dead_transport(self):
+        pool = BastionPool(connect=self.connect)
+        with pool.tunnel(self.jump, "10.0.0.1", 22):
+            pass
+        self.clients[0].transport.active = False
+        with pool.tunnel(self.jump, "10.0.0.1", 22) as channel:
+            assert channel in self.clients[1].transport.opened
+        assert len(self.clients) == 2
+
+    def test_session_limit(self):
+        pool = BastionPool(connect=self.connect, limit=2, wait_timeout=0.05)
+        release = threading.Event()
+        inside = threading.Barrier(3)
+
+        def hold(host):
+            with pool.tunnel(self.jump, host, 22):
+                inside.wait()
+                release.wait()
+
+        threads = [threading.Thread(target=hold, args=(f"10.0.0.{i}",)) for i in (1, 2)]
+        for t in threads:
+            t.start()
+        inside.wait()
+        with self.assertRaises(TimeoutError):
+            with pool.tunnel(self.jump, "10.0.0.3", 22):
+                pass
+        release.set()
+        for t in threads:
+            t.join()
+        stats = pool.stats()["admin@192.168.1.252:22"]
+        assert stats["rejected"] == 1 and stats["channels_opened"] == 2
+        pool.close()
+        assert not pool.stats()["admin@192.168.1.252:22"]["connected"]
+
+    def test_wait_longer_or_cancel(self):
+        pool = BastionPool(connect=self.connect, limit=1, wait_timeout=0.01)
+        with pool.tunnel(self.jump, "10.0.0.1", 22):
+            cancel = threading.Event()
+            threading.Timer(0.05, cancel.set).start()
+            with self.assertRaises(InterruptedError):
+                with pool.tunnel(self.jump, "10.0.0.2", 22, wait=5.0, cancel=cancel):
+                    pass
+        # session libérée pendant l'attente : le job l'obtient au lieu d'échouer
+        holder = pool.tunnel(self.jump, "10.0.0.1", 22)
+        holder.__enter__()  # pylint: disable=unnecessary-dunder-call
+        threading.Timer(0.05, holder.__exit__, (None, None, None)).start()
+        with pool.tunnel(self.jump, "10.0.0.3", 22, wait=5.0) as channel:
+            assert channel.dest == ("10.0.0.3", 22)
+
+    def test_close_idle(self):
+        pool = BastionPool(connect=self.connect)
+        with pool.tunnel(self.jump, "10.0.0.1", 22):
+            assert pool.close_idle(max_idle=0) == 0  # canal ouvert : on garde
+        assert pool.close_idle(max_idle=60) == 0
+        assert pool.close_idle(max_idle=0) == 1 and pool.close_idle(max_idle=0) == 0
+        assert not pool.stats()["admin@192.168.1.252:22"]["connected"]
+        with pool.tunnel(self.jump, "10.0.0.1", 22):
+            pass
+        assert len(self.clients) == 2
+
+    def test_jump_host_in_connection(self):
+        conn = SSHConnection(hostname="10.0.0.1", jump_host={"hostname": "192.168.1.252", "port": 3022})
+        assert conn.jump_host.port == 3022
+        assert FakeBackend().execute(conn, "hostname")[2] == 0
+        assert FakeBackend(unreachable={"192.168.1.252"}).execute(conn, "hostname")[2] == -1
+
+    def test_backend_creates_one_pool(self):
+        backend = SSHBackend()
+        with ThreadPoolExecutor(8) as pool:
+            pools = set(pool.map(lambda _: id(backend.bastions), range(32)))
+        assert len(pools) == 1
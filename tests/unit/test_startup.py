@@ -0,0 +1,34 @@
+# tests/unit/test_startup.py
+import sys
+import subprocess
+import unittest
+from fastapi.testclient import TestClient
+
+from tests.conftest import wait_ready
+from code.main import app, startup_report
+
+
+class TestStartup(unittest.TestCase):
+
+    def test_paramiko_not_imported(self):
+        # paramiko ne doit être chargé qu'au premier usage SSH ; interpréteur neuf,
+        # d'autres tests de la suite importent paramiko
+        check = "import sys, code.main; sys.exit('paramiko' in sys.modules)"
+        assert subprocess.run([sys.executable, "-c", check], check=False).returncode == 0
+
+    def test_ready_and_report(self):
+        with TestClient(app) as client:
+            wait_ready(client)
+            assert client.get("/ready").json() == {"ready": True}
+
+            report = client.get("/startup_report").json()
+            assert report["ready"] is True
+            for phase in ("import", "db_init", "cache_load", "pool_prewarm"):
+                assert phase in report["phases_ms"]
+
+    def test_not_ready_before_warm_up(self):
+        startup_report.reset()
+        client = TestClient(app)
+        r = client.get("/ready")
+        assert r.status_code == 503
+        assert r.json()["ready"] is False